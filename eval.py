@@ -1,33 +1,254 @@
-from pycollatinus.lemmatiseur import Lemmatiseur
+""" Suite de mesures de performance de pycollatinus
+
+Mesure le temps de chargement depuis les données de Collatinus, depuis un instantané et depuis un pickle, la latence
+de lemmatise() sur des formes fréquentes et rares, le débit de lemmatise_multiple() sur un corpus, le temps des
+normalisations de pycollatinus.ch, le débit du choix des analyses par pycollatinus.tagger et la mémoire maximale d'un
+processus qui charge le lemmatiseur.
+
+Les résultats sont écrits en JSON, pour comparer deux exécutions :
+
+    python eval.py --output avant.json
+    python eval.py --output apres.json --baseline avant.json
+
+Le corpus est formé des textes latins de eval_corpus.txt, complétés par des formes tirées au hasard dans le lexique,
+chaque lemme étant tiré selon sa fréquence (nbOcc). Le tirage est reproductible (--seed).
+"""
+from pycollatinus import Lemmatiseur, __version__
+from pycollatinus import ch
+from pycollatinus.util import lignesFichier
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
 import timeit
 
 
-# l.compile()
-# del l
-# l = Lemmatiseur.load()
-
-number_of_tests = 10
-start_time = timeit.default_timer()
-for x in range(number_of_tests):
-    l = Lemmatiseur()
-    if x != number_of_tests - 1:
-        del l
-    print(x)
-elapsed = timeit.default_timer() - start_time
-
-print("{} s par test en moyenne pour {} chargements bruts".format(elapsed / number_of_tests, number_of_tests))
-l.compile()
-del l
-
-start_time = timeit.default_timer()
-for x in range(number_of_tests):
-    l = Lemmatiseur.load()
-    del l
-    print(x)
-elapsed = timeit.default_timer() - start_time
-print("{} s par test en moyenne pour {} chargements par pickle".format(elapsed / number_of_tests, number_of_tests))
-
-print(l.lemmatise("est"))
-print(l.lemmatise("lascivi"))
-print(l.lemmatise("lascivissimi"))
-print(l.lemmatise("aliud"))
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_corpus.txt")
+SPACES = re.compile("\\W")
+
+# Mémoire maximale d'un processus qui charge un lemmatiseur, en octets. Sous Linux, ru_maxrss est hérité du
+# processus parent : VmHWM, propre au processus, est lu en priorité
+MEMOIRE = """
+import resource, sys
+from pycollatinus import Lemmatiseur
+Lemmatiseur(snapshot_dir=sys.argv[1] if len(sys.argv) > 1 else False)
+try:
+    with open("/proc/self/status") as f:
+        print([int(l.split()[1]) * 1024 for l in f if l.startswith("VmHWM:")][0])
+except OSError:
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(maxrss if sys.platform == "darwin" else maxrss * 1024)
+"""
+
+
+def chronometre(fonction, repeat):
+    """ Durées de repeat appels à fonction
+
+    :rtype: dict
+    """
+    durees = timeit.repeat(fonction, number=1, repeat=repeat)
+    return {"min": min(durees), "mean": statistics.mean(durees), "runs": repeat}
+
+
+def latences(lemmatiseur, formes):
+    """ Latence de lemmatise() sur chaque forme, en microsecondes
+
+    :rtype: dict
+    """
+    durees = []
+    for forme in formes:
+        debut = timeit.default_timer()
+        list(lemmatiseur.lemmatise(forme))
+        durees.append((timeit.default_timer() - debut) * 1e6)
+    durees.sort()
+    return {
+        "forms": len(durees),
+        "mean_us": statistics.mean(durees),
+        "median_us": statistics.median(durees),
+        "p95_us": durees[int(len(durees) * 0.95)],
+        "max_us": durees[-1]
+    }
+
+
+def echantillon(lemmatiseur, nombre, seed):
+    """ Formes fléchies tirées dans le lexique, chaque lemme selon son nombre d'occurrences, et formes des
+    lemmes les plus fréquents et les plus rares
+
+    :return: Formes tirées, formes fréquentes, formes rares
+    :rtype: tuple of list of str
+    """
+    hasard = random.Random(seed)
+    lemmes = sorted(lemmatiseur._lemmes.values(), key=lambda lemme: (-lemme.nbOcc(), lemme.cle()))
+    tires = hasard.choices(lemmes, weights=[lemme.nbOcc() + 1 for lemme in lemmes], k=nombre)
+    formes = {}
+
+    def forme(lemme):
+        if lemme.cle() not in formes:
+            formes[lemme.cle()] = sorted(lemme.possible_forms()) or [lemme.gr()]
+        return hasard.choice(formes[lemme.cle()])
+
+    texte = [forme(lemme) for lemme in tires]
+    frequentes = [forme(lemme) for lemme in lemmes[:200]]
+    rares = [forme(lemme) for lemme in hasard.sample([lemme for lemme in lemmes if lemme.nbOcc() <= 1], 200)]
+    return texte, frequentes, rares
+
+
+def memoire(snapshot_dir=None):
+    """ Mémoire maximale d'un nouveau processus qui charge le lemmatiseur, en octets
+
+    :param snapshot_dir: Dossier de l'instantané à charger (Default : None, chargement depuis les données)
+    :rtype: int
+    """
+    try:
+        import resource  # Unix seulement
+    except ImportError:
+        return None
+    args = [sys.executable, "-c", MEMOIRE] + ([snapshot_dir] if snapshot_dir else [])
+    return int(subprocess.check_output(args, cwd=os.path.dirname(os.path.abspath(__file__))).split()[-1])
+
+
+def normalisations(repeat):
+    """ Temps des normalisations de pycollatinus.ch par mot du lexique, hors cache et en cache, en nanosecondes
+
+    :rtype: dict
+    """
+    chemin = os.path.join(os.path.dirname(ch.__file__), "data", "lemmes.la")
+    mots = [ligne.split("|")[0] for ligne in lignesFichier(chemin)]
+    # Les caches sont remplis avant la mesure des appels en cache
+    for fonction in (ch.atone, ch.deramise, ch.communes):
+        for mot in mots:
+            fonction(mot)
+    resultats = {}
+    for nom, fonction in [
+        ("atone", lambda: [ch.atone.__wrapped__(mot) for mot in mots]),
+        ("atone_cached", lambda: [ch.atone(mot) for mot in mots]),
+        ("atone_liste", lambda: ch.atone_liste(mots)),
+        ("deramise", lambda: [ch.deramise.__wrapped__(mot) for mot in mots]),
+        ("deramise_cached", lambda: [ch.deramise(mot) for mot in mots]),
+        ("deramise_liste", lambda: ch.deramise_liste(mots)),
+        ("communes", lambda: [ch.communes.__wrapped__(mot) for mot in mots]),
+        ("communes_cached", lambda: [ch.communes(mot) for mot in mots]),
+    ]:
+        resultats[nom + "_ns"] = min(timeit.repeat(fonction, number=1, repeat=repeat)) / len(mots) * 1e9
+    return resultats
+
+
+def mesure(repeat=3, tokens=5000, seed=0, log=print):
+    """ Lance toutes les mesures
+
+    :param repeat: Nombre de répétitions de chaque mesure
+    :param tokens: Nombre de formes tirées dans le lexique pour compléter le corpus
+    :param seed: Graine du tirage
+    :param log: Fonction d'affichage de la progression
+    :rtype: dict
+    """
+    resultats = {"meta": {
+        "pycollatinus": __version__, "python": platform.python_version(), "platform": platform.platform(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"), "repeat": repeat, "seed": seed
+    }}
+
+    log("Chargement depuis les données de Collatinus")
+    resultats["parse"] = chronometre(lambda: Lemmatiseur(snapshot_dir=False), repeat)
+    lemmatiseur = Lemmatiseur(snapshot_dir=False)
+    resultats["parse"]["stages"] = {
+        etape["stage"]: etape["time"] for etape in lemmatiseur.load_report["stages"]
+    }
+
+    with tempfile.TemporaryDirectory() as dossier:
+        log("Chargement depuis un instantané")
+        Lemmatiseur(snapshot_dir=dossier)
+        resultats["snapshot_load"] = chronometre(lambda: Lemmatiseur(snapshot_dir=dossier), repeat)
+        resultats["snapshot_load"]["size"] = sum(
+            os.path.getsize(os.path.join(dossier, nom)) for nom in os.listdir(dossier)
+        )
+        log("Chargement depuis un lemmatiseur compilé par pickle")
+        chemin = lemmatiseur.compile(method="pickle", path=os.path.join(dossier, "compiled.pickle"))
+        resultats["pickle_load"] = chronometre(lambda: Lemmatiseur.load(chemin), repeat)
+        resultats["pickle_load"]["size"] = os.path.getsize(chemin)
+        log("Mémoire maximale")
+        resultats["memory"] = {"parse_maxrss": memoire(), "snapshot_maxrss": memoire(dossier)}
+
+    log("Latence")
+    texte, frequentes, rares = echantillon(lemmatiseur, tokens, seed)
+    resultats["latency"] = {
+        "common": latences(lemmatiseur, frequentes),
+        "rare": latences(lemmatiseur, rares)
+    }
+
+    log("Débit")
+    with open(CORPUS) as f:
+        corpus = f.read() + "\n" + " ".join(texte)
+    nombre = len([mot for mot in SPACES.split(corpus) if mot])
+    durees = chronometre(lambda: lemmatiseur.lemmatise_multiple(corpus), repeat)
+    resultats["throughput"] = {
+        "tokens": nombre, "time": durees["min"], "tokens_per_second": nombre / durees["min"]
+    }
+    durees = chronometre(lambda: lemmatiseur.lemmatise_multiple(corpus, as_dict=False), repeat)
+    resultats["throughput"]["tokens_per_second_records"] = nombre / durees["min"]
+    # Travail de la cascade des variantes sur un passage du corpus
+    lemmatiseur.clear_variant_info()
+    lemmatiseur.lemmatise_multiple(corpus, as_dict=False)
+    resultats["variants"] = lemmatiseur.variant_info()
+
+    try:
+        from pycollatinus.tagger import Tagger
+    except ImportError:  # NumPy n'est pas installé
+        Tagger = None
+    if Tagger is not None:
+        log("Désambiguïsation")
+        tagger = Tagger(lemmatiseur)
+        durees = chronometre(lambda: tagger.tag(corpus), repeat)
+        resultats["tagger"] = {"tokens_per_second": nombre / durees["min"]}
+        durees = chronometre(lambda: tagger.tag(corpus, n_best=3), repeat)
+        resultats["tagger"]["tokens_per_second_n_best"] = nombre / durees["min"]
+
+    log("Normalisations")
+    resultats["normalisation"] = normalisations(repeat)
+    return resultats
+
+
+def compare(resultats, reference, prefixe=""):
+    """ Rapport des valeurs numériques de resultats par rapport à celles de reference
+
+    :rtype: list of str
+    """
+    lignes = []
+    for cle, valeur in resultats.items():
+        if cle not in reference or cle == "meta":
+            continue
+        if isinstance(valeur, dict):
+            lignes += compare(valeur, reference[cle], prefixe + cle + ".")
+        elif isinstance(valeur, (int, float)) and not isinstance(valeur, bool) and reference[cle]:
+            lignes.append("{}{} : {:.4g} -> {:.4g} ({:+.1%})".format(
+                prefixe, cle, reference[cle], valeur, valeur / reference[cle] - 1
+            ))
+    return lignes
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--output", help="Fichier JSON des résultats (Default : sortie standard)")
+    arguments.add_argument("--baseline", help="Fichier JSON d'une exécution précédente, à comparer")
+    arguments.add_argument("--repeat", type=int, default=3, help="Répétitions de chaque mesure")
+    arguments.add_argument("--tokens", type=int, default=5000, help="Formes tirées dans le lexique")
+    arguments.add_argument("--seed", type=int, default=0, help="Graine du tirage des formes")
+    args = arguments.parse_args()
+
+    resultats = mesure(
+        repeat=args.repeat, tokens=args.tokens, seed=args.seed, log=lambda message: print(message, file=sys.stderr)
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(resultats, f, indent=2)
+    else:
+        print(json.dumps(resultats, indent=2))
+    if args.baseline:
+        with open(args.baseline) as f:
+            print("\n".join(compare(resultats, json.load(f))), file=sys.stderr)
@@ -1 +1,3 @@
-from .lemmatiseur import Lemmatiseur
\ No newline at end of file
+from .lemmatiseur import Lemmatiseur
+
+__version__ = "0.1.6"
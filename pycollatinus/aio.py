@@ -0,0 +1,275 @@
+""" Lemmatisation depuis une boucle asyncio, voir AsyncLemmatiseur
+
+Ce module demande Python 3.5.2 ou plus récent, pour async et await ; le reste de pycollatinus n'en dépend pas.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import asyncio
+import threading
+
+from .lemmatiseur import Lemmatiseur, iter_tokens, decoupe_morceau
+from . import parallel
+
+
+class _ExecuteurLemmatiseur(ProcessPoolExecutor):
+    """ Exécuteur de processus qui garde le lemmatiseur à charger dans chaque processus, voir process_executor()
+    """
+    def __init__(self, processes, path, options):
+        super(_ExecuteurLemmatiseur, self).__init__(processes)
+        self.chargement = (path, options)
+
+
+def _lemmatise_tokens_processus(args):
+    """ Lemmatise un paquet de mots dans un processus de travail, qui charge son lemmatiseur au premier paquet :
+    ProcessPoolExecutor n'accepte une fonction d'initialisation que depuis Python 3.7
+    """
+    path, options, tokens, pos = args
+    if parallel._lemmatiseur is None:
+        parallel._initialiser(path, options)
+    return parallel._lemmatise_tokens((tokens, pos))
+
+
+def process_executor(processes=None, path=None, **options):
+    """ Exécuteur de processus dont chaque processus charge le lemmatiseur une seule fois, au premier paquet qu'il
+    reçoit, à utiliser avec AsyncLemmatiseur
+
+    :param processes: Nombre de processus (Default : nombre de cœurs)
+    :type processes: int
+    :param path: Chemin d'un lemmatiseur compilé par Lemmatiseur.compile() à charger dans chaque processus
+        (Default : None, les processus chargent les données de Collatinus)
+    :type path: str
+    :param options: Options du constructeur de Lemmatiseur utilisées quand path n'est pas donné
+    :rtype: concurrent.futures.ProcessPoolExecutor
+    """
+    return _ExecuteurLemmatiseur(processes, path, options)
+
+
+class _Paquets(object):
+    """ Regroupe en paquets des mots donnés par un itérable ou un itérable asynchrone. Les itérateurs asynchrones
+    de ce module sont des classes plutôt que des générateurs asynchrones, qui n'existent que depuis Python 3.6
+
+    :param tokens: Mots
+    :param taille: Nombre de mots par paquet
+    """
+    def __init__(self, tokens, taille):
+        self._asynchrone = hasattr(tokens, "__aiter__")
+        self._tokens = tokens.__aiter__() if self._asynchrone else iter(tokens)
+        self._taille = taille
+        self._fini = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """ Paquet suivant
+
+        :rtype: list of str
+        """
+        if self._asynchrone:
+            paquet = []
+            while not self._fini and len(paquet) < self._taille:
+                try:
+                    paquet.append(await self._tokens.__anext__())
+                except StopAsyncIteration:
+                    self._fini = True
+        else:
+            paquet = list(islice(self._tokens, self._taille))
+        if not paquet:
+            raise StopAsyncIteration
+        return paquet
+
+
+class _TokensAsynchrones(object):
+    """ Découpe en mots un itérable asynchrone de morceaux de texte, comme iter_tokens()
+
+    :param source: Itérable asynchrone de morceaux de texte
+    """
+    def __init__(self, source):
+        self._source = source.__aiter__()
+        self._mots = deque()
+        self._reste = ""
+        self._fini = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """ Mot suivant
+
+        :rtype: str
+        """
+        while not self._mots:
+            if self._fini:
+                raise StopAsyncIteration
+            try:
+                morceau = await self._source.__anext__()
+            except StopAsyncIteration:
+                self._fini = True
+                if self._reste:
+                    self._mots.append(self._reste)
+                continue
+            mots, self._reste = decoupe_morceau(self._reste, morceau)
+            self._mots.extend(mots)
+        return self._mots.popleft()
+
+
+class _Lemmatisations(object):
+    """ Lemmatise des mots par paquets dans l'exécuteur d'un AsyncLemmatiseur
+
+    :param lemmatiseur: Lemmatiseur asynchrone
+    :type lemmatiseur: AsyncLemmatiseur
+    :param tokens: Mots, itérable ou itérable asynchrone
+    :param pos: Récupère la POS
+    :param tokens_per_batch: Nombre de mots par paquet
+    """
+    def __init__(self, lemmatiseur, tokens, pos, tokens_per_batch):
+        self._lemmatiseur = lemmatiseur
+        self._paquets = _Paquets(tokens, tokens_per_batch)
+        self._pos = pos
+        self._en_cours = deque()
+        self._fini = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """ Résultats du paquet suivant, dans l'ordre des mots
+
+        :rtype: list
+        """
+        try:
+            while not self._fini and len(self._en_cours) < self._lemmatiseur._max_pending:
+                try:
+                    paquet = await self._paquets.__anext__()
+                except StopAsyncIteration:
+                    self._fini = True
+                else:
+                    self._en_cours.append(self._lemmatiseur._soumet(paquet, self._pos))
+            if not self._en_cours:
+                raise StopAsyncIteration
+            return await self._en_cours.popleft()
+        except BaseException:
+            # Annulation ou erreur : les paquets pas encore commencés ne le seront pas
+            self._annule()
+            raise
+
+    async def aclose(self):
+        """ Abandonne la lemmatisation : les paquets pas encore commencés ne le seront pas """
+        self._fini = True
+        self._annule()
+
+    def _annule(self):
+        while self._en_cours:
+            self._en_cours.popleft().cancel()
+
+
+class _Resultats(object):
+    """ Résultats de chaque mot des paquets d'une lemmatisation
+
+    :param lemmatisations: Résultats de chaque paquet
+    :type lemmatisations: _Lemmatisations
+    """
+    def __init__(self, lemmatisations):
+        self._lemmatisations = lemmatisations
+        self._resultats = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """ Résultats du mot suivant
+
+        :rtype: list
+        """
+        while not self._resultats:
+            self._resultats.extend(await self._lemmatisations.__anext__())
+        return self._resultats.popleft()
+
+    async def aclose(self):
+        """ Abandonne la lemmatisation : les paquets pas encore commencés ne le seront pas """
+        await self._lemmatisations.aclose()
+
+
+class AsyncLemmatiseur(object):
+    """ Lemmatisation depuis une boucle asyncio : le texte est découpé en paquets de mots, lemmatisés dans un
+    exécuteur de threads ou de processus. La boucle reprend la main entre deux paquets, et l'annulation de la
+    coroutine annule les paquets qui ne sont pas encore lemmatisés.
+
+    Les résultats sont ceux de Lemmatiseur.lemmatise_multiple(), dans l'ordre du texte.
+
+    :param lemmatiseur: Lemmatiseur utilisé dans un exécuteur de threads (Default : None, un Lemmatiseur est chargé).
+        Avec un exécuteur de processus, chaque processus utilise son propre lemmatiseur, voir process_executor().
+    :type lemmatiseur: Lemmatiseur
+    :param executor: Exécuteur des paquets (Default : None, l'exécuteur par défaut de la boucle)
+    :type executor: concurrent.futures.Executor
+    :param tokens_per_batch: Nombre de mots par paquet
+    :type tokens_per_batch: int
+    :param max_pending: Nombre maximal de paquets envoyés à l'exécuteur et pas encore renvoyés. Au-delà de 1,
+        utile avec un exécuteur de processus, les paquets suivants sont préparés pendant la lemmatisation.
+    :type max_pending: int
+    """
+    def __init__(self, lemmatiseur=None, executor=None, tokens_per_batch=2000, max_pending=1):
+        if max_pending < 1:
+            raise ValueError("max_pending must be a positive integer")
+        self._processus = isinstance(executor, ProcessPoolExecutor)
+        if lemmatiseur is None and not self._processus:
+            lemmatiseur = Lemmatiseur()
+        self._lemmatiseur = lemmatiseur
+        self._executor = executor
+        self._tokens_per_batch = tokens_per_batch
+        self._max_pending = max_pending
+        # Le cache et les compteurs du lemmatiseur ne supportent pas d'être modifiés par deux threads à la fois
+        self._verrou = threading.Lock()
+
+    def _lemmatise_paquet(self, tokens, pos):
+        """ Lemmatise un paquet de mots dans un thread de l'exécuteur
+
+        :rtype: list
+        """
+        with self._verrou:
+            return self._lemmatiseur.lemmatise_batch(tokens, pos=pos)
+
+    def _soumet(self, tokens, pos):
+        """ Envoie un paquet de mots à l'exécuteur
+
+        :rtype: asyncio.Future
+        """
+        boucle = asyncio.get_event_loop()
+        if self._processus:
+            path, options = self._executor.chargement
+            return boucle.run_in_executor(self._executor, _lemmatise_tokens_processus, (path, options, tokens, pos))
+        return boucle.run_in_executor(self._executor, self._lemmatise_paquet, tokens, pos)
+
+    async def alemmatise_multiple(self, string, pos=False, tokens_per_batch=None, chunk_size=65536):
+        """ Lemmatise un texte complet, comme Lemmatiseur.lemmatise_multiple()
+
+        :param string: Chaîne à lemmatiser
+        :param pos: Récupère la POS
+        :param tokens_per_batch: Nombre de mots par paquet (Default : celui de l'objet)
+        :param chunk_size: Nombre de caractères découpés en mots à la fois, dans la boucle
+        :return: Liste des résultats de chaque mot
+        :rtype: list
+        """
+        morceaux = (string[i:i + chunk_size] for i in range(0, len(string), chunk_size))
+        resultats = []
+        async for paquet in _Lemmatisations(self, iter_tokens(morceaux), pos,
+                                            tokens_per_batch or self._tokens_per_batch):
+            resultats += paquet
+        return resultats
+
+    def alemmatise_stream(self, source, pos=False, tokens_per_batch=None, chunk_size=65536):
+        """ Lemmatise un texte reçu morceau par morceau, comme Lemmatiseur.lemmatise_stream(). L'itérateur renvoyé
+        s'utilise avec async for, et sa coroutine aclose() annule les paquets qui ne sont pas encore lemmatisés.
+
+        :param source: Itérable asynchrone de morceaux de texte, itérable de morceaux de texte ou fichier texte ouvert
+        :param pos: Récupère la POS
+        :param tokens_per_batch: Nombre de mots par paquet (Default : celui de l'objet)
+        :param chunk_size: Nombre de caractères lus à la fois dans un fichier
+        :return: Itérateur asynchrone de la liste des résultats de chaque mot, dans l'ordre du texte
+        """
+        if hasattr(source, "__aiter__"):
+            tokens = _TokensAsynchrones(source)
+        else:
+            tokens = iter_tokens(source, chunk_size=chunk_size)
+        return _Resultats(_Lemmatisations(self, tokens, pos, tokens_per_batch or self._tokens_per_batch))
@@ -0,0 +1,111 @@
+from collections import namedtuple
+
+
+def format_result(form, lemma, morphos=None, with_pos=False, raw_obj=False, radical=None, desinence=None):
+    r = {"form": form, "lemma": lemma.gr(), "morph": morphos or "", "radical": None, "desinence": None}
+    if radical:
+        r["radical"] = radical.gr()
+    if desinence:
+        r["desinence"] = desinence.gr()
+    if raw_obj:
+        r["lemma"] = lemma
+    if with_pos:
+        r["pos"] = lemma.pos()
+    return r
+
+
+class Analyse(namedtuple("Analyse", ["form", "lemme", "morpho", "rad", "des", "parent"])):
+    """ Résultat d'analyse d'une forme : un tuple d'identifiants et de références vers les objets du lemmatiseur,
+    dont les chaînes ne sont calculées qu'à la demande.
+
+    :ivar form: Forme analysée
+    :type form: str
+    :ivar lemme: Lemme, ou forme irrégulière
+    :type lemme: pycollatinus.lemme.Lemme or pycollatinus.irregs.Irreg
+    :ivar morpho: Numéro de morphologie, None pour les nombres romains
+    :type morpho: int
+    :ivar rad: Radical, None pour les formes irrégulières et les nombres romains
+    :type rad: pycollatinus.lemme.Radical
+    :ivar des: Désinence, None pour les formes irrégulières et les nombres romains
+    :type des: pycollatinus.modele.Desinence
+    :ivar parent: Lemmatiseur ayant produit l'analyse
+    :type parent: pycollatinus.lemmatiseur.Lemmatiseur
+    """
+    __slots__ = ()
+
+    @property
+    def lemma(self):
+        """ Graphie du lemme
+
+        :rtype: str
+        """
+        return self.lemme.gr()
+
+    @property
+    def morph(self):
+        """ Morphologie en toutes lettres
+
+        :rtype: str
+        """
+        if self.morpho is None:
+            return ""
+        return self.parent.morpho(self.morpho)
+
+    @property
+    def features(self):
+        """ Masque des traits de la morphologie, voir pycollatinus.traits
+
+        :rtype: int
+        """
+        if self.morpho is None:
+            return 0
+        return self.parent.morpho_features(self.morpho)
+
+    @property
+    def radical(self):
+        """ Graphie du radical
+
+        :rtype: str
+        """
+        if self.rad:
+            return self.rad.gr()
+
+    @property
+    def desinence(self):
+        """ Graphie de la désinence
+
+        :rtype: str
+        """
+        if self.des:
+            return self.des.gr()
+
+    @property
+    def pos(self):
+        """ Catégorie du lemme
+
+        :rtype: str
+        """
+        return self.lemme.pos()
+
+    def to_dict(self, with_pos=False, raw_obj=False, with_features=False):
+        """ Dictionnaire de résultat, tel que renvoyé par Lemmatiseur.lemmatise()
+
+        :param with_pos: Ajoute la POS
+        :param raw_obj: Renvoie l'objet Lemme plutôt que sa graphie
+        :param with_features: Ajoute le numéro de morphologie (morpho) et le masque de ses traits (features)
+        :rtype: dict
+        """
+        morphos = None
+        if self.morpho is not None:
+            morphos = self.parent.morpho(self.morpho)
+        resultat = format_result(
+            self.form, self.lemme, morphos=morphos, with_pos=with_pos, raw_obj=raw_obj,
+            radical=self.rad, desinence=self.des
+        )
+        if with_features:
+            resultat["morpho"] = self.morpho
+            resultat["features"] = self.features
+        return resultat
+
+    def __repr__(self):
+        return "<pycollatinus.analyse.Analyse[{}:{}:{}]>".format(self.form, self.lemma, self.morpho)
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from unidecode import unidecode
 
 voyelles = "āăēĕīĭōŏūŭȳўĀĂĒĔĪĬŌŎŪŬȲЎ"
@@ -11,7 +12,43 @@ abrev = [
     "Vol", "Vop", "Pl"
 ]
 
-_Y_SHORT_REPLACE = re.compile("[Ўў]")
+# Taille des caches des fonctions de normalisation
+MEMO_SIZE = 2 ** 16
+
+
+def _translitteration(code, caps=True):
+    """ Translittération d'un caractère par unidecode, telle qu'atone() la calcule
+
+    :param code: Point de code du caractère
+    :type code: int
+    :param caps: Translittère aussi les majuscules
+    :rtype: str
+    """
+    char = chr(code)
+    # Fix for unidecode until unidecode stop replace short y by u
+    if char in "Ўў":
+        return "y"
+    if not caps and char.isupper():
+        return char
+    return unidecode(char)
+
+
+# Tables de translittération précalculées pour le latin, le latin étendu, les diacritiques combinants et ў,
+# jamais modifiées ensuite : elles sont partagées sans verrou par les threads. Un caractère absent des tables reste
+# inchangé par str.translate(), il est translittéré par _translitteration_hors_table().
+_PLAGES_LATINES = [(0x0, 0x250), (0x300, 0x370), (0x1E00, 0x1F00), (0x40E, 0x40F), (0x45E, 0x45F)]
+_CARACTERES_LATINS = [code for debut, fin in _PLAGES_LATINES for code in range(debut, fin)]
+_ATONE = {code: _translitteration(code) for code in _CARACTERES_LATINS}
+_ATONE_MAJUSCULES = {code: _translitteration(code, caps=False) for code in _CARACTERES_LATINS}
+_HORS_TABLE = re.compile("[^{}]".format("".join(
+    "\\u{:04x}-\\u{:04x}".format(debut, fin - 1) for debut, fin in _PLAGES_LATINES
+)))
+# Translittération des caractères absents des tables, dans un cache borné comme celui des fonctions
+_translitteration_hors_table = lru_cache(maxsize=MEMO_SIZE)(_translitteration)
+
+# Séparateur des chaînes normalisées ensemble par les fonctions *_liste(), inchangé par les normalisations
+_SEPARATEUR = "\x00"
+_NON_ASCII = re.compile("[^\x00-\x7f]")
 
 
 _SIMPLIFIED_RE = re.compile("\s+")
@@ -60,6 +97,39 @@ def simplified(string):
     return _SIMPLIFIED_RE.sub(" ", string).strip()
 
 
+def _en_bloc(fonction, strings):
+    """ Applique une normalisation caractère par caractère à une liste de chaînes en un seul appel,
+    sur les chaînes mises bout à bout
+
+    :param fonction: Normalisation d'une chaîne
+    :param strings: Chaînes à transformer
+    :type strings: list of str
+    :rtype: list of str
+    """
+    strings = list(strings)
+    if not strings:
+        return []
+    texte = _SEPARATEUR.join(strings)
+    if texte.count(_SEPARATEUR) != len(strings) - 1:
+        # Une des chaînes contient le séparateur
+        return [fonction(string) for string in strings]
+    return fonction(texte).split(_SEPARATEUR)
+
+
+def _atone(string, caps=True):
+    """ Translittération par la table _ATONE ou _ATONE_MAJUSCULES, puis des caractères absents de la table
+
+    :rtype: str
+    """
+    if not _NON_ASCII.search(string):
+        return string
+    resultat = string.translate(_ATONE if caps else _ATONE_MAJUSCULES)
+    if _HORS_TABLE.search(resultat):
+        resultat = _HORS_TABLE.sub(lambda car: _translitteration_hors_table(ord(car.group()), caps), resultat)
+    return resultat
+
+
+@lru_cache(maxsize=MEMO_SIZE)
 def atone(string, caps=True):
     """ Supprimer les diacritiques de la forme donnée
 
@@ -70,17 +140,20 @@ def atone(string, caps=True):
     :return: Chaîne nettoyée
     :rtype: str
     """
-    # Fix for unidecode until unidecode stop replace short y by u
-    string = _Y_SHORT_REPLACE.sub("y", string)
-    if caps is True:
-        return unidecode(string)
-    a = ""
-    for char in string:
-        if char.isupper():
-            a += char
-        else:
-            a += unidecode(char)
-    return a
+    return _atone(string, caps is True)
+
+
+def atone_liste(strings, caps=True):
+    """ Supprime les diacritiques d'une liste de chaînes, comme atone()
+
+    :param strings: Chaînes à transformer
+    :type strings: list of str
+    :param caps: Transforme les majuscules
+    :type caps: bool
+    :return: Chaînes nettoyées
+    :rtype: list of str
+    """
+    return _en_bloc(lambda string: _atone(string, caps is True), strings)
 
 
 _VOY_COMMUNES = re.compile("\w*[aeiouy]\w*")
@@ -96,6 +169,7 @@ _VOY_REPLACE = [
 ]
 
 
+@lru_cache(maxsize=MEMO_SIZE)
 def communes(g):
     """ Note comme communes toutes les voyelles qui ne portent pas de quantité.
 
@@ -136,14 +210,9 @@ def estRomain(f):
     return _ROMAIN_REGEXP.match(f)
 
 
-def deramise(r):
-    """ Déramise une chaîne
-    
-    :param string: Chaîne à transformer
-    :type string: str
-    :return: Chaîne nettoyée
-    :rtype: str
-    """
+def _deramise(r):
+    # Chaque str.replace() parcourt la chaîne en C : plus rapide qu'une table de str.translate(),
+    # consultée caractère par caractère
     return r.replace('J', 'I') \
             .replace('j', 'i') \
             .replace('v', 'u') \
@@ -155,6 +224,28 @@ def deramise(r):
             .replace('V', 'U')
 
 
+@lru_cache(maxsize=MEMO_SIZE)
+def deramise(r):
+    """ Déramise une chaîne
+    
+    :param string: Chaîne à transformer
+    :type string: str
+    :return: Chaîne nettoyée
+    :rtype: str
+    """
+    return _deramise(r)
+
+
+def deramise_liste(strings):
+    """ Déramise une liste de chaînes, comme deramise()
+
+    :param strings: Chaînes à transformer
+    :type strings: list of str
+    :rtype: list of str
+    """
+    return _en_bloc(_deramise, strings)
+
+
 def allonge(f):
     """ Modifie f pour que sa dernière voyelle devienne longue.
     
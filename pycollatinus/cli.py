@@ -0,0 +1,215 @@
+""" Lemmatisation de fichiers en ligne de commande
+
+    pycollatinus textes/ caesar.txt.gz --jobs 4 --format tsv -o resultats.tsv
+
+Les fichiers sont lus morceau par morceau : la mémoire utilisée ne dépend pas de leur taille. Les dossiers sont
+parcourus récursivement, les fichiers .gz, .bz2 et .xz sont décompressés à la lecture, - désigne l'entrée standard.
+
+En JSONL, chaque ligne est un mot : {"file", "index", "token", "analyses"}, chaque analyse ayant les champs de
+pycollatinus.analyse.format_result(). En TSV, chaque ligne est une analyse : fichier, index du mot dans le fichier,
+mot, puis les champs de format_result(). Un mot inconnu occupe une ligne aux champs d'analyse vides.
+"""
+from collections import deque
+from itertools import islice
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import os
+import sys
+import timeit
+
+from .lemmatiseur import Lemmatiseur, iter_tokens
+
+
+OUVERTURES = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+CHAMPS = ["form", "lemma", "morph", "radical", "desinence"]
+
+
+def fichiers(chemins):
+    """ Fichiers à lemmatiser : les fichiers donnés, et ceux des dossiers donnés, parcourus récursivement
+    dans l'ordre alphabétique
+
+    :param chemins: Chemins de fichiers ou de dossiers, - pour l'entrée standard
+    :type chemins: list of str
+    :yield: Chemins des fichiers
+    """
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            for dossier, sous_dossiers, noms in os.walk(chemin):
+                sous_dossiers.sort()
+                for nom in sorted(noms):
+                    yield os.path.join(dossier, nom)
+        else:
+            yield chemin
+
+
+def ouvre(chemin, encoding="utf-8"):
+    """ Ouvre un fichier texte, éventuellement compressé
+
+    :param chemin: Chemin du fichier, - pour l'entrée standard
+    :param encoding: Encodage du texte
+    :rtype: io.TextIOBase
+    """
+    if chemin == "-":
+        return open(sys.stdin.fileno(), encoding=encoding, closefd=False)
+    ouverture = OUVERTURES.get(os.path.splitext(chemin)[1].lower(), open)
+    return ouverture(chemin, "rt", encoding=encoding)
+
+
+class Progression(object):
+    """ Affiche sur la sortie d'erreur le nombre de mots et de fichiers lemmatisés et le débit, au plus une fois
+    par intervalle
+
+    :param flux: Flux d'affichage
+    :param intervalle: Durée minimale entre deux affichages, en secondes
+    :param actif: Affiche la progression
+    """
+    def __init__(self, flux=sys.stderr, intervalle=1.0, actif=True):
+        self.flux = flux
+        self.intervalle = intervalle
+        self.actif = actif
+        self.tokens = 0
+        self.fichiers = 0
+        self.debut = self.dernier = timeit.default_timer()
+
+    def ajoute(self, tokens=0, fichiers=0):
+        self.tokens += tokens
+        self.fichiers += fichiers
+        if self.actif and timeit.default_timer() - self.dernier >= self.intervalle:
+            self.dernier = timeit.default_timer()
+            self.flux.write("\r" + self.message())
+            self.flux.flush()
+
+    def message(self):
+        duree = timeit.default_timer() - self.debut
+        return "{} tokens, {} files, {:.1f} s, {:.0f} tokens/s".format(
+            self.tokens, self.fichiers, duree, self.tokens / duree if duree else 0
+        )
+
+    def termine(self):
+        if self.actif:
+            self.flux.write("\r" + self.message() + "\n")
+            self.flux.flush()
+
+
+def resultats_locaux(lemmatiseur, tokens, pos=False, tokens_per_chunk=2000):
+    """ Lemmatise des mots par paquets dans le processus courant
+
+    :yield: Liste des résultats de chaque mot, dans l'ordre des mots
+    """
+    tokens = iter(tokens)
+    while True:
+        paquet = list(islice(tokens, tokens_per_chunk))
+        if not paquet:
+            return
+        yield from lemmatiseur.lemmatise_batch(paquet, pos=pos)
+
+
+def lemmatise_fichiers(chemins, sortie, format="jsonl", jobs=1, model=None, pos=False, tokens_per_chunk=2000,
+                       encoding="utf-8", progression=None):
+    """ Lemmatise des fichiers et écrit les résultats au fur et à mesure
+
+    :param chemins: Chemins de fichiers ou de dossiers, - pour l'entrée standard
+    :param sortie: Flux texte des résultats
+    :param format: "jsonl" ou "tsv"
+    :param jobs: Nombre de processus de lemmatisation
+    :param model: Chemin d'un lemmatiseur compilé par Lemmatiseur.compile() (Default : None, le lemmatiseur
+        est chargé depuis le cache d'instantanés ou les données de Collatinus)
+    :param pos: Ajoute la POS aux analyses
+    :param tokens_per_chunk: Nombre de mots lemmatisés à la fois par un processus
+    :param encoding: Encodage des fichiers
+    :param progression: Suivi de la progression
+    :type progression: Progression
+    :return: Nombre de mots lemmatisés
+    :rtype: int
+    """
+    progression = progression or Progression(actif=False)
+    # Fichier et mot de chaque résultat attendu : seuls les mots en cours de lemmatisation y sont gardés
+    etiquettes = deque()
+
+    def tokens():
+        for chemin in fichiers(chemins):
+            with ouvre(chemin, encoding=encoding) as f:
+                for index, token in enumerate(iter_tokens(f)):
+                    etiquettes.append((chemin, index, token))
+                    yield token
+            progression.ajoute(fichiers=1)
+
+    pool = None
+    if jobs > 1:
+        from .parallel import LemmatiseurPool
+        pool = LemmatiseurPool(processes=jobs, path=model, tokens_per_chunk=tokens_per_chunk)
+        resultats = pool.lemmatise_tokens(tokens(), pos=pos)
+    else:
+        lemmatiseur = Lemmatiseur.load(model) if model else Lemmatiseur()
+        resultats = resultats_locaux(lemmatiseur, tokens(), pos=pos, tokens_per_chunk=tokens_per_chunk)
+
+    champs = CHAMPS + (["pos"] if pos else [])
+    if format == "tsv":
+        sortie.write("\t".join(["file", "index", "token"] + champs) + "\n")
+    nombre = 0
+    try:
+        for analyses in resultats:
+            chemin, index, token = etiquettes.popleft()
+            if format == "tsv":
+                debut = [chemin, str(index), token]
+                for analyse in analyses or [{}]:
+                    sortie.write("\t".join(debut + [_tsv(analyse.get(champ)) for champ in champs]) + "\n")
+            else:
+                sortie.write(json.dumps(
+                    {"file": chemin, "index": index, "token": token, "analyses": analyses}, ensure_ascii=False
+                ) + "\n")
+            nombre += 1
+            if nombre % 1000 == 0:
+                progression.ajoute(tokens=1000)
+        progression.ajoute(tokens=nombre % 1000)
+    finally:
+        if pool is not None:
+            pool.close()
+    return nombre
+
+
+def _tsv(valeur):
+    if valeur is None:
+        return ""
+    return str(valeur).replace("\t", " ").replace("\n", " ")
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(
+        prog="pycollatinus", description="Lemmatise Latin text files",
+        formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__
+    )
+    arguments.add_argument("inputs", nargs="*", default=["-"],
+                           help="Files or directories, compressed or not (Default : standard input)")
+    arguments.add_argument("-o", "--output", help="Output file (Default : standard output)")
+    arguments.add_argument("-f", "--format", choices=["jsonl", "tsv"], default="jsonl")
+    arguments.add_argument("-j", "--jobs", type=int, default=1, help="Number of worker processes")
+    arguments.add_argument("-m", "--model", help="Lemmatiseur compiled by Lemmatiseur.compile()")
+    arguments.add_argument("--pos", action="store_true", help="Add the POS of each analysis")
+    arguments.add_argument("--tokens-per-chunk", type=int, default=2000)
+    arguments.add_argument("--encoding", default="utf-8")
+    arguments.add_argument("-q", "--quiet", action="store_true", help="Do not report progress on stderr")
+    args = arguments.parse_args(argv)
+
+    progression = Progression(actif=not args.quiet)
+    sortie = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        lemmatise_fichiers(
+            args.inputs, sortie, format=args.format, jobs=args.jobs, model=args.model, pos=args.pos,
+            tokens_per_chunk=args.tokens_per_chunk, encoding=args.encoding, progression=progression
+        )
+    except BrokenPipeError:
+        # Sortie fermée par le programme suivant, par exemple head
+        sys.stdout = open(os.devnull, "w")
+        sys.exit(1)
+    finally:
+        if args.output:
+            sortie.close()
+    progression.termine()
+
+
+if __name__ == "__main__":
+    main()
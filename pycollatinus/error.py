@@ -4,3 +4,8 @@ class MissingRadical(UserWarning):
 
 class UnknownModeleConfigurationKey(UserWarning):
     """ Error thrown when a configuration key is absolutely unknown """
+
+
+class SnapshotVersionError(UserWarning):
+    """ Error thrown when a compiled snapshot was written with another version of the format """
+
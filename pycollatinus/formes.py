@@ -0,0 +1,283 @@
+from array import array
+from bisect import bisect_left
+import timeit
+
+
+# Les analyses d'une forme sont codées sur un seul entier, ce qui permet de les trier
+# dans l'ordre où la recherche par découpage radical + désinence les produit :
+# longueur du radical, variante "ii noté ī", rang du radical, rang de la désinence.
+_BITS_DESINENCE = 20
+_BITS_RADICAL = 24
+_MASQUE_DESINENCE = (1 << _BITS_DESINENCE) - 1
+_MASQUE_RADICAL = (1 << _BITS_RADICAL) - 1
+_DECALAGE_VARIANTE = _BITS_DESINENCE + _BITS_RADICAL
+_DECALAGE_DECOUPE = _DECALAGE_VARIANTE + 1
+
+
+class _Etat(object):
+    """ État de l'automate en cours de construction """
+    __slots__ = ["final", "arcs", "numero"]
+
+    def __init__(self):
+        self.final = False
+        self.arcs = {}  # str -> _Etat
+        self.numero = None
+
+    def signature(self):
+        return self.final, tuple((lettre, id(cible)) for lettre, cible in self.arcs.items())
+
+
+class IndexFormes(object):
+    """ Index de toutes les formes fléchies du lexique chargé dans un lemmatiseur
+
+    Les formes sont rangées dans un automate acyclique minimal : chaque forme reçoit pour identifiant
+    son rang dans l'ordre lexicographique, et les analyses (radical, désinence) de la forme de rang n
+    sont rangées entre les positions _debuts[n] et _debuts[n+1] des tableaux d'analyses.
+
+    :param lemmatiseur: Lemmatiseur chargé dont on indexe les formes
+    :type lemmatiseur: pycollatinus.lemmatiseur.Lemmatiseur
+    """
+    def __init__(self, lemmatiseur):
+        self._radicaux = []  # list of Radical
+        self._desinences = []  # list of Desinence
+
+        # Automate : arcs de l'état e entre _premiers_arcs[e] et _premiers_arcs[e+1], triés par caractère
+        self._premiers_arcs = array("I")
+        self._finals = bytearray()
+        self._arcs_caracteres = array("I")
+        self._arcs_cibles = array("I")
+        self._arcs_rangs = array("I")
+
+        # Analyses
+        self._debuts = array("I", [0])
+        self._analyses_radicaux = array("I")
+        self._analyses_desinences = array("I")
+
+        self._duree = 0.0
+        self._construire(lemmatiseur)
+
+    def _generer(self, lemmatiseur):
+        """ Produit, première lettre par première lettre et dans l'ordre alphabétique,
+        toutes les formes radical + désinence du lemmatiseur
+
+        :yield: Dictionnaire des formes commençant par une même lettre (forme -> analyses codées)
+        :ytype: dict
+        """
+        # Numérotation des désinences dans l'ordre où _lemmatise les parcourt
+        par_modele = {}  # (Modele, int) -> [(str, [(int, Desinence)])]
+        for cle, candidats in lemmatiseur._desinences_index.items():
+            for modele_rad, ldes in candidats.items():
+                numeros = []
+                for des in ldes:
+                    numeros.append((len(self._desinences), des))
+                    self._desinences.append(des)
+                par_modele.setdefault(modele_rad, []).append((cle, numeros))
+
+        # Numérotation des radicaux, rangés par première lettre de leur clé
+        par_lettre = {}  # str -> [(str, int, [Radical])]
+        for cle_radical, lrad in lemmatiseur._radicaux.items():
+            if not lrad:
+                continue
+            par_lettre.setdefault(cle_radical[:1], []).append((cle_radical, len(self._radicaux), lrad))
+            self._radicaux.extend(lrad)
+        # Les radicaux vides produisent des formes de toutes initiales
+        radicaux_vides = par_lettre.pop("", [])
+        lettres = set(par_lettre)
+        for cle in lemmatiseur._desinences_index:
+            lettres.add(cle[:1])
+        lettres.discard("")
+
+        for lettre in sorted(lettres):
+            formes = {}
+            for cle_radical, premier, lrad in radicaux_vides + par_lettre.get(lettre, []):
+                # ii noté ī : Patau+i.i s'écrit Pataui
+                variante_i = cle_radical.endswith("i") and not cle_radical[:-1].endswith("i")
+                for numero_radical, rad in enumerate(lrad, premier):
+                    lemme = rad.lemme()
+                    for cle, numeros in par_modele.get((lemme.modele(), rad.numRad()), ()):
+                        if not cle_radical and not cle.startswith(lettre):
+                            continue
+                        forme = cle_radical + cle
+                        for numero_desinence, des in numeros:
+                            if lemme.estIrregExcl(des.morphoNum()):
+                                continue
+                            code = (numero_radical << _BITS_DESINENCE) | numero_desinence
+                            self._ajouter(formes, forme, (len(cle_radical) << _DECALAGE_DECOUPE) | code)
+                            if variante_i and cle.startswith("i") and not cle.startswith("ii"):
+                                self._ajouter(
+                                    formes, cle_radical[:-1] + cle,
+                                    ((len(cle_radical) - 1) << _DECALAGE_DECOUPE) | (1 << _DECALAGE_VARIANTE) | code
+                                )
+            yield formes
+
+    @staticmethod
+    def _ajouter(formes, forme, code):
+        if not forme:
+            return
+        codes = formes.get(forme)
+        if codes is None:
+            formes[forme] = [code]
+        else:
+            codes.append(code)
+
+    def _construire(self, lemmatiseur):
+        """ Construit l'automate minimal des formes, selon l'algorithme incrémental
+        de Daciuk et al. (2000) pour des mots triés.
+        """
+        debut = timeit.default_timer()
+
+        racine = _Etat()
+        registre = {}  # signature -> _Etat
+        en_attente = []  # [(parent, lettre, enfant)] non encore minimisés
+        precedente = ""
+
+        def minimiser(jusqua):
+            while len(en_attente) > jusqua:
+                parent, lettre, enfant = en_attente.pop()
+                signature = enfant.signature()
+                existant = registre.get(signature)
+                if existant is None:
+                    registre[signature] = enfant
+                else:
+                    parent.arcs[lettre] = existant
+
+        for formes in self._generer(lemmatiseur):
+            for forme in sorted(formes):
+                commun = 0
+                for a, b in zip(forme, precedente):
+                    if a != b:
+                        break
+                    commun += 1
+                minimiser(commun)
+                etat = en_attente[-1][2] if en_attente else racine
+                for caractere in forme[commun:]:
+                    suivant = _Etat()
+                    etat.arcs[caractere] = suivant
+                    en_attente.append((etat, caractere, suivant))
+                    etat = suivant
+                etat.final = True
+                precedente = forme
+
+                for code in sorted(formes[forme]):
+                    self._analyses_radicaux.append((code >> _BITS_DESINENCE) & _MASQUE_RADICAL)
+                    self._analyses_desinences.append(code & _MASQUE_DESINENCE)
+                self._debuts.append(len(self._analyses_radicaux))
+        minimiser(0)
+
+        self._geler(racine)
+        self._duree = timeit.default_timer() - debut
+
+    def _geler(self, racine):
+        """ Convertit l'automate en tableaux d'entiers
+
+        :param racine: État initial
+        :type racine: _Etat
+        """
+        # Numérotation en profondeur, la racine reçoit le numéro 0
+        etats = []
+        pile = [racine]
+        racine.numero = 0
+        while pile:
+            etat = pile.pop()
+            etats.append(etat)
+            for cible in etat.arcs.values():
+                if cible.numero is None:
+                    cible.numero = -1
+                    pile.append(cible)
+        for numero, etat in enumerate(etats):
+            etat.numero = numero
+
+        # Nombre de formes reconnues depuis chaque état
+        nombres = [0] * len(etats)
+        for etat in reversed(self._ordre_topologique(racine, len(etats))):
+            nombres[etat.numero] = int(etat.final) + sum(nombres[c.numero] for c in etat.arcs.values())
+
+        for etat in etats:
+            self._premiers_arcs.append(len(self._arcs_cibles))
+            self._finals.append(int(etat.final))
+            rang = int(etat.final)
+            for lettre in sorted(etat.arcs):
+                cible = etat.arcs[lettre]
+                self._arcs_caracteres.append(ord(lettre))
+                self._arcs_cibles.append(cible.numero)
+                self._arcs_rangs.append(rang)
+                rang += nombres[cible.numero]
+        self._premiers_arcs.append(len(self._arcs_cibles))
+
+    @staticmethod
+    def _ordre_topologique(racine, nombre):
+        """ Ordre topologique des états (un état avant tous ses descendants) """
+        ordre = []
+        vus = bytearray(nombre)
+        pile = [(racine, False)]
+        while pile:
+            etat, termine = pile.pop()
+            if termine:
+                ordre.append(etat)
+                continue
+            if vus[etat.numero]:
+                continue
+            vus[etat.numero] = 1
+            pile.append((etat, True))
+            for cible in etat.arcs.values():
+                if not vus[cible.numero]:
+                    pile.append((cible, False))
+        ordre.reverse()
+        return ordre
+
+    def rang(self, forme):
+        """ Rang de la forme dans l'index
+
+        :param forme: Forme recherchée
+        :type forme: str
+        :return: Rang de la forme, ou None si elle est inconnue
+        :rtype: int
+        """
+        etat, rang = 0, 0
+        caracteres, premiers = self._arcs_caracteres, self._premiers_arcs
+        for caractere in forme:
+            debut, fin = premiers[etat], premiers[etat + 1]
+            arc = bisect_left(caracteres, ord(caractere), debut, fin)
+            if arc == fin or caracteres[arc] != ord(caractere):
+                return None
+            rang += self._arcs_rangs[arc]
+            etat = self._arcs_cibles[arc]
+        if not self._finals[etat]:
+            return None
+        return rang
+
+    def analyses(self, forme):
+        """ Analyses radical + désinence de la forme, dans l'ordre de Lemmatiseur._lemmatise
+
+        :param forme: Forme déramisée à analyser
+        :type forme: str
+        :yield: Couples (Radical, Desinence)
+        """
+        rang = self.rang(forme)
+        if rang is None:
+            return
+        for i in range(self._debuts[rang], self._debuts[rang + 1]):
+            yield self._radicaux[self._analyses_radicaux[i]], self._desinences[self._analyses_desinences[i]]
+
+    def stats(self):
+        """ Taille et coût de construction de l'index
+
+        :return: Nombre de formes, d'analyses, d'états et d'arcs, octets occupés par les tableaux
+            et durée de construction en secondes
+        :rtype: dict
+        """
+        tableaux = [
+            self._premiers_arcs, self._arcs_caracteres, self._arcs_cibles, self._arcs_rangs,
+            self._debuts, self._analyses_radicaux, self._analyses_desinences
+        ]
+        octets = sum(t.itemsize * len(t) for t in tableaux) + len(self._finals)
+        # Pointeurs vers les radicaux et les désinences partagés avec le lemmatiseur
+        octets += 8 * (len(self._radicaux) + len(self._desinences))
+        return {
+            "forms": len(self._debuts) - 1,
+            "analyses": len(self._analyses_radicaux),
+            "states": len(self._finals),
+            "arcs": len(self._arcs_cibles),
+            "bytes": octets,
+            "build_time": self._duree
+        }
@@ -2,6 +2,7 @@ from .ch import atone, listeI
 
 
 class Irreg(object):
+    __slots__ = ["_lemmat", "_grq", "_exclusif", "_gr", "_lemme", "_morphos"]
 
     def __repr__(self):
         return "<pycollatinus.irregs.Irreg[{}]>".format(self._gr)
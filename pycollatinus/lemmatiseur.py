@@ -1,14 +1,100 @@
 from .ch import estRomain, deramise
-from .util import DefaultOrderedDict
+from .util import DefaultOrderedDict, LRUCache
 from .lemme import Lemme
 from .modele import Modele
 from .parser import Parser
+from .formes import IndexFormes
+from .analyse import Analyse, format_result
+from .error import SnapshotVersionError
+from . import snapshot, traits
+from functools import partial
+from itertools import chain
 import os
 import re
+import timeit
+import tracemalloc
+import warnings
 from pickle import dump, load
 
 
 SPACES = re.compile("\W")
+RARETE = 10  # Rareté des désinences courantes, la plus grande
+
+
+def iter_tokens(source, chunk_size=65536):
+    """ Découpe en mots un texte lu morceau par morceau, sans jamais le charger entièrement.
+
+    Un mot coupé entre deux morceaux est reconstitué avant d'être renvoyé.
+
+    :param source: Fichier texte ouvert ou itérable de morceaux de texte
+    :param chunk_size: Nombre de caractères lus à la fois dans un fichier
+    :yield: Mots, découpés comme par Lemmatiseur.lemmatise_multiple()
+    :ytype: str
+    """
+    if hasattr(source, "read"):
+        source = iter(partial(source.read, chunk_size), "")
+    reste = ""
+    for morceau in source:
+        mots, reste = decoupe_morceau(reste, morceau)
+        yield from mots
+    if reste:
+        yield reste
+
+
+def decoupe_morceau(reste, morceau):
+    """ Découpe en mots un morceau de texte précédé de la fin non découpée du morceau précédent
+
+    :param reste: Fin non découpée du morceau précédent
+    :param morceau: Morceau de texte
+    :return: Mots complets du morceau et fin non découpée, qui peut se poursuivre dans le morceau suivant
+    :rtype: tuple
+    """
+    mots = SPACES.split(reste + morceau)
+    reste = mots.pop()
+    return [mot for mot in mots if mot], reste
+
+
+def _arbre(regles, inverse=False):
+    """ Arbre des préfixes (ou des suffixes si inverse est vrai) de règles de réécriture : chaque nœud est un
+    dictionnaire caractère -> nœud, dont la clé None porte la règle (rang, chaîne, remplacement) qui y finit.
+    Si une chaîne apparaît dans plusieurs règles, seule la première est conservée.
+
+    :param regles: Couples (chaîne, remplacement), dans l'ordre des tables
+    :type regles: iterable of tuple
+    :param inverse: Range les chaînes lues à l'envers
+    :rtype: dict
+    """
+    arbre = {}
+    for rang, (chaine, remplacement) in enumerate(regles):
+        noeud = arbre
+        for caractere in (reversed(chaine) if inverse else chaine):
+            noeud = noeud.setdefault(caractere, {})
+        noeud.setdefault(None, (rang, chaine, remplacement))
+    return arbre
+
+
+def _regles(arbre, mot, inverse=False):
+    """ Règles de l'arbre dont la chaîne débute (ou finit si inverse est vrai) le mot, trouvées en un seul
+    parcours des caractères du mot
+
+    :param arbre: Arbre construit par _arbre()
+    :param mot: Mot
+    :type mot: str
+    :return: Règles (rang, chaîne, remplacement), dans l'ordre des tables
+    :rtype: list of tuple
+    """
+    regles = []
+    noeud = arbre
+    for caractere in (reversed(mot) if inverse else mot):
+        noeud = noeud.get(caractere)
+        if noeud is None:
+            break
+        regle = noeud.get(None)
+        if regle is not None:
+            regles.append(regle)
+    if len(regles) > 1:
+        regles.sort()
+    return regles
 
 
 class Lemmatiseur(object):
@@ -21,52 +107,283 @@ class Lemmatiseur(object):
     :type debug: int
     :param debug: Debug mode for developers (Default : False)
     :type debug: int
+    :param index_formes: Build the index of every inflected form after loading, see indexe_formes() (Default : False)
+    :type index_formes: bool
+    :param cache_size: Number of forms whose analyses are kept in an LRU cache by lemmatise() (Default : None, no cache)
+    :type cache_size: int
+    :param extension: Load the extension lexicon data/lem_ext.la (Default : True). If False, only the curated
+        lexicon is loaded. If "lazy", the extension is loaded by charge_extension() the first time lemmatise()
+        finds no analysis for a form.
+    :type extension: bool or str
+    :param parse_processes: Number of processes reading the lexicon files when loading (Default : None, no process)
+    :type parse_processes: int
+    :param snapshot_dir: Directory where the loaded lemmatiseur is cached as a snapshot, see pycollatinus.snapshot.
+        The snapshot is reused as long as the data files, the version of pycollatinus and the loading options
+        do not change. (Default : None, $PYCOLLATINUS_CACHE, $XDG_CACHE_HOME/pycollatinus or ~/.cache/pycollatinus).
+        False disables the cache.
+    :type snapshot_dir: str or bool
+    :param profile_load: Count the objects created and trace the memory allocated by each stage of the loading,
+        see load_report (Default : False, only the time of each stage is recorded)
+    :type profile_load: bool
+
+    :ivar load_report: Report of the loading : source ("parse" or "snapshot"), total time in seconds and stages,
+        see pycollatinus.parser.Parser.etape(). None if the lemmatiseur was not loaded by its constructor.
+    :type load_report: dict
     """
-    def __init__(self, load=True, debug=False):
+    def __init__(self, load=True, debug=False, index_formes=False, cache_size=None, extension=True,
+                 parse_processes=None, snapshot_dir=None, profile_load=False):
         """"""
+        if extension not in (True, False, "lazy"):
+            raise ValueError("extension must be True, False or \"lazy\"")
         self._resDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
         self._cible = "fr"  # Langue cible
+        self._debug = debug
+        self._reinitialise_tables()
+        self.clear_variant_info()
+        self._extension = extension  # True once data/lem_ext.la is loaded
+        self._parse_processes = parse_processes
+        self._cache = None  # LRUCache of form -> tuple of Analyse
+        if cache_size:
+            self._cache = LRUCache(cache_size)
+        self.load_report = None
+
+        self._suffixes = {
+            "ne": "nĕ",
+            "que": "quĕ",
+            "ue": "vĕ",
+            "ve": "vĕ",
+            "st": "st"
+        }
+        self._indexe_suffixes()
+
+        if load is True:
+            debut = timeit.default_timer()
+            parser = Parser(self, path=self._resDir, debug=self._debug, processes=parse_processes,
+                            profile=profile_load)
+            trace = profile_load and not tracemalloc.is_tracing()
+            if trace:
+                tracemalloc.start()
+            try:
+                source = self._charge(parser, index_formes, extension, snapshot_dir)
+            finally:
+                if trace:
+                    tracemalloc.stop()
+            self.load_report = {
+                "source": source, "time": timeit.default_timer() - debut, "stages": parser.report
+            }
+            # Les options d'exécution ne dépendent pas de l'instantané
+            self._debug = debug
+            self._cache = LRUCache(cache_size) if cache_size else None
+
+    def _reinitialise_tables(self):
+        """ Vide les tables du lexique, remplies par le parser ou par un instantané
+        """
         self._modeles = {}  # Modeles
         self._cibles = {}
         self._lemmes = {}  # Lemmes
-        self._debug = debug
 
         self._assims = {}  # str -> str
         self._assimsq = {}  # str -> str
         self._contractions = {}  # str -> str
+        self._assims_trie = {}  # Préfixes de _assimsq, voir _arbre()
+        self._desassims_trie = {}  # Préfixes des valeurs de _assimsq
+        self._contractions_trie = {}  # Suffixes de _contractions
         self._variables = {}  # str -> str # Where key starts with $
 
         self._radicaux = DefaultOrderedDict(list)  # List of Radicaux
         self._desinences = DefaultOrderedDict(list)  # List of Desinence
+        self._desinences_index = {}  # str -> {(Modele, int) -> [Desinence]}
+        self._desinences_trie = {}  # Reversed endings : str -> {...}, None -> {(Modele, int) -> [Desinence]}
         self._irregs = DefaultOrderedDict(list)  # List of Irreg
+        self._index_formes = None  # IndexFormes
         self._morphos = {"fr": {}}  # List of Strings
+        self._masques = None  # Numéro de morphologie -> masque de ses traits, voir morpho_features()
+        self._filtres = {}  # Masque d'un filtre de traits -> frozenset des morphologies acceptées
 
-        self._suffixes = {
-            "ne": "nĕ",
-            "que": "quĕ",
-            "ue": "vĕ",
-            "ve": "vĕ",
-            "st": "st"
-        }
+    def _charge(self, parser, index_formes, extension, snapshot_dir):
+        """ Charge les données depuis le cache d'instantanés, ou depuis les données de Collatinus
 
-        if load is True:
-            Parser(self, path=self._resDir, debug=self._debug).parse()
-
-    def compile(self):
+        :param parser: Parser des données, dont report reçoit les étapes du chargement
+        :return: Source des données : "snapshot" ou "parse"
+        :rtype: str
+        """
+        chemin = None
+        if snapshot_dir is not False:
+            chemin = snapshot.cache_path(
+                snapshot_dir or snapshot.default_cache_dir(), self._resDir,
+                extension=extension, index_formes=bool(index_formes)
+            )
+        if chemin and os.path.exists(chemin):
+            with parser.etape("snapshot"):
+                charge = self._charge_snapshot(chemin)
+            if charge:
+                return "snapshot"
+            # Un instantané illisible a pu remplir une partie des tables : on repart de tables vides
+            self._reinitialise_tables()
+            self._cible = "fr"
+            self._extension = extension
+            parser.report = []
+        etapes = parser.report
+        parser.parse(extension=extension is True)
+        parser.report = etapes + parser.report
+        if index_formes:
+            with parser.etape("indexe_formes"):
+                self.indexe_formes()
+        if chemin:
+            with parser.etape("write_snapshot"):
+                try:
+                    snapshot.write_atomic(self, chemin)
+                except OSError as E:
+                    warnings.warn("The snapshot cache could not be written: {}".format(E))
+        return "parse"
+
+    def _charge_snapshot(self, chemin):
+        """ Charge un instantané du cache
+
+        :param chemin: Chemin de l'instantané
+        :return: Si l'instantané a pu être lu
+        :rtype: bool
+        """
+        try:
+            with open(chemin, "rb") as file:
+                snapshot.read(file, self)
+            return True
+        except Exception as E:
+            warnings.warn("The cached snapshot {} could not be read: {}".format(chemin, E))
+            return False
+
+    def compile(self, method="snapshot", path=None):
         """ Compile le lemmatiseur localement
+
+        :param method: Format du fichier : "snapshot" (format binaire de pycollatinus, voir pycollatinus.snapshot)
+            ou "pickle"
+        :type method: str
+        :param path: Chemin du fichier (Default : data/compiled.snapshot ou data/compiled.pickle)
+        :type path: str
+        :return: Chemin du fichier écrit
+        :rtype: str
         """
-        with open(self.path("compiled.pickle"), "wb") as file:
-            dump(self, file)
+        if method == "snapshot":
+            path = path or self.path("compiled.snapshot")
+            snapshot.write_atomic(self, path)
+        elif method == "pickle":
+            path = path or self.path("compiled.pickle")
+            with open(path, "wb") as file:
+                dump(self, file)
+        else:
+            raise ValueError("Unknown compilation method {}".format(method))
+        return path
 
     @staticmethod
-    def load(path=None):
-        """ Compile le lemmatiseur localement
+    def load(path=None, cache_size=None):
+        """ Charge un lemmatiseur compilé par compile(), quel que soit son format.
+
+        Si l'instantané a été écrit dans une autre version du format, un avertissement est émis
+        et le lemmatiseur est chargé depuis les données de Collatinus, avec les options enregistrées dans
+        l'instantané (extension, index_formes, cache_size).
+
+        :param path: Chemin du fichier (Default : data/compiled.snapshot s'il existe, sinon data/compiled.pickle)
+        :type path: str
+        :param cache_size: Nombre de formes gardées dans le cache LRU, 0 pour ne pas en avoir (Default : None,
+            le cache du fichier est gardé)
+        :type cache_size: int
+        :raises SnapshotVersionError: si l'instantané a été écrit dans une version du format qui n'enregistre
+            pas ses options, antérieure à snapshot.VERSION_OPTIONS
+        :rtype: Lemmatiseur
+        """
+        lemmatiseur = Lemmatiseur._charge_compile(path)
+        if cache_size is not None:
+            lemmatiseur._cache = LRUCache(cache_size) if cache_size else None
+        return lemmatiseur
+
+    @staticmethod
+    def _charge_compile(path):
+        """ Charge un lemmatiseur compilé, voir load()
+
+        :rtype: Lemmatiseur
         """
         if path is None:
-            path = os.path.join(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
-            path = os.path.join(path, "compiled.pickle")
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "compiled.snapshot")
+            if not os.path.exists(path):
+                path = os.path.join(os.path.dirname(path), "compiled.pickle")
+        if snapshot.est_snapshot(path):
+            try:
+                with open(path, "rb") as file:
+                    return snapshot.read(file, Lemmatiseur(load=False))
+            except SnapshotVersionError as E:
+                options = snapshot.read_options(path)
+                if options is None:
+                    raise
+                warnings.warn(str(E) + ", loading from Collatinus data instead", SnapshotVersionError)
+                # Le lemmatiseur reconstruit n'est pas écrit dans le cache d'instantanés
+                return Lemmatiseur(snapshot_dir=False, **options)
         with open(path, "rb") as file:
-            return load(file)
+            lemmatiseur = load(file)
+        # Les arbres et les compteurs ne sont pas toujours présents dans les fichiers des versions précédentes
+        lemmatiseur.clear_variant_info()
+        lemmatiseur._indexe_assims()
+        lemmatiseur._indexe_contractions()
+        lemmatiseur._indexe_suffixes()
+        return lemmatiseur
+
+    def indexe_formes(self):
+        """ Génère toutes les formes fléchies du lexique et les range dans un index : la recherche
+        par découpage radical + désinence de chaque forme devient une seule consultation de l'index.
+
+        La construction prend plusieurs dizaines de secondes, l'index est conservé par compile()
+
+        :return: Index construit, dont stats() donne la taille et la durée de construction
+        :rtype: IndexFormes
+        """
+        self._index_formes = IndexFormes(self)
+        return self._index_formes
+
+    def _indexe_desinence(self, cle, d):
+        """ Range la désinence d dans l'index des désinences par couple (modèle, numéro de radical).
+            L'arbre des désinences lues à l'envers pointe vers cet index.
+
+        :param cle: Graphie déramisée de la désinence
+        :type cle: str
+        :param d: Désinence
+        :type d: pycollatinus.modele.Desinence
+        """
+        candidats = self._desinences_index.get(cle)
+        if candidats is None:
+            candidats = self._desinences_index[cle] = {}
+            noeud = self._desinences_trie
+            for caractere in reversed(cle):
+                noeud = noeud.setdefault(caractere, {})
+            noeud[None] = candidats
+        candidats.setdefault((d.modele(), d.numRad()), []).append(d)
+
+    def charge_extension(self):
+        """ Charge le lexique étendu data/lem_ext.la, s'il ne l'est pas encore.
+
+        Le cache des analyses est vidé. L'index des formes, qui ne couvre pas le lexique étendu, est abandonné :
+        indexe_formes() le reconstruit.
+        """
+        if self._extension is True:
+            return
+        Parser(self, path=self._resDir, debug=self._debug, processes=self._parse_processes).ajExtensions()
+        self._extension = True
+        self._index_formes = None
+        self.clear_cache()
+
+    def cache_info(self):
+        """ Statistiques du cache des analyses : succès, échecs, évictions, taille et taille maximale
+
+        :return: Statistiques du cache, None si le cache n'est pas activé
+        :rtype: dict
+        """
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def clear_cache(self):
+        """ Vide le cache des analyses et remet ses compteurs à zéro
+        """
+        if self._cache is not None:
+            self._cache.clear()
 
     def path(self, nf):
         """ Compute the path for the file to load
@@ -83,10 +400,11 @@ class Lemmatiseur(object):
         :return: Mot assimilé
         :rtype: str
         """
-        for replaced, replacement in self._assimsq.items():
-            if mot.startswith(replaced):
-                mot = mot.replace(replaced, replacement)
-                return mot
+        regles = _regles(self._assims_trie, mot)
+        if regles:
+            # Première assimilation de la table qui débute le mot
+            _, replaced, replacement = regles[0]
+            mot = mot.replace(replaced, replacement)
         return mot
 
     def desassims(self, mot):
@@ -97,12 +415,28 @@ class Lemmatiseur(object):
         :return: Mot assimilé
         :rtype: str
         """
-        for replacement, replaced in self._assimsq.items():
-            if mot.startswith(replaced):
-                mot = mot.replace(replaced, replacement)
-                return mot
+        regles = _regles(self._desassims_trie, mot)
+        if regles:
+            _, replaced, replacement = regles[0]
+            mot = mot.replace(replaced, replacement)
         return mot
 
+    def _indexe_assims(self):
+        """ Construit les arbres des préfixes des assimilations et des désassimilations de _assimsq
+        """
+        self._assims_trie = _arbre(self._assimsq.items())
+        self._desassims_trie = _arbre((replaced, replacement) for replacement, replaced in self._assimsq.items())
+
+    def _indexe_contractions(self):
+        """ Construit l'arbre des suffixes des contractions
+        """
+        self._contractions_trie = _arbre(self._contractions.items(), inverse=True)
+
+    def _indexe_suffixes(self):
+        """ Construit l'arbre des suffixes enclitiques
+        """
+        self._suffixes_trie = _arbre(((suffixe, suffixe) for suffixe in self._suffixes), inverse=True)
+
     def modele(self, m):
         """ Retrouve le modele pour la clef m
 
@@ -146,187 +480,479 @@ class Lemmatiseur(object):
             return "-"
         return self._morphos[l][m]
 
-    @staticmethod
-    def format_result(form, lemma, morphos=None, with_pos=False, raw_obj=False, radical=None, desinence=None):
-        r = {"form": form, "lemma": lemma.gr(), "morph": morphos or "", "radical": None, "desinence": None}
-        if radical:
-            r["radical"] = radical.gr()
-        if desinence:
-            r["desinence"] = desinence.gr()
-        if raw_obj:
-            r["lemma"] = lemma
-        if with_pos:
-            r["pos"] = lemma.pos()
-        return r
-
-    def lemmatise_multiple(self, string, pos=False, get_lemma_object=False, as_list=True):
+    def morpho_features(self, m):
+        """ Masque des traits (cas, genre, nombre, personne, temps, mode, voix, degré) de la morphologie m, voir
+        pycollatinus.traits
+
+        :param m: Indice de morphologie
+        :type m: int
+        :rtype: int
+        """
+        return self._traits().get(m, 0)
+
+    def _traits(self):
+        """ Masques des traits de toutes les morphologies, calculés à la première utilisation
+
+        :rtype: dict
+        """
+        # Les lemmatiseurs compilés par pickle avant l'ajout des masques n'ont pas l'attribut
+        masques = getattr(self, "_masques", None)
+        if masques is None:
+            masques = self._masques = {
+                numero: traits.decompose(morpho) for numero, morpho in self._morphos["fr"].items()
+            }
+        return masques
+
+    def _morphos_acceptees(self, features):
+        """ Morphologies correspondant à un filtre de traits, calculées une fois par filtre
+
+        :param features: Filtre, voir pycollatinus.traits.masque()
+        :rtype: frozenset of int
+        """
+        filtre = traits.masque(features)
+        filtres = getattr(self, "_filtres", None)
+        if filtres is None:
+            filtres = self._filtres = {}
+        acceptees = filtres.get(filtre)
+        if acceptees is None:
+            acceptees = filtres[filtre] = frozenset(
+                numero for numero, masque in self._traits().items() if traits.accepte(masque, filtre)
+            )
+        return acceptees
+
+    format_result = staticmethod(format_result)
+
+    def lemmatise_multiple(self, string, pos=False, get_lemma_object=False, as_list=True, as_dict=True, top_k=None,
+                           min_frequency=None, features=None, with_features=False):
         """ Lemmatise une liste complète
 
         :param string: Chaîne à lemmatiser
         :param pos: Récupère la POS
         :param get_lemma_object: Retrieve Lemma object instead of string representation of lemma
         :param as_list: Retrieve a list of generators instead of a list if set to false
+        :param as_dict: Retrieve dictionaries instead of Analyse records if set to true
+        :param top_k: Retrieve only the top_k most likely analyses of each token, see lemmatise()
+        :param min_frequency: Retrieve only the analyses whose lemma is frequent enough, see lemmatise()
+        :param features: Retrieve only the analyses with these morphological features, see lemmatise()
+        :param with_features: Add the morphology number and its features mask to dictionaries, see lemmatise()
         """
         mots = SPACES.split(string)
-        resultats = [self.lemmatise(mot, pos=pos, get_lemma_object=get_lemma_object) for mot in mots if mot]
+        resultats = [
+            self.lemmatise(mot, pos=pos, get_lemma_object=get_lemma_object, as_dict=as_dict, top_k=top_k,
+                           min_frequency=min_frequency, features=features, with_features=with_features)
+            for mot in mots if mot
+        ]
         if as_list:
             resultats = [list(r) for r in resultats]
         return resultats
 
-    def _lemmatise_assims(self, f, *args, **kwargs):
-        """ Lemmatise un mot f avec son assimilation
+    def lemmatise_stream(self, source, pos=False, get_lemma_object=False, as_list=True, chunk_size=65536,
+                         as_dict=True, top_k=None, min_frequency=None, features=None, with_features=False):
+        """ Lemmatise un texte lu morceau par morceau : la mémoire utilisée ne dépend pas de la taille du texte
 
-        :param f: Mot à lemmatiser
+        :param source: Fichier texte ouvert ou itérable de morceaux de texte
         :param pos: Récupère la POS
         :param get_lemma_object: Retrieve Lemma object instead of string representation of lemma
-        :param results: Current results
+        :param as_list: Yield a list of results for each token instead of a generator
+        :param chunk_size: Nombre de caractères lus à la fois dans un fichier
+        :param as_dict: Retrieve dictionaries instead of Analyse records if set to true
+        :param top_k: Retrieve only the top_k most likely analyses of each token, see lemmatise()
+        :param min_frequency: Retrieve only the analyses whose lemma is frequent enough, see lemmatise()
+        :param features: Retrieve only the analyses with these morphological features, see lemmatise()
+        :param with_features: Add the morphology number and its features mask to dictionaries, see lemmatise()
+        :yield: Résultats de chaque mot, dans l'ordre du texte
         """
-        forme_assimilee = self.assims(f)
-        if forme_assimilee != f:
-            for proposal in self._lemmatise(forme_assimilee, *args, **kwargs):
-                yield proposal
+        for mot in iter_tokens(source, chunk_size=chunk_size):
+            resultats = self.lemmatise(
+                mot, pos=pos, get_lemma_object=get_lemma_object, as_dict=as_dict, top_k=top_k,
+                min_frequency=min_frequency, features=features, with_features=with_features
+            )
+            if as_list:
+                resultats = list(resultats)
+            yield resultats
 
-    def _lemmatise_roman_numerals(self, form, pos=False, get_lemma_object=False):
-        """ Lemmatise un mot f si c'est un nombre romain
+    def lemmatise_batch(self, tokens, pos=False, get_lemma_object=False, with_stats=False, as_dict=True, top_k=None,
+                        min_frequency=None, features=None, with_features=False):
+        """ Lemmatise une liste de mots déjà découpés en n'analysant qu'une seule fois chaque mot distinct
 
-        :param form: Mot à lemmatiser
+        Les occurrences d'un même mot partagent la même liste de résultats.
+
+        :param tokens: Mots à lemmatiser
+        :type tokens: iterable of str
         :param pos: Récupère la POS
         :param get_lemma_object: Retrieve Lemma object instead of string representation of lemma
+        :param with_stats: Also return the number of tokens seen and of distinct types analysed
+        :param as_dict: Retrieve dictionaries instead of Analyse records if set to true
+        :param top_k: Retrieve only the top_k most likely analyses of each token, see lemmatise()
+        :param min_frequency: Retrieve only the analyses whose lemma is frequent enough, see lemmatise()
+        :param features: Retrieve only the analyses with these morphological features, see lemmatise()
+        :param with_features: Add the morphology number and its features mask to dictionaries, see lemmatise()
+        :return: Liste des résultats de chaque mot, dans l'ordre des mots,
+            suivie du dictionnaire {"tokens": int, "types": int} si with_stats est vrai
+        :rtype: list of list of dict
+        """
+        analyses = {}  # str -> list of results
+        resultats = []
+        for token in tokens:
+            analyse = analyses.get(token)
+            if analyse is None:
+                if token:
+                    analyse = list(self.lemmatise(
+                        token, pos=pos, get_lemma_object=get_lemma_object, as_dict=as_dict, top_k=top_k,
+                        min_frequency=min_frequency, features=features, with_features=with_features
+                    ))
+                else:
+                    analyse = []
+                analyses[token] = analyse
+            resultats.append(analyse)
+        if with_stats:
+            return resultats, {"tokens": len(resultats), "types": len(analyses)}
+        return resultats
+
+    def _lemmatise_roman_numerals(self, form):
+        """ Lemmatise un mot f si c'est un nombre romain
+
+        :param form: Mot à lemmatiser
+        :yield: Analyses, comme _lemmatise()
         """
         if estRomain(form):
             _lemma = Lemme(
                 cle=form, graphie_accentuee=form, graphie=form, parent=self, origin=0, pos="a",
                 modele=self.modele("inv")
             )
-            yield Lemmatiseur.format_result(
-                form=form,
-                lemma=_lemma,
-                with_pos=pos,
-                raw_obj=get_lemma_object
-            )
+            yield Analyse(form, _lemma, None, None, None, self)
 
         if form.upper() != form:
-            yield from self._lemmatise_roman_numerals(form.upper(), pos=pos, get_lemma_object=get_lemma_object)
+            yield from self._lemmatise_roman_numerals(form.upper())
 
-    def _lemmatise_contractions(self, f, *args, **kwargs):
-        """ Lemmatise un mot f avec sa contraction
+    def _decontractions(self, f):
+        """ Formes non contractes d'un mot f
 
-        :param f: Mot à lemmatiser
-        :yield: Match formated like in _lemmatise()
+        :param f: Mot déramisé
+        :return: Formes à lemmatiser, dans l'ordre de la table des contractions
+        :rtype: list of str
         """
+        formes = []
         fd = f
-        for contraction, decontraction in self._contractions.items():
-            if fd.endswith(contraction):
-                fd = f[:-len(contraction)]
-                if "v" in fd or "V" in fd:
-                    fd += decontraction
-                else:
-                    fd += deramise(decontraction)
-                yield from self._lemmatise(fd, *args, **kwargs)
+        rang = -1
+        while True:
+            # Contraction suivante de la table qui termine fd : fd change à chaque contraction trouvée
+            regles = [regle for regle in _regles(self._contractions_trie, fd, inverse=True) if regle[0] > rang]
+            if not regles:
+                return formes
+            rang, contraction, decontraction = regles[0]
+            fd = f[:-len(contraction)]
+            if "v" in fd or "V" in fd:
+                fd += decontraction
+            else:
+                fd += deramise(decontraction)
+            formes.append(fd)
+
+    def _sans_suffixes(self, f):
+        """ Formes d'un mot f privé de ses suffixes enclitiques
 
-    def _lemmatise_desassims(self, f, *args, **kwargs):
-        """ Lemmatise un mot f avec sa désassimilation
+        :param f: Mot déramisé
+        :return: Formes à lemmatiser, dans l'ordre de la table des suffixes
+        :rtype: list of str
+        """
+        return [f[:-len(suffixe)] for _, suffixe, _ in _regles(self._suffixes_trie, f, inverse=True) if suffixe != f]
+
+    def lemmatise(self, f, pos=False, get_lemma_object=False, lower=True, as_dict=True, top_k=None,
+                  min_frequency=None, features=None, with_features=False):
+        """ Lemmatise un mot f
 
         :param f: Mot à lemmatiser
-        :yield: Match formated like in _lemmatise()
+        :param pos: Récupère la POS
+        :param get_lemma_object: Retrieve Lemma object instead of string representation of lemma
+        :param lower: Need to check lowercase version
+        :param as_dict: Retrieve dictionaries instead of Analyse records if set to true.
+            Records resolve their strings only when they are read, pos and get_lemma_object do not apply to them.
+        :param top_k: Retrieve only the top_k most likely analyses, ranked by the number of occurrences of their
+            lemma in the LASLA texts times the rarity of their desinence (Default : None, every analysis in the
+            order of the lemmatisation)
+        :param min_frequency: Retrieve only the analyses whose lemma occurs at least min_frequency times in the LASLA
+            texts, ranked like with top_k
+        :param features: Retrieve only the analyses with these morphological features, given as feature names
+            ("génitif pluriel", ["génitif", "datif"]) or as a mask of pycollatinus.traits. An analysis is kept if it
+            has one of the requested features of each category. The filter is applied before top_k.
+        :param with_features: Add the morphology number (morpho) and the mask of its features (features) to
+            dictionaries
+        """
+        acceptees = None
+        if features is not None:
+            acceptees = self._morphos_acceptees(features)
+        if top_k is not None or min_frequency is not None:
+            cle = (f, top_k, min_frequency, acceptees)
+            analyses = self._cache.get(cle) if self._cache is not None and lower else None
+            if analyses is None:
+                analyses = self._lemmatise_classees(f, top_k=top_k, min_frequency=min_frequency, lower=lower,
+                                                    acceptees=acceptees)
+                if self._cache is not None and lower:
+                    self._cache.set(cle, analyses)
+        elif self._cache is None or not lower:
+            analyses = self._lemmatise_variantes(f, lower=lower)
+            if self._extension == "lazy":
+                analyses = self._etend_si_inconnue(f, tuple(analyses), lower=lower)
+        else:
+            # Analyse records are immutable tuples and can be handed over as they are
+            analyses = self._cache.get(f)
+            if analyses is None:
+                analyses = tuple(self._lemmatise_variantes(f))
+                if self._extension == "lazy":
+                    analyses = self._etend_si_inconnue(f, analyses)
+                self._cache.set(f, analyses)
+        if acceptees is not None and top_k is None and min_frequency is None:
+            # Le cache garde toutes les analyses : le filtre ne compare que leurs numéros de morphologie
+            analyses = [analyse for analyse in analyses if analyse.morpho in acceptees]
+
+        if not as_dict:
+            yield from analyses
+            return
+        for analyse in analyses:
+            yield analyse.to_dict(with_pos=pos, raw_obj=get_lemma_object, with_features=with_features)
+
+    def _etend_si_inconnue(self, f, analyses, lower=True):
+        """ Charge le lexique étendu si la forme f est inconnue du lexique de base, puis l'analyse à nouveau
+
+        :param f: Mot lemmatisé
+        :param analyses: Analyses de f par le lexique de base
+        :type analyses: tuple of Analyse
+        :param lower: Need to check lowercase version
+        :rtype: tuple of Analyse
         """
-        forme_assimilee = self.desassims(f)
-        if forme_assimilee != f:
-            for proposal in self._lemmatise(forme_assimilee, *args, **kwargs):
-                yield proposal
+        if analyses or not f:
+            return analyses
+        self.charge_extension()
+        return tuple(self._lemmatise_variantes(f, lower=lower))
+
+    def _variantes(self, f, lower=True):
+        """ Formes à lemmatiser pour un mot f : sa version en minuscules, puis le mot déramisé, ses assimilation et
+        désassimilation, ses formes non contractes et ses formes sans suffixe.
 
-    def _lemmatise_suffixe(self, f, *args, **kwargs):
-        """ Lemmatise un mot f si il finit par un suffixe
+        Une même forme peut apparaître plusieurs fois.
 
         :param f: Mot à lemmatiser
-        :yield: Match formated like in _lemmatise()
+        :param lower: Need to check lowercase version
+        :rtype: list of str
         """
-        for suffixe in self._suffixes:
-            if f.endswith(suffixe) and suffixe != f:
-                yield from self._lemmatise(f[:-len(suffixe)], *args, **kwargs)
+        variantes = []
+        # We run on the lower version
+        if lower and f.lower() != f:
+            variantes += self._variantes(f.lower(), lower=False)
 
-    def lemmatise(self, f, pos=False, get_lemma_object=False, lower=True):
-        """ Lemmatise un mot f
+        f = deramise(f)
+        variantes.append(f)
+        for forme in (self.assims(f), self.desassims(f)):
+            if forme != f:
+                variantes.append(forme)
+        variantes += self._decontractions(f)
+        variantes += self._sans_suffixes(f)
+        return variantes
+
+    def _lemmatise_variantes(self, f, lower=True):
+        """ Lemmatise un mot f et ses variantes : minuscules, nombres romains, assimilations, contractions et suffixes
+
+        Chaque forme distincte de _variantes() n'est analysée qu'une fois : les analyses d'une forme déjà vue sont
+        renvoyées à nouveau, à leur place dans la cascade. Les compteurs sont donnés par variant_info().
 
         :param f: Mot à lemmatiser
-        :param pos: Récupère la POS
-        :param get_lemma_object: Retrieve Lemma object instead of string representation of lemma
         :param lower: Need to check lowercase version
+        :yield: Analyses, comme _lemmatise()
         """
         if lower:
             # We do not run numeral on lower
-            yield from self._lemmatise_roman_numerals(f, pos=pos, get_lemma_object=get_lemma_object)
-
-            # We run on the lower version
-            if f.lower() != f:
-                yield from self.lemmatise(f.lower(), pos=pos, get_lemma_object=get_lemma_object, lower=False)
+            yield from self._lemmatise_roman_numerals(f)
+
+        variantes = self._variantes(f, lower=lower)
+        compteurs = self._variantes_info
+        compteurs["tokens"] += 1
+        compteurs["variants"] += len(variantes)
+        if len(variantes) == 1:
+            compteurs["analysed"] += 1
+            yield from self._lemmatise(variantes[0])
+            return
+
+        analyses = {}
+        for forme in variantes:
+            resultat = analyses.get(forme)
+            if resultat is None:
+                resultat = analyses[forme] = tuple(self._lemmatise(forme))
+            yield from resultat
+        compteurs["analysed"] += len(analyses)
+
+    def _lemmatise_classees(self, f, top_k=None, min_frequency=None, lower=True, acceptees=None):
+        """ Analyses d'un mot f classées par fréquence décroissante, puis dans l'ordre de _lemmatise_variantes()
+
+        La fréquence d'une analyse est le nombre d'occurrences de son lemme dans les textes du LASLA multiplié par la
+        rareté de sa désinence, RARETE pour une désinence courante. Les analyses d'un même radical ne sont construites
+        que si leur borne, le nombre d'occurrences du lemme multiplié par RARETE, peut encore les placer parmi les
+        top_k premières : les radicaux de toutes les variantes sont parcourus par borne décroissante, et le parcours
+        s'arrête dès que les top_k meilleures analyses trouvées dépassent la borne du radical suivant.
 
-        f = deramise(f)
-        yield from self._lemmatise(f, pos=pos, get_lemma_object=get_lemma_object)
-        yield from self._lemmatise_assims(f, pos=pos, get_lemma_object=get_lemma_object)
-        yield from self._lemmatise_desassims(f, pos=pos, get_lemma_object=get_lemma_object)
-        yield from self._lemmatise_contractions(f, pos=pos, get_lemma_object=get_lemma_object)
+        :param f: Mot à lemmatiser
+        :param top_k: Nombre maximal d'analyses (Default : None, toutes les analyses)
+        :param min_frequency: Nombre minimal d'occurrences du lemme des analyses
+        :param lower: Need to check lowercase version
+        :param acceptees: Morphologies des analyses à garder (Default : None, toutes les analyses)
+        :type acceptees: frozenset of int
+        :rtype: tuple of Analyse
+        """
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k must be a positive integer")
+        analyses = []  # (-fréquence, rang du groupe, rang dans le groupe, analyse)
+        connue = False
+        if lower:
+            for indice, analyse in enumerate(self._lemmatise_roman_numerals(f)):
+                connue = True
+                occurrences = analyse.lemme.nbOcc()
+                if (min_frequency is None or occurrences >= min_frequency) and acceptees is None:
+                    analyses.append((-occurrences * RARETE, 0, indice, analyse))
+
+        variantes = self._variantes(f, lower=lower)
+        groupes_formes = {}
+        groupes = []  # (-borne, rang du groupe, nombre d'occurrences, forme, lemme, radical, désinences)
+        for forme in variantes:
+            if forme not in groupes_formes:
+                groupes_formes[forme] = list(self._groupes(forme))
+            for lemme, rad, desinences in groupes_formes[forme]:
+                connue = True
+                occurrences = (lemme if rad is not None else lemme.lemme()).nbOcc()
+                if min_frequency is None or occurrences >= min_frequency:
+                    groupes.append(
+                        (-occurrences * RARETE, len(groupes) + 1, occurrences, forme, lemme, rad, desinences)
+                    )
+        compteurs = self._variantes_info
+        compteurs["tokens"] += 1
+        compteurs["variants"] += len(variantes)
+        compteurs["analysed"] += len(groupes_formes)
+        if not connue and f and self._extension == "lazy":
+            self.charge_extension()
+            return self._lemmatise_classees(f, top_k=top_k, min_frequency=min_frequency, lower=lower,
+                                            acceptees=acceptees)
+
+        groupes.sort()
+        for borne, rang, occurrences, forme, lemme, rad, desinences in groupes:
+            if top_k is not None and len(analyses) >= top_k:
+                analyses.sort()
+                del analyses[top_k:]
+                # Aucune analyse des groupes suivants ne peut dépasser la dernière des top_k meilleures
+                if analyses[-1][0] < borne:
+                    break
+            for indice, analyse in enumerate(self._analyses_groupe(forme, lemme, rad, desinences)):
+                if acceptees is not None and analyse.morpho not in acceptees:
+                    continue
+                rarete = analyse.des.rarete() if analyse.des is not None else RARETE
+                analyses.append((-occurrences * rarete, rang, indice, analyse))
+        analyses.sort()
+        return tuple(analyse for _, _, _, analyse in analyses[:top_k])
+
+    def variant_info(self):
+        """ Compteurs de la cascade des variantes : mots lemmatisés (tokens), formes produites par la cascade
+        (variants), formes distinctes analysées (analysed) et formes dont l'analyse a été évitée (reused)
+
+        :rtype: dict
+        """
+        info = dict(self._variantes_info)
+        info["reused"] = info["variants"] - info["analysed"]
+        return info
 
-        yield from self._lemmatise_suffixe(f, pos=pos, get_lemma_object=get_lemma_object)
+    def clear_variant_info(self):
+        """ Remet à zéro les compteurs de la cascade des variantes
+        """
+        self._variantes_info = {"tokens": 0, "variants": 0, "analysed": 0}
 
-    def _lemmatise(self, form, pos=False, get_lemma_object=False):
+    def _lemmatise(self, form):
         """ Lemmatise un mot f
 
         :param f: Mot à lemmatiser
-        :param pos: Récupère la POS
-        :param get_lemma_object: Retrieve Lemma object instead of string representation of lemma
-        :param check_assims: Vérifie les assimilations.
+        :yield: Analyses de la forme
+        :ytype: Analyse
+        """
+        for lemme, rad, desinences in self._groupes(form):
+            yield from self._analyses_groupe(form, lemme, rad, desinences)
+
+    def _groupes(self, form):
+        """ Analyses possibles d'une forme regroupées par radical, sans les construire, dans l'ordre de _lemmatise() :
+        formes irrégulières, puis radicaux et désinences
+
+        :param form: Forme à lemmatiser
+        :yield: Triplets (lemme ou forme irrégulière, radical, désinences), radical et désinences valant None pour
+            une forme irrégulière
         """
-        result = []
         if not form:
-            return result
+            return
 
         # formes irrégulières
-        for irr in self._irregs[form]:
-            for m in irr.morphos():
-                yield Lemmatiseur.format_result(
-                    form=form, lemma=irr, morphos=self.morpho(m), with_pos=pos,
-                    raw_obj=get_lemma_object
-                )
+        for irr in self._irregs.get(form, ()):
+            yield irr, None, None
 
         # radical + désinence
-        for i in range(len(form)+1):
-            if i == 0:
-                radical = ""
-                desinence = form
-            else:
-                radical = form[:i]
-                desinence = form[i:]
-            ldes = self._desinences.get(desinence, None)  # List of desinences
-            if ldes is None:
-                continue
+        if self._index_formes is not None:
+            for rad, des in self._index_formes.analyses(form):
+                yield rad.lemme(), rad, (des,)
+            return
+
+        longueur = len(form)
+        for i, candidats in self._decoupes(form):
+            radical = form[:i]
             # Je regarde d'abord si d est une désinence possible,
             # car il y a moins de désinences que de radicaux.
             # Je fais la recherche sur les radicaux seulement si la désinence existe.
-            lrad = [] + self._radicaux.get(radical, [])
+            lrad = self._radicaux.get(radical, ())
 
             # ii noté ī
             # 1. Patauium, gén. Pataui : Patau.i . Patau+i.i
             # 2. conubium, conubis : conubi.s . conubi.i+s
-            if desinence.startswith('i') and not desinence.startswith("ii") and not radical.endswith('i'):
-                lrad += self._radicaux.get(radical + "i", [])
-
-            if len(lrad) == 0:  # Il n'y a rien à faire si le radical n'existe pas.
-                continue
+            if i < longueur and form[i] == "i" and form[i+1:i+2] != "i" and form[i-1:i] != "i":
+                lrad_i = self._radicaux.get(radical + "i", None)
+                if lrad_i:
+                    lrad = chain(lrad, lrad_i)
 
             for rad in lrad:
                 lemme = rad.lemme()
-                for des in ldes:
-                    if des.modele() == lemme.modele()\
-                            and des.numRad() == rad.numRad()\
-                            and not lemme.estIrregExcl(des.morphoNum()):
-                        # Commented this part because we are not using quantity right now.
-                        yield Lemmatiseur.format_result(
-                                form, lemme, morphos=self.morpho(des.morphoNum()), with_pos=pos,
-                                raw_obj=get_lemma_object, radical=rad, desinence=des
-                            )
-
-        return result
+                desinences = candidats.get((lemme.modele(), rad.numRad()))
+                if desinences:
+                    yield lemme, rad, desinences
+
+    def _analyses_groupe(self, form, lemme, rad, desinences):
+        """ Analyses d'un groupe de _groupes()
+
+        :yield: Analyses
+        :ytype: Analyse
+        """
+        if rad is None:
+            for m in lemme.morphos():
+                yield Analyse(form, lemme, m, None, None, self)
+            return
+        for des in desinences:
+            if not lemme.estIrregExcl(des.morphoNum()):
+                # Commented this part because we are not using quantity right now.
+                yield Analyse(form, lemme, des.morphoNum(), rad, des, self)
+
+    def _decoupes(self, form):
+        """ Points de découpe de la forme dont la fin est une désinence connue, trouvés en parcourant
+        l'arbre des désinences inversées depuis la fin de la forme.
+
+        :param form: Forme à découper
+        :type form: str
+        :return: Liste de (longueur du radical, désinences par couple (modèle, numéro de radical)),
+            par longueur de radical croissante
+        :rtype: list
+        """
+        noeud = self._desinences_trie
+        decoupes = []
+        candidats = noeud.get(None)
+        if candidats is not None:
+            decoupes.append((len(form), candidats))
+        for i in range(len(form) - 1, -1, -1):
+            noeud = noeud.get(form[i])
+            if noeud is None:
+                break
+            candidats = noeud.get(None)
+            if candidats is not None:
+                decoupes.append((i, candidats))
+        decoupes.reverse()
+        return decoupes
 
     def variable(self, v):
         """ Permet de remplacer la métavariable v
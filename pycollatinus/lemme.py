@@ -1,10 +1,11 @@
 from .ch import atone, communes
 import re
-from .util import DefaultOrderedDict
 from .modele import Modele
 
 
 class Radical(object):
+    __slots__ = ["_lemme", "_grq", "_gr", "_numero"]
+
     def __init__(self, g, n, parent=None):
         """ Représentation d'un radical
 
@@ -73,6 +74,10 @@ class Radical(object):
 
 class Lemme(object):
     RENVOI = re.compile("cf\\.\\s(\\w+)$")
+    __slots__ = [
+        "_lemmatiseur", "_radicaux", "_irregs", "_morphosIrrExcl", "_nh", "_nbOcc", "_cle", "_grq", "_gr",
+        "_modele", "_indMorph", "_renvoi", "_origin", "_pos", "_hyphen", "_paradigme"
+    ]
 
     def __repr__(self):
         return "<pycollatinus.lemme.Lemme[{}:modele-{}]>".format(self.cle(), self.grModele())
@@ -83,7 +88,7 @@ class Lemme(object):
     def __init__(self,
                  cle: str, graphie: str, graphie_accentuee: str,
                  modele: Modele, parent,
-                 radicaux: DefaultOrderedDict=None, origin: int =0, pos: str="-",
+                 radicaux: dict=None, origin: int =0, pos: str="-",
                  nombre_homonymie: int=0, nbOcc: int=0):
         """  Generate a lemma object
 
@@ -98,7 +103,7 @@ class Lemme(object):
         :param parent: Lemmatiseur
         :type parent: pycollatinus.Lemmatiseur
         :param radicaux: Dictionary of list of radicaux
-        :type radicaux: DefaultOrderedDict(list)
+        :type radicaux: dict[int, list[Radical]]
         :param origin: Origin of the lemma (0 curated, 1 automatic import)
         :type origin: int
         :param pos: POS tag
@@ -109,20 +114,21 @@ class Lemme(object):
         :type nbOcc: int
         """
         self._lemmatiseur = parent
-        self._radicaux = radicaux or DefaultOrderedDict(list)
-        self._irregs = []  # list of Irreg
-        self._morphosIrrExcl = []  # list of int
+        self._radicaux = radicaux or {}  # int -> list of Radical
+        # Les listes d'irréguliers ne sont créées que pour les lemmes qui en ont
+        self._irregs = ()  # list of Irreg
+        self._morphosIrrExcl = ()  # list of int
         self._nh = nombre_homonymie
         self._nbOcc = nbOcc
         self._cle = cle
         self._grq = graphie_accentuee
         self._gr = graphie
-        self._grModele = modele.gr()
         self._modele = modele
         self._indMorph = ""
         self._renvoi = None
         self._origin = origin
         self._pos = pos
+        self._paradigme = None  # Calculé par paradigm()
 
     def ajIrreg(self, irr):
         """ Ajoute au lemme l'obet irr, représente
@@ -134,11 +140,14 @@ class Lemme(object):
         :param irr: Irrégulier
         :type irr: pycollatinus.irregs.Irreg
         """
+        if not self._irregs:
+            self._irregs = []
         self._irregs.append(irr)
         # ajouter les numéros de morpho à la liste
         # des morphos irrégulières du lemme :
         if irr.exclusif():
-            self._morphosIrrExcl += irr.morphos()
+            self._morphosIrrExcl = list(self._morphosIrrExcl) + irr.morphos()
+        self._paradigme = None
 
     def ajRadical(self, i, r=None):
         """ Ajoute le radical r de numéro i à la map des radicaux du lemme.
@@ -149,7 +158,8 @@ class Lemme(object):
         :type r: Radical
         """
         if r:
-            self._radicaux[i].append(r)
+            self._radicaux.setdefault(i, []).append(r)
+            self._paradigme = None
 
     def cle(self):
         """ Renvoie la clé sous laquel le lemme est enregistré dans le lemmatiseur parent.
@@ -217,7 +227,7 @@ class Lemme(object):
         :return: Graphie du modèle du lemme.
         :rtype: ???
         """
-        return self._grModele
+        return self._modele.gr()
 
     def indMorph(self):
         """ Returne l'index de morphologie
@@ -292,7 +302,7 @@ class Lemme(object):
         :return: Radicaux enregistré au numéro R
         :rtype: list of Radical
         """
-        return self._radicaux[r]
+        return self._radicaux.get(r, [])
 
     def renvoi(self):
         """ Renvoie True si le lemme est une forme alternative renvoyant à une autre entrée du lexique.
@@ -335,6 +345,47 @@ class Lemme(object):
         """
         return self._hyphen
 
+    def paradigm(self):
+        """ Paradigme du lemme : ses formes radical + désinence, sauf les morphologies absentes du modèle et celles
+        que remplace une forme irrégulière exclusive, puis ses formes irrégulières.
+
+        Le paradigme n'est calculé qu'une fois par lemme.
+
+        :return: Quadruplets (forme, numéro de morphologie, radical, désinence), radical et désinence valant None
+            pour une forme irrégulière
+        :rtype: tuple of tuple
+        """
+        # Les lemmes d'un lemmatiseur compilé par pickle avant l'ajout du paradigme n'ont pas l'attribut
+        paradigme = getattr(self, "_paradigme", None)
+        if paradigme is None:
+            self._paradigme = paradigme = tuple(self._calcule_paradigme())
+        return paradigme
+
+    def _calcule_paradigme(self):
+        """ Calcule le paradigme du lemme sans le garder, voir paradigm()
+
+        Garder les paradigmes de tout le lexique coûte des millions d'objets suivis par le ramasse-miettes :
+        l'export du lexique, qui n'en a besoin qu'une fois, utilise directement cette méthode.
+
+        :rtype: list of tuple
+        """
+        paradigme = []
+        exclues = set(self._modele.absents())
+        exclues.update(self._morphosIrrExcl)
+        radicaux = self._radicaux
+        # Désinences dans l'ordre des morphologies du modèle
+        for des in self._modele.desinences():
+            morpho = des.morphoNum()
+            if morpho in exclues:
+                continue
+            gr = des.gr()
+            for rad in radicaux.get(des.numRad(), ()):
+                paradigme.append((rad.gr() + gr, morpho, rad, des))
+        for irr in self._irregs:
+            for morpho in irr.morphos():
+                paradigme.append((irr.gr(), morpho, None, None))
+        return paradigme
+
     def possible_forms(self):
         """ Generate a list of possible forms for the current lemma
 
@@ -4,6 +4,8 @@ from .util import DefaultOrderedDict
 
 
 class Desinence(object):
+    __slots__ = ["_rarete", "_grq", "_gr", "_morpho", "_numR", "_modele"]
+
     def __repr__(self):
         return "<pycollatinus.modele.Desinence[{};{};{}]>".format(self.gr(), self.morphoNum(), self.numRad())
 
@@ -106,6 +108,7 @@ class Modele(object):
     :type pere: Modele
     """
     RE = re.compile("[:;]*([\\w]*)\\+{0,1}(\\$\\w+)")
+    __slots__ = ["_lemmatiseur", "_pere", "_desinences", "msuff", "_absents", "_genRadicaux", "_gr", "_grq", "_pos"]
 
     def __repr__(self):
         return "<pycollatinus.modele.Modele[{}]>".format(self.gr())
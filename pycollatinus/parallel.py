@@ -0,0 +1,148 @@
+from collections import deque
+from itertools import islice
+import multiprocessing
+
+from .lemmatiseur import Lemmatiseur, iter_tokens
+
+
+# Lemmatiseur of the current worker process, loaded once by _initialiser
+_lemmatiseur = None
+
+
+def _initialiser(path, options):
+    """ Charge le lemmatiseur d'un processus de travail
+
+    :param path: Chemin d'un lemmatiseur compilé, None pour charger les données de Collatinus
+    :param options: Options du constructeur de Lemmatiseur
+    """
+    global _lemmatiseur
+    if path:
+        _lemmatiseur = Lemmatiseur.load(path)
+    else:
+        _lemmatiseur = Lemmatiseur(**options)
+
+
+def _lemmatiseur_du_processus():
+    """ Lemmatiseur du processus courant, chargé à la première utilisation si le processus
+    n'a pas été initialisé par LemmatiseurPool
+
+    :rtype: Lemmatiseur
+    """
+    global _lemmatiseur
+    if _lemmatiseur is None:
+        _lemmatiseur = Lemmatiseur()
+    return _lemmatiseur
+
+
+def _lemmatise_document(args):
+    texte, pos = args
+    return _lemmatiseur_du_processus().lemmatise_multiple(texte, pos=pos)
+
+
+def _lemmatise_tokens(args):
+    tokens, pos = args
+    return _lemmatiseur_du_processus().lemmatise_batch(tokens, pos=pos)
+
+
+class LemmatiseurPool(object):
+    """ Lemmatisation parallèle dans plusieurs processus, chacun chargeant le lemmatiseur une seule fois.
+
+    Les résultats sont renvoyés dans l'ordre des entrées. Les lemmes sont renvoyés sous forme de chaînes :
+    transmettre les objets Lemme entre processus reviendrait à copier tout le lemmatiseur.
+
+    :param processes: Nombre de processus (Default : nombre de cœurs)
+    :type processes: int
+    :param path: Chemin d'un lemmatiseur compilé par Lemmatiseur.compile() à charger dans chaque processus
+        (Default : None, les processus chargent les données de Collatinus)
+    :type path: str
+    :param chunksize: Nombre de documents envoyés à la fois à un processus par map() et imap()
+    :type chunksize: int
+    :param tokens_per_chunk: Nombre de mots envoyés à la fois à un processus par lemmatise_stream()
+    :type tokens_per_chunk: int
+    :param options: Options du constructeur de Lemmatiseur utilisées quand path n'est pas donné
+    """
+    def __init__(self, processes=None, path=None, chunksize=1, tokens_per_chunk=2000, **options):
+        self._processes = processes or multiprocessing.cpu_count()
+        self._chunksize = chunksize
+        self._tokens_per_chunk = tokens_per_chunk
+        self._pool = multiprocessing.Pool(self._processes, initializer=_initialiser, initargs=(path, options))
+
+    def map(self, documents, pos=False, chunksize=None):
+        """ Lemmatise une liste de documents
+
+        :param documents: Textes à lemmatiser
+        :type documents: iterable of str
+        :param pos: Récupère la POS
+        :param chunksize: Nombre de documents envoyés à la fois à un processus
+        :return: Pour chaque document, le résultat de Lemmatiseur.lemmatise_multiple()
+        :rtype: list
+        """
+        return self._pool.map(
+            _lemmatise_document, [(document, pos) for document in documents], chunksize or self._chunksize
+        )
+
+    def imap(self, documents, pos=False, chunksize=None):
+        """ Lemmatise des documents et renvoie leurs résultats au fur et à mesure, dans l'ordre des documents
+
+        :param documents: Textes à lemmatiser
+        :type documents: iterable of str
+        :param pos: Récupère la POS
+        :param chunksize: Nombre de documents envoyés à la fois à un processus
+        :yield: Pour chaque document, le résultat de Lemmatiseur.lemmatise_multiple()
+        """
+        return self._pool.imap(
+            _lemmatise_document, ((document, pos) for document in documents), chunksize or self._chunksize
+        )
+
+    def lemmatise_stream(self, source, pos=False, tokens_per_chunk=None, chunk_size=65536):
+        """ Lemmatise un texte lu morceau par morceau, en répartissant des paquets de mots entre les processus.
+
+        Le nombre de paquets en cours de traitement est borné : la mémoire utilisée ne dépend pas de la taille
+        du texte.
+
+        :param source: Fichier texte ouvert ou itérable de morceaux de texte
+        :param pos: Récupère la POS
+        :param tokens_per_chunk: Nombre de mots envoyés à la fois à un processus
+        :param chunk_size: Nombre de caractères lus à la fois dans un fichier
+        :yield: Liste des résultats de chaque mot, dans l'ordre du texte
+        """
+        return self.lemmatise_tokens(iter_tokens(source, chunk_size=chunk_size), pos=pos,
+                                     tokens_per_chunk=tokens_per_chunk)
+
+    def lemmatise_tokens(self, tokens, pos=False, tokens_per_chunk=None):
+        """ Lemmatise des mots déjà découpés, en répartissant des paquets de mots entre les processus.
+
+        Le nombre de paquets en cours de traitement est borné : les mots ne sont lus qu'au fur et à mesure.
+
+        :param tokens: Mots à lemmatiser
+        :type tokens: iterable of str
+        :param pos: Récupère la POS
+        :param tokens_per_chunk: Nombre de mots envoyés à la fois à un processus
+        :yield: Liste des résultats de chaque mot, dans l'ordre des mots
+        """
+        tokens = iter(tokens)
+        taille = tokens_per_chunk or self._tokens_per_chunk
+        en_cours = deque()
+        while True:
+            while len(en_cours) < 2 * self._processes:
+                paquet = list(islice(tokens, taille))
+                if not paquet:
+                    break
+                en_cours.append(self._pool.apply_async(_lemmatise_tokens, ((paquet, pos), )))
+            if not en_cours:
+                return
+            yield from en_cours.popleft().get()
+
+    def close(self):
+        """ Arrête les processus une fois les tâches en cours terminées """
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.terminate()
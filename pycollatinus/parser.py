@@ -1,10 +1,14 @@
 from .ch import deramise, atone, listeI, allonge, simplified
-from .util import lignesFichier, flatten, DefaultOrderedDict
+from .util import lignesFichier, flatten, pause_gc
 from .lemme import Lemme, Radical
 from .irregs import Irreg
 from .modele import Modele, Desinence
 from .error import UnknownModeleConfigurationKey, MissingRadical
+from contextlib import contextmanager
+import multiprocessing
 import os
+import timeit
+import tracemalloc
 import warnings
 import re
 
@@ -25,6 +29,40 @@ MODELE_CLEFS = [
 ]
 
 
+# Parser of the current lexicon reading process, created by _initialise_lecture
+_analyseur = None
+
+
+def _initialise_lecture(path, debug):
+    """ Prépare un processus de lecture du lexique : seuls les modèles sont chargés
+
+    :param path: Dossier des données de Collatinus
+    :param debug: Issues warning on wrongly formated source data
+    """
+    global _analyseur
+    from .lemmatiseur import Lemmatiseur
+    _analyseur = Parser(Lemmatiseur(load=False), path=path, debug=debug)
+    _analyseur.ajModeles()
+
+
+def _lis_lignes(args):
+    """ Lit des lignes du lexique dans un processus de lecture
+
+    :param args: Lignes et origine des lemmes
+    :return: Enregistrements des lemmes, voir Parser.ajEnregistrements()
+    :rtype: list of tuple
+    """
+    lignes, origin = args
+    enregistrements = []
+    for ligne in lignes:
+        lemme = _analyseur.creeLemme(ligne, origin)
+        enregistrements.append((
+            lemme.cle(), lemme.gr(), lemme.grq(), lemme.grModele(), lemme.nh(), lemme.nbOcc(), lemme._pos,
+            [(r.numRad(), r.grq(), r.gr(), deramise(r.gr()).lower()) for r in _analyseur.calculeRadicaux(lemme)]
+        ))
+    return enregistrements
+
+
 class Parser(object):
     """ Parser object that fills the Lemmatiseur
 
@@ -32,13 +70,25 @@ class Parser(object):
     :param path: Path in which we find Collatinus data
     :param cible: Language for morphology
     :param debug: Issues warning on wrongly formated source data
+    :param processes: Number of processes reading the lexicon files (Default : None, read in the current process)
+    :param lines_per_chunk: Number of lexicon lines sent at once to a reading process
+    :param profile: Count the objects created and trace the memory allocated by each stage of parse(),
+        see report (Default : False, only the time of each stage is recorded)
+
+    :ivar report: Stages of the last parse(), see etape()
+    :type report: list of dict
     """
-    def __init__(self, lemmatiseur, path=None, cible="fr", debug=False):
+    def __init__(self, lemmatiseur, path=None, cible="fr", debug=False, processes=None, lines_per_chunk=2000,
+                 profile=False):
         """"""
+        self._profile = profile
+        self.report = []
         self.__lemmatiseur__ = lemmatiseur
         self.__data_directory__ = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
         self.__cible__ = cible
         self._debug = debug
+        self._processes = processes
+        self._lines_per_chunk = lines_per_chunk
 
     @property
     def data_directory(self):
@@ -48,14 +98,89 @@ class Parser(object):
     def lemmatiseur(self):
         return self.__lemmatiseur__
 
-    def parse(self):
-        self.ajAssims()
-        self.ajContractions()
-        self.ajMorphos(self.__cible__)  # Note : from lisModeles
-        self.ajModeles()  # Note : from lisModeles
-        self.ajLexiques()  # Note : from lisLexique
-        self.ajExtensions()  # Note : from lisLexique
-        self.ajIrreguliers()
+    def parse(self, extension=True):
+        """ Charge toutes les données
+
+        :param extension: Charge le lexique étendu data/lem_ext.la
+        :type extension: bool
+        :return: Rapport des étapes du chargement, voir etape()
+        :rtype: list of dict
+        """
+        self.report = []
+        # La mémoire n'est tracée que le temps du chargement, sauf si elle l'était déjà
+        trace = self._profile and not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start()
+        try:
+            with self.etape("ajAssims"):
+                self.ajAssims()
+            with self.etape("ajContractions"):
+                self.ajContractions()
+            with self.etape("ajMorphos"):
+                self.ajMorphos(self.__cible__)  # Note : from lisModeles
+            with self.etape("ajModeles"):
+                self.ajModeles()  # Note : from lisModeles
+            with self.etape("ajLexiques"):
+                self.ajLexiques()  # Note : from lisLexique
+            if extension:
+                with self.etape("ajExtensions"):
+                    self.ajExtensions()  # Note : from lisLexique
+            with self.etape("ajIrreguliers"):
+                self.ajIrreguliers()
+        finally:
+            if trace:
+                tracemalloc.stop()
+        return self.report
+
+    def compte(self):
+        """ Compte les objets chargés dans le lemmatiseur
+
+        :return: Nombre de modèles, désinences, lemmes, radicaux et formes irrégulières
+        :rtype: dict
+        """
+        lemmatiseur = self.lemmatiseur
+        return {
+            "modeles": len(lemmatiseur._modeles),
+            "desinences": sum(map(len, lemmatiseur._desinences.values())),
+            "lemmes": len(lemmatiseur._lemmes),
+            "radicaux": sum(map(len, lemmatiseur._radicaux.values())),
+            "irregs": sum(map(len, lemmatiseur._irregs.values()))
+        }
+
+    @contextmanager
+    def etape(self, nom):
+        """ Mesure une étape du chargement et l'ajoute à report : un dictionnaire dont
+
+            * stage est le nom de l'étape,
+            * time sa durée en secondes,
+            * counts le nombre d'objets qu'elle a créés, voir compte(),
+            * memory la mémoire qu'elle a allouée et conservée, memory_peak le pic de mémoire allouée pendant
+              l'étape, en octets. Avant Python 3.9, memory_peak est le pic depuis le début du suivi de la mémoire.
+
+        counts, memory et memory_peak valent None si le parser n'a pas été créé avec profile=True.
+
+        :param nom: Nom de l'étape
+        :type nom: str
+        """
+        counts = memory = memory_peak = None
+        if self._profile:
+            avant = self.compte()
+            if tracemalloc.is_tracing():
+                # reset_peak() n'existe que depuis Python 3.9 : avant, le pic est celui depuis le début du suivi
+                if hasattr(tracemalloc, "reset_peak"):
+                    tracemalloc.reset_peak()
+                memory = tracemalloc.get_traced_memory()[0]
+        debut = timeit.default_timer()
+        yield
+        duree = timeit.default_timer() - debut
+        if self._profile:
+            counts = {cle: nombre - avant[cle] for cle, nombre in self.compte().items()}
+            if memory is not None:
+                actuelle, pic = tracemalloc.get_traced_memory()
+                memory, memory_peak = actuelle - memory, pic - memory
+        self.report.append({
+            "stage": nom, "time": duree, "counts": counts, "memory": memory, "memory_peak": memory_peak
+        })
 
     def path(self, nf):
         """ Compute the path for the file to load
@@ -93,6 +218,7 @@ class Parser(object):
             ass1, ass2 = tuple(lin.split(':'))
             self.lemmatiseur._assims[ass1] = ass2
             self.lemmatiseur._assimsq[atone(ass1)] = atone(ass2)
+        self.lemmatiseur._indexe_assims()
 
     def ajContractions(self):
         """ Charge et établit une liste qui donne, chaque contraction, forme non contracte qui lui correspond.
@@ -100,6 +226,7 @@ class Parser(object):
         for lin in lignesFichier(self.path("contractions.la")):
             ass1, ass2 = tuple(lin.split(':'))
             self.lemmatiseur._contractions[ass1] = ass2
+        self.lemmatiseur._indexe_contractions()
 
     def lisFichierLexique(self, filepath):
         """ Lecture des lemmes, et enregistrement de leurs radicaux
@@ -109,11 +236,66 @@ class Parser(object):
         """
         orig = int(filepath.endswith("ext.la"))
         lignes = lignesFichier(filepath)
-        for ligne in lignes:
-            self.parse_lemme(ligne, orig)
+        if not self._processes or self._processes < 2:
+            for ligne in lignes:
+                self.parse_lemme(ligne, orig)
+            return
+
+        # Les lignes sont lues par paquets dans des processus, et les lemmes enregistrés dans l'ordre du fichier
+        lignes = list(lignes)
+        taille = self._lines_per_chunk
+        paquets = [(lignes[i:i + taille], orig) for i in range(0, len(lignes), taille)]
+        with multiprocessing.Pool(
+                self._processes, initializer=_initialise_lecture, initargs=(self.data_directory, self._debug)) as pool:
+            with pause_gc():
+                for enregistrements in pool.imap(_lis_lignes, paquets):
+                    self.ajEnregistrements(enregistrements, orig)
+
+    def ajEnregistrements(self, enregistrements, origin=0):
+        """ Enregistre des lemmes lus par un processus de lecture. Comme pour parse_lemme(),
+        un lemme dont la clé est déjà connue est ignoré.
+
+        :param enregistrements: Pour chaque lemme : clé, graphie, graphie accentuée, modèle, numéro d'homonymie,
+            nombre d'occurrences, POS et radicaux (numéro, graphie accentuée, graphie, clé), dans l'ordre où
+            ajRadicaux() les enregistre
+        :type enregistrements: list of tuple
+        :param origin: 0 for original curated lemma, 1 for automatic import from Gaffiot
+        :type origin: int
+        """
+        lemmes, radicaux = self.lemmatiseur._lemmes, self.lemmatiseur._radicaux
+        for cle, gr, grq, modele, nh, nbOcc, pos, radicaux_lemme in enregistrements:
+            if cle in lemmes:
+                continue
+            lemme = Lemme(
+                cle=cle, graphie=gr, graphie_accentuee=grq,
+                modele=self.lemmatiseur.modele(modele), parent=self.lemmatiseur,
+                nombre_homonymie=nh, nbOcc=nbOcc, origin=origin, pos=pos
+            )
+            for numero, rad_grq, rad_gr, cle_radical in radicaux_lemme:
+                # Les graphies du radical sont déjà calculées
+                r = Radical.__new__(Radical)
+                r._grq, r._gr, r._numero, r._lemme = rad_grq, rad_gr, numero, lemme
+                lemme.ajRadical(numero, r)
+                radicaux[cle_radical].append(r)
+            lemmes[cle] = lemme
 
     def parse_lemme(self, linea: str, origin: int=0, _deramise: bool=True):
-        """ Constructeur de la classe Lemme à partir de la ligne linea.
+        """ Constructeur de la classe Lemme à partir de la ligne linea, et enregistrement du lemme.
+
+        :param linea: Ligne à parser
+        :type linea: str
+        :param origin: 0 for original curated lemma, 1 for automatic import from Gaffiot
+        :type origin: int
+        :param _deramise: Force the deramisation of the normalized graphie
+        :type _deramise: bool
+        :rtype: Lemme
+        """
+        lemma = self.creeLemme(linea, origin, _deramise)
+        self._register_lemme(lemma)
+        return lemma
+
+    def creeLemme(self, linea: str, origin: int=0, _deramise: bool=True):
+        """ Constructeur de la classe Lemme à partir de la ligne linea, sans l'enregistrer.
 
         Exemple de linea avec numéro d'éclat:
             # cădo|lego|cĕcĭd|cās|is, ere, cecidi, casum|687
@@ -156,13 +338,12 @@ class Parser(object):
         if len(eclats) < 6:
             warnings.warn("Ligne mal formée : " + gr + "\n ---Dernier champ " + eclats[-1] + "\n ---" + linea)
 
-        radicaux = DefaultOrderedDict(list)
+        radicaux = {}
         # lecture des radicaux, 2 et 3
         for i in range(2, 4):
             if eclats[i]:
                 lrad = eclats[i].split(',')
-                for rad in lrad:
-                    radicaux[i - 1].append(Radical(rad, i - 1))
+                radicaux[i - 1] = [Radical(rad, i - 1) for rad in lrad]
 
         # Gros doute sur le fonctionnement ici
         indMorph = eclats[4]
@@ -220,7 +401,6 @@ class Parser(object):
         for radNum in lemma._radicaux:
             for rad in lemma._radicaux[radNum]:
                 rad.set_lemme(lemma)
-        self._register_lemme(lemma)
         return lemma
 
     def register_modele(self, modele: Modele):
@@ -401,21 +581,30 @@ class Parser(object):
             *  en se servant des modèles, ajoute à ce lemme,
             *  et ensuite à la map *  des radicaux de la classe Lemmat.
 
+        :param lemme: Lemme
+        :type lemme: Lemme
+        """
+        for r in self.calculeRadicaux(lemme):
+            self.lemmatiseur._radicaux[deramise(r.gr()).lower()].append(r)
+
+    def calculeRadicaux(self, lemme):
+        """ Calcule les radicaux du lemme l en se servant des modèles, et les ajoute à ce lemme.
+
         Ligne type de lemme
         # ablŭo=ā̆blŭo|lego|ā̆blŭ|ā̆blūt|is, ere, lui, lutum
         #      0        1    2    3         4
 
         :param lemme: Lemme
         :type lemme: Lemme
+        :return: Tous les radicaux du lemme, dans l'ordre où ils sont ajoutés à la map des radicaux
+        :rtype: list of Radical
         """
         m = self.lemmatiseur.modele(lemme.grModele())
         ''' insérer d'abord les radicaux définis dans lemmes.la
         qui sont prioritaires '''
-
+        radicaux = []
         for i in lemme.cles_radicaux():
-            radical_list = lemme.radical(i)
-            for radical in radical_list:
-                self.lemmatiseur._radicaux[deramise(radical.gr()).lower()].append(radical)
+            radicaux.extend(lemme.radical(i))
 
         # pour chaque radical du modèle
         for indice_radical in m.cles_radicaux():
@@ -447,11 +636,17 @@ class Parser(object):
 
                 # Doute si cela n'appartient pas à graphe in gs
                 lemme.ajRadical(indice_radical, r)
-                self.lemmatiseur._radicaux[deramise(r.gr()).lower()].append(r)
+                radicaux.append(r)
+        return radicaux
 
     def ajDesinence(self, d):
-        """ Ajoute la désinence d dans la map des désinences. """
-        self.lemmatiseur._desinences[deramise(d.gr())].append(d)
+        """ Ajoute la désinence d dans la map des désinences,
+            et dans l'index des désinences par couple (modèle, numéro de radical).
+            L'arbre des désinences lues à l'envers pointe vers cet index.
+        """
+        cle = deramise(d.gr())
+        self.lemmatiseur._desinences[cle].append(d)
+        self.lemmatiseur._indexe_desinence(cle, d)
 
     def parse_irreg(self, l):
         """ Constructeur de la classe Irreg.
@@ -0,0 +1,282 @@
+""" Serveur HTTP/JSON local de lemmatisation, sans dépendance hors de la bibliothèque standard
+
+    python -m pycollatinus.serve --port 8080
+
+Le lemmatiseur est chargé une seule fois. Les requêtes reçues en même temps sont regroupées en micro-lots :
+chaque forme distincte d'un lot n'est analysée qu'une fois.
+
+* POST /lemmatise avec {"text": "Cogito ergo sum"}, {"tokens": ["cogito", "ergo"]} ou {"token": "sum"}, et
+  éventuellement "pos": true. Renvoie {"results": [...]} avec les résultats de chaque mot, ou {"result": [...]}
+  pour un seul mot.
+* GET /metrics : requêtes, mots, lots, débit, percentiles de latence et statistiques du cache.
+* GET /health
+"""
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+import argparse
+import json
+import queue
+import threading
+import timeit
+
+from .lemmatiseur import Lemmatiseur, iter_tokens
+
+
+class _Requete(object):
+    """ Requête en attente de son micro-lot """
+    __slots__ = ["tokens", "pos", "resultats", "erreur", "fini"]
+
+    def __init__(self, tokens, pos):
+        self.tokens = tokens
+        self.pos = pos
+        self.resultats = None
+        self.erreur = None
+        self.fini = threading.Event()
+
+
+class MicroBatcher(object):
+    """ Regroupe les requêtes de plusieurs threads en micro-lots lemmatisés par un seul thread, avec
+    Lemmatiseur.lemmatise_batch()
+
+    Un lot est lancé dès qu'il atteint max_batch_tokens mots, ou max_wait secondes après l'arrivée de sa
+    première requête.
+
+    :param lemmatiseur: Lemmatiseur
+    :type lemmatiseur: Lemmatiseur
+    :param max_batch_tokens: Nombre de mots au-delà duquel le lot est lancé sans attendre
+    :type max_batch_tokens: int
+    :param max_wait: Attente maximale des requêtes suivantes, en secondes
+    :type max_wait: float
+    """
+    def __init__(self, lemmatiseur, max_batch_tokens=5000, max_wait=0.005):
+        self._lemmatiseur = lemmatiseur
+        self._max_batch_tokens = max_batch_tokens
+        self._max_wait = max_wait
+        self._file = queue.Queue()
+        self._verrou = threading.Lock()
+        self._debut = timeit.default_timer()
+        self._latences = deque(maxlen=10000)  # Latences des dernières requêtes, en secondes
+        self._compteurs = {"requests": 0, "tokens": 0, "types": 0, "batches": 0, "errors": 0, "busy_time": 0.0}
+        self._thread = threading.Thread(target=self._boucle, name="pycollatinus-batcher", daemon=True)
+        self._thread.start()
+
+    def lemmatise(self, tokens, pos=False):
+        """ Lemmatise des mots dans le prochain micro-lot, en attendant son résultat
+
+        :param tokens: Mots à lemmatiser
+        :type tokens: list of str
+        :param pos: Récupère la POS
+        :return: Résultats de chaque mot, comme Lemmatiseur.lemmatise_batch()
+        :rtype: list
+        """
+        debut = timeit.default_timer()
+        requete = _Requete(tokens, pos)
+        self._file.put(requete)
+        requete.fini.wait()
+        with self._verrou:
+            self._latences.append(timeit.default_timer() - debut)
+        if requete.erreur is not None:
+            raise requete.erreur
+        return requete.resultats
+
+    def close(self):
+        """ Arrête le thread des lots une fois les requêtes en attente traitées """
+        self._file.put(None)
+        self._thread.join()
+
+    def _boucle(self):
+        while True:
+            requete = self._file.get()
+            if requete is None:
+                return
+            lot, taille = [requete], len(requete.tokens)
+            limite = timeit.default_timer() + self._max_wait
+            arret = False
+            while taille < self._max_batch_tokens:
+                attente = limite - timeit.default_timer()
+                try:
+                    requete = self._file.get(timeout=attente) if attente > 0 else self._file.get_nowait()
+                except queue.Empty:
+                    break
+                if requete is None:
+                    arret = True
+                    break
+                lot.append(requete)
+                taille += len(requete.tokens)
+            self._traite(lot)
+            if arret:
+                return
+
+    def _traite(self, lot):
+        """ Lemmatise un micro-lot, en un appel à lemmatise_batch() par valeur de pos
+
+        :param lot: Requêtes du lot
+        :type lot: list of _Requete
+        """
+        debut = timeit.default_timer()
+        types = 0
+        for pos in (False, True):
+            requetes = [requete for requete in lot if requete.pos == pos]
+            if not requetes:
+                continue
+            try:
+                resultats, stats = self._lemmatiseur.lemmatise_batch(
+                    [token for requete in requetes for token in requete.tokens], pos=pos, with_stats=True
+                )
+                types += stats["types"]
+            except Exception as E:
+                resultats = None
+                for requete in requetes:
+                    requete.erreur = E
+            position = 0
+            for requete in requetes:
+                if resultats is not None:
+                    requete.resultats = resultats[position:position + len(requete.tokens)]
+                    position += len(requete.tokens)
+                requete.fini.set()
+        with self._verrou:
+            compteurs = self._compteurs
+            compteurs["batches"] += 1
+            compteurs["requests"] += len(lot)
+            compteurs["tokens"] += sum(len(requete.tokens) for requete in lot)
+            compteurs["types"] += types
+            compteurs["errors"] += sum(1 for requete in lot if requete.erreur is not None)
+            compteurs["busy_time"] += timeit.default_timer() - debut
+
+    def metrics(self):
+        """ Statistiques du serveur : nombre de requêtes, de mots, de formes distinctes analysées et de lots,
+        débit depuis le démarrage et pendant la lemmatisation, percentiles de latence des dernières requêtes
+        (en millisecondes) et statistiques du cache du lemmatiseur
+
+        :rtype: dict
+        """
+        with self._verrou:
+            metrics = dict(self._compteurs)
+            latences = sorted(self._latences)
+        duree = timeit.default_timer() - self._debut
+        metrics["uptime"] = duree
+        metrics["tokens_per_second"] = metrics["tokens"] / duree
+        metrics["tokens_per_busy_second"] = metrics["tokens"] / metrics["busy_time"] if metrics["busy_time"] else 0.0
+        metrics["tokens_per_batch"] = metrics["tokens"] / metrics["batches"] if metrics["batches"] else 0.0
+        metrics["latency_ms"] = {
+            "p{}".format(centile): latences[min(len(latences) - 1, int(len(latences) * centile / 100))] * 1000
+            for centile in (50, 90, 99)
+        } if latences else {}
+        metrics["cache"] = self._lemmatiseur.cache_info()
+        return metrics
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """ Requêtes HTTP du serveur de lemmatisation """
+    server_version = "pycollatinus"
+
+    def _reponse(self, code, contenu):
+        corps = json.dumps(contenu, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._reponse(200, self.server.batcher.metrics())
+        elif self.path == "/health":
+            self._reponse(200, {"status": "ok"})
+        else:
+            self._reponse(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/lemmatise":
+            self._reponse(404, {"error": "Not found"})
+            return
+        try:
+            requete = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8"))
+            pos = bool(requete.get("pos", False))
+            if "token" in requete:
+                tokens = [str(requete["token"])]
+            elif "tokens" in requete:
+                if not isinstance(requete["tokens"], list):
+                    raise ValueError("tokens must be a list of strings")
+                tokens = [str(token) for token in requete["tokens"]]
+            elif "text" in requete:
+                tokens = list(iter_tokens([str(requete["text"])]))
+            else:
+                raise ValueError("Expected one of text, tokens or token")
+        except (ValueError, AttributeError, TypeError) as E:
+            self._reponse(400, {"error": str(E)})
+            return
+        try:
+            resultats = self.server.batcher.lemmatise(tokens, pos=pos)
+        except Exception as E:
+            self._reponse(500, {"error": str(E)})
+            return
+        if "token" in requete:
+            self._reponse(200, {"result": resultats[0]})
+        else:
+            self._reponse(200, {"results": resultats})
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super(_Handler, self).log_message(format, *args)
+
+
+class LemmatisationServer(ThreadingMixIn, HTTPServer):
+    """ Serveur HTTP/JSON de lemmatisation, voir le module pycollatinus.serve
+
+    :param address: Couple (hôte, port)
+    :param lemmatiseur: Lemmatiseur chargé (Default : None, un Lemmatiseur est chargé avec un cache de 100000 formes)
+    :param max_batch_tokens: Nombre de mots au-delà duquel un lot est lancé sans attendre
+    :param max_wait: Attente maximale des requêtes suivantes d'un lot, en secondes
+    :param quiet: N'affiche pas chaque requête
+    """
+    daemon_threads = True
+
+    def __init__(self, address, lemmatiseur=None, max_batch_tokens=5000, max_wait=0.005, quiet=False):
+        if lemmatiseur is None:
+            lemmatiseur = Lemmatiseur(cache_size=100000)
+        self.lemmatiseur = lemmatiseur
+        self.quiet = quiet
+        # Le thread des lots n'est lancé qu'une fois le port ouvert : HTTPServer appelle server_close() et lève
+        # une exception si l'ouverture échoue
+        self.batcher = None
+        super(LemmatisationServer, self).__init__(address, _Handler)
+        self.batcher = MicroBatcher(lemmatiseur, max_batch_tokens=max_batch_tokens, max_wait=max_wait)
+
+    def server_close(self):
+        super(LemmatisationServer, self).server_close()
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description="Local HTTP/JSON lemmatisation server")
+    arguments.add_argument("--host", default="127.0.0.1")
+    arguments.add_argument("--port", type=int, default=8080)
+    arguments.add_argument("--path", help="Lemmatiseur compiled by Lemmatiseur.compile() to load")
+    arguments.add_argument("--cache-size", type=int, default=100000, help="Number of forms kept in the LRU cache")
+    arguments.add_argument("--max-batch-tokens", type=int, default=5000)
+    arguments.add_argument("--max-wait", type=float, default=5, help="Micro-batch collection time, in milliseconds")
+    arguments.add_argument("--quiet", action="store_true", help="Do not log each request")
+    args = arguments.parse_args(argv)
+
+    if args.path:
+        lemmatiseur = Lemmatiseur.load(args.path, cache_size=args.cache_size)
+    else:
+        lemmatiseur = Lemmatiseur(cache_size=args.cache_size or None)
+    server = LemmatisationServer(
+        (args.host, args.port), lemmatiseur, max_batch_tokens=args.max_batch_tokens, max_wait=args.max_wait / 1000,
+        quiet=args.quiet
+    )
+    print("Serving on http://{}:{}".format(*server.server_address[:2]), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
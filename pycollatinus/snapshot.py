@@ -0,0 +1,492 @@
+""" Format binaire des lemmatiseurs compilés
+
+Un instantané est constitué d'un en-tête (signature, version du format, boutisme), des options de chargement du
+lemmatiseur, puis de sections. Depuis la version 3, les options suivent l'en-tête dans toutes les versions du format :
+un lemmatiseur compilé dans une autre version peut être reconstruit avec les mêmes options.
+Chaque section est un tableau d'entiers (ou d'octets) précédé de son type et de sa taille :
+toutes les chaînes sont rangées une seule fois dans une table, et les objets du lexique
+(modèles, désinences, lemmes, radicaux, irréguliers) sont décrits par des tableaux d'entiers
+qui renvoient à cette table et aux numéros des autres objets.
+"""
+from array import array
+from itertools import accumulate
+import glob
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+
+from .error import SnapshotVersionError
+from .formes import IndexFormes
+from .irregs import Irreg
+from .lemme import Lemme, Radical
+from .modele import Desinence, Modele
+from .util import DefaultOrderedDict, LRUCache, pause_gc
+
+
+MAGIC = b"PYCOLLAT"
+VERSION = 3
+VERSION_OPTIONS = 3  # Première version dont l'en-tête est suivi des options
+
+_ENTETE = struct.Struct("<8sIB")
+_OPTIONS = struct.Struct("<BBI")  # Extension, index des formes, taille du cache
+_SECTION = struct.Struct("<cQ")
+_BOUTISMES = {"little": 0, "big": 1}
+_EXTENSIONS = {False: 0, True: 1, "lazy": 2}
+
+# Champs des enregistrements de taille fixe
+_CHAMPS_MODELE = 4  # gr, grq, pos, père
+_CHAMPS_DESINENCE = 6  # grq, gr, morpho, numéro de radical, rareté, modèle
+_CHAMPS_LEMME = 10  # clé, gr, grq, modèle, homonymie, occurrences, indMorph, renvoi, origine, pos
+_CHAMPS_RADICAL = 4  # grq, gr, numéro, lemme
+_CHAMPS_IRREG = 4  # grq, gr, exclusif, lemme
+
+
+def default_cache_dir():
+    """ Dossier du cache des instantanés : $PYCOLLATINUS_CACHE, sinon $XDG_CACHE_HOME/pycollatinus
+    ou ~/.cache/pycollatinus
+
+    :rtype: str
+    """
+    if os.environ.get("PYCOLLATINUS_CACHE"):
+        return os.environ["PYCOLLATINUS_CACHE"]
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache, "pycollatinus")
+
+
+def cache_path(directory, data_directory, **options):
+    """ Chemin de l'instantané d'un lemmatiseur dans le cache. Le nom du fichier dépend du contenu
+    des fichiers de données, de la version de pycollatinus, de celle du format et des options de chargement :
+    un instantané périmé n'est jamais relu.
+
+    :param directory: Dossier du cache
+    :param data_directory: Dossier des données de Collatinus
+    :param options: Options qui changent le contenu du lemmatiseur
+    :rtype: str
+    """
+    from . import __version__
+    empreinte = hashlib.sha256()
+    empreinte.update("{}|{}|{}".format(__version__, VERSION, sorted(options.items())).encode("utf-8"))
+    fichiers = glob.glob(os.path.join(data_directory, "*.la")) + glob.glob(os.path.join(data_directory, "morphos.*"))
+    for fichier in sorted(fichiers):
+        empreinte.update(os.path.basename(fichier).encode("utf-8"))
+        with open(fichier, "rb") as f:
+            empreinte.update(hashlib.sha256(f.read()).digest())
+    return os.path.join(directory, "lemmatiseur-{}.snapshot".format(empreinte.hexdigest()[:32]))
+
+
+def write_atomic(lemmatiseur, path):
+    """ Écrit l'instantané dans un fichier temporaire, renommé une fois complet : un autre processus
+    ne lit jamais un instantané à moitié écrit.
+
+    :param lemmatiseur: Lemmatiseur à enregistrer
+    :param path: Chemin de l'instantané
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descripteur, temporaire = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(descripteur, "wb") as file:
+            write(lemmatiseur, file)
+        os.chmod(temporaire, 0o644)
+        os.replace(temporaire, path)
+    except BaseException:
+        os.remove(temporaire)
+        raise
+
+
+def est_snapshot(path):
+    """ Vérifie si le fichier est un instantané
+
+    :param path: Chemin du fichier
+    :type path: str
+    :rtype: bool
+    """
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_options(path):
+    """ Options de chargement d'un instantané, lues dans toutes les versions du format depuis VERSION_OPTIONS
+
+    :param path: Chemin de l'instantané
+    :type path: str
+    :return: Options du constructeur de Lemmatiseur (extension, index_formes, cache_size), None si l'instantané
+        est d'une version antérieure
+    :rtype: dict
+    """
+    with open(path, "rb") as f:
+        donnees = f.read(_ENTETE.size + _OPTIONS.size)
+    magic, version, _ = _ENTETE.unpack_from(donnees)
+    if magic != MAGIC:
+        raise ValueError("Not a pycollatinus snapshot")
+    if version < VERSION_OPTIONS:
+        return None
+    return _options(donnees)
+
+
+def _options(donnees):
+    extension, index, taille_cache = _OPTIONS.unpack_from(donnees, _ENTETE.size)
+    return {
+        "extension": next(valeur for valeur, code in _EXTENSIONS.items() if code == extension),
+        "index_formes": bool(index),
+        "cache_size": taille_cache or None
+    }
+
+
+class _Numeroteur(object):
+    """ Attribue un numéro à chaque objet, dans l'ordre de première rencontre """
+    def __init__(self):
+        self.objets = []
+        self._numeros = {}  # id(objet) -> int
+
+    def __call__(self, objet):
+        if objet is None:
+            return -1
+        numero = self._numeros.get(id(objet))
+        if numero is None:
+            numero = self._numeros[id(objet)] = len(self.objets)
+            self.objets.append(objet)
+        return numero
+
+
+class _Chaines(object):
+    """ Table des chaînes """
+    def __init__(self):
+        self.chaines = []
+        self._numeros = {}  # str -> int
+
+    def __call__(self, chaine):
+        if chaine is None:
+            return -1
+        numero = self._numeros.get(chaine)
+        if numero is None:
+            if "\x00" in chaine:
+                raise ValueError("Snapshot strings cannot contain NUL characters")
+            numero = self._numeros[chaine] = len(self.chaines)
+            self.chaines.append(chaine)
+        return numero
+
+
+def _aplatir(listes):
+    """ Range une liste de listes d'entiers dans deux tableaux : longueurs et valeurs
+
+    :rtype: (array, array)
+    """
+    longueurs, valeurs = array("i"), array("i")
+    for liste in listes:
+        longueurs.append(len(liste))
+        valeurs.extend(liste)
+    return longueurs, valeurs
+
+
+def _deplier(longueurs, valeurs):
+    """ Inverse de _aplatir
+
+    :param longueurs: Longueurs des listes
+    :type longueurs: list of int
+    :param valeurs: Valeurs des listes mises bout à bout
+    :type valeurs: list of int
+    :rtype: list of list of int
+    """
+    listes, debut = [], 0
+    for fin in accumulate(longueurs):
+        listes.append(valeurs[debut:fin])
+        debut = fin
+    return listes
+
+
+def write(lemmatiseur, file):
+    """ Écrit l'instantané d'un lemmatiseur chargé
+
+    :param lemmatiseur: Lemmatiseur à enregistrer
+    :type lemmatiseur: pycollatinus.lemmatiseur.Lemmatiseur
+    :param file: Fichier ouvert en écriture binaire
+    """
+    s = _Chaines()
+    modeles, desinences, lemmes, radicaux, irregs = (_Numeroteur() for _ in range(5))
+    sections = []
+
+    def paires(dictionnaire, cle, valeur):
+        tableau = array("i")
+        for k, v in dictionnaire.items():
+            tableau.append(cle(k))
+            tableau.append(valeur(v))
+        return tableau
+
+    def listes(dictionnaire, numeroteur):
+        return paires(dictionnaire, s, len), array("i", [numeroteur(x) for v in dictionnaire.values() for x in v])
+
+    # Tables du lemmatiseur. Les numéros des objets sont attribués au fil du parcours,
+    # leurs enregistrements sont écrits ensuite.
+    sections.append(paires(lemmatiseur._modeles, s, modeles))
+    sections.append(paires(lemmatiseur._lemmes, s, lemmes))
+    sections.extend(listes(lemmatiseur._radicaux, radicaux))
+    sections.extend(listes(lemmatiseur._desinences, desinences))
+    sections.extend(listes(lemmatiseur._irregs, irregs))
+    for dictionnaire in (lemmatiseur._assims, lemmatiseur._assimsq, lemmatiseur._contractions,
+                         lemmatiseur._variables):
+        sections.append(paires(dictionnaire, s, s))
+    morphos = array("i")
+    for langue, table in lemmatiseur._morphos.items():
+        for numero, morpho in table.items():
+            morphos.extend((s(langue), numero, s(morpho)))
+    sections.append(morphos)
+
+    # Les irréguliers et les radicaux peuvent faire connaître de nouveaux lemmes, les lemmes
+    # de nouveaux radicaux, irréguliers et modèles : on parcourt jusqu'à épuisement.
+    # Chaque objet reçoit un tuple de champs, ses listes sont rangées dans l'ordre des objets.
+    enregistrements = {numeroteur: [] for numeroteur in (modeles, desinences, lemmes, radicaux, irregs)}
+    modele_morphos, desinences_morpho, modele_absents, modele_generateurs = [], [], [], []
+    modele_suffixes, suffixes = [], []
+    lemme_radicaux, radicaux_lemme, lemme_irregs, lemme_exclusions, irreg_morphos = [], [], [], [], []
+    termine = False
+    while not termine:
+        termine = True
+        for numeroteur in (irregs, radicaux, lemmes, modeles, desinences):
+            faits = enregistrements[numeroteur]
+            while len(faits) < len(numeroteur.objets):
+                termine = False
+                objet = numeroteur.objets[len(faits)]
+                if numeroteur is irregs:
+                    faits.append((s(objet._grq), s(objet._gr), int(objet._exclusif), lemmes(objet._lemme)))
+                    irreg_morphos.append(objet._morphos)
+                elif numeroteur is radicaux:
+                    faits.append((s(objet._grq), s(objet._gr), objet._numero, lemmes(objet._lemme)))
+                elif numeroteur is lemmes:
+                    faits.append((
+                        s(objet._cle), s(objet._gr), s(objet._grq), modeles(objet._modele), objet._nh, objet._nbOcc,
+                        s(objet._indMorph), s(objet._renvoi), objet._origin, s(objet._pos)
+                    ))
+                    lemme_radicaux.append([numero for numero in objet._radicaux])
+                    radicaux_lemme.extend([radicaux(r) for r in liste] for liste in objet._radicaux.values())
+                    lemme_irregs.append([irregs(irr) for irr in objet._irregs])
+                    lemme_exclusions.append(objet._morphosIrrExcl)
+                elif numeroteur is modeles:
+                    faits.append((s(objet._gr), s(objet._grq), s(objet._pos), modeles(objet._pere)))
+                    modele_morphos.append([morpho for morpho in objet._desinences])
+                    desinences_morpho.extend([desinences(d) for d in liste] for liste in objet._desinences.values())
+                    modele_absents.append(objet._absents)
+                    modele_generateurs.append(
+                        [x for numero, gen in objet._genRadicaux.items() for x in (numero, s(gen))]
+                    )
+                    modele_suffixes.append([s(suffixe) for suffixe in objet.msuff])
+                    suffixes.extend(objet.msuff.values())
+                else:
+                    faits.append((s(objet._grq), s(objet._gr), objet._morpho, objet._numR, objet._rarete,
+                                  modeles(objet._modele)))
+
+    for numeroteur in (modeles, desinences, lemmes, radicaux, irregs):
+        sections.append(array("i", [champ for faits in enregistrements[numeroteur] for champ in faits]))
+    for listes_entiers in (modele_morphos, desinences_morpho, modele_absents, modele_generateurs, modele_suffixes,
+                           suffixes,
+                           lemme_radicaux, radicaux_lemme, lemme_irregs, lemme_exclusions, irreg_morphos):
+        sections.extend(_aplatir(listes_entiers))
+
+    # Index des formes
+    index = lemmatiseur._index_formes
+    if index is None:
+        sections.append(array("i"))
+    else:
+        sections.append(array("i", [radicaux(r) for r in index._radicaux] + [desinences(d) for d in index._desinences]))
+        sections.extend((
+            array("i", [len(index._radicaux)]), array("d", [index._duree]),
+            index._premiers_arcs, array("B", index._finals), index._arcs_caracteres, index._arcs_cibles,
+            index._arcs_rangs, index._debuts, index._analyses_radicaux, index._analyses_desinences
+        ))
+    if (len(enregistrements[radicaux]) < len(radicaux.objets) or
+            len(enregistrements[desinences]) < len(desinences.objets)):
+        raise ValueError("The forms index references objects unknown to the lemmatiseur")
+
+    taille_cache = lemmatiseur._cache.maxsize if lemmatiseur._cache is not None else 0
+    meta = array("i", [s(lemmatiseur._cible), int(lemmatiseur._debug)])
+    chaines = "\x00".join(s.chaines).encode("utf-8")
+
+    file.write(_ENTETE.pack(MAGIC, VERSION, _BOUTISMES[sys.byteorder]))
+    file.write(_OPTIONS.pack(_EXTENSIONS[lemmatiseur._extension], int(index is not None), taille_cache))
+    for section in [array("B", chaines), meta] + sections:
+        file.write(_SECTION.pack(section.typecode.encode("ascii"), len(section) * section.itemsize))
+        file.write(section.tobytes())
+
+
+def read(file, lemmatiseur):
+    """ Charge un instantané dans un lemmatiseur vide
+
+    :param file: Fichier ouvert en lecture binaire
+    :param lemmatiseur: Lemmatiseur créé avec load=False
+    :type lemmatiseur: pycollatinus.lemmatiseur.Lemmatiseur
+    :raises SnapshotVersionError: si l'instantané a été écrit dans une autre version du format
+    :return: Le lemmatiseur chargé
+    :rtype: pycollatinus.lemmatiseur.Lemmatiseur
+    """
+    with pause_gc():
+        return _read(file, lemmatiseur)
+
+
+def _read(file, lemmatiseur):
+    donnees = memoryview(file.read())
+    magic, version, boutisme = _ENTETE.unpack_from(donnees)
+    if magic != MAGIC:
+        raise ValueError("Not a pycollatinus snapshot")
+    if version != VERSION:
+        raise SnapshotVersionError(
+            "Snapshot format version {} is not supported (expected {})".format(version, VERSION)
+        )
+    inverser = boutisme != _BOUTISMES[sys.byteorder]
+    options = _options(donnees)
+    position = _ENTETE.size + _OPTIONS.size
+
+    def section():
+        nonlocal position
+        typecode, taille = _SECTION.unpack_from(donnees, position)
+        position += _SECTION.size
+        tableau = array(typecode.decode("ascii"))
+        tableau.frombytes(donnees[position:position + taille])
+        if inverser:
+            tableau.byteswap()
+        position += taille
+        return tableau
+
+    def entiers():
+        return section().tolist()
+
+    def listes():
+        return _deplier(entiers(), entiers())
+
+    chaines = section().tobytes().decode("utf-8").split("\x00")
+    chaines.append(None)  # Le numéro -1 désigne None
+    texte = chaines.__getitem__
+    cible, debug = entiers()
+    lemmatiseur._cible = chaines[cible]
+    lemmatiseur._debug = bool(debug)
+    lemmatiseur._cache = LRUCache(options["cache_size"]) if options["cache_size"] else None
+    lemmatiseur._extension = options["extension"]
+
+    table_modeles, table_lemmes = entiers(), entiers()
+    table_radicaux = entiers(), entiers()
+    table_desinences = entiers(), entiers()
+    table_irregs = entiers(), entiers()
+    dictionnaires = [entiers() for _ in range(4)]
+    morphos = entiers()
+    e_modeles, e_desinences, e_lemmes, e_radicaux, e_irregs = [entiers() for _ in range(5)]
+    (modele_morphos, desinences_morpho, modele_absents, modele_generateurs, modele_suffixes, suffixes,
+     lemme_radicaux, radicaux_lemme, lemme_irregs, lemme_exclusions, irreg_morphos) = [listes() for _ in range(11)]
+
+    # Création des objets, remplis ensuite : ils se référencent les uns les autres.
+    # Le numéro -1 désigne None.
+    nouveau = object.__new__
+    modeles = [nouveau(Modele) for _ in range(len(e_modeles) // _CHAMPS_MODELE)] + [None]
+    desinences = [nouveau(Desinence) for _ in range(len(e_desinences) // _CHAMPS_DESINENCE)]
+    lemmes = [nouveau(Lemme) for _ in range(len(e_lemmes) // _CHAMPS_LEMME)] + [None]
+    radicaux = [nouveau(Radical) for _ in range(len(e_radicaux) // _CHAMPS_RADICAL)] + [None]
+    irregs = [nouveau(Irreg) for _ in range(len(e_irregs) // _CHAMPS_IRREG)] + [None]
+
+    # Les listes de désinences et de suffixes sont rangées à la suite, modèle par modèle
+    desinences_morpho = iter(desinences_morpho)
+    suffixes = iter(suffixes)
+    for modele, gr, grq, pos, pere, morphos_modele, absents, generateurs, suffixes_modele in zip(
+            modeles, map(texte, e_modeles[0::4]), map(texte, e_modeles[1::4]), map(texte, e_modeles[2::4]),
+            e_modeles[3::4], modele_morphos, modele_absents, modele_generateurs, modele_suffixes):
+        modele._lemmatiseur = lemmatiseur
+        modele._gr = gr
+        modele._grq = grq
+        modele._pos = pos
+        modele._pere = modeles[pere]
+        modele._absents = absents
+        modele._genRadicaux = dict(zip(generateurs[0::2], map(texte, generateurs[1::2])))
+        modele._desinences = DefaultOrderedDict(list)
+        for morpho in morphos_modele:
+            modele._desinences[morpho] = [desinences[d] for d in next(desinences_morpho)]
+        modele.msuff = DefaultOrderedDict(list)
+        for suffixe in suffixes_modele:
+            modele.msuff[chaines[suffixe]] = next(suffixes)
+
+    for des, grq, gr, morpho, numero, rarete, modele in zip(
+            desinences, map(texte, e_desinences[0::6]), map(texte, e_desinences[1::6]), e_desinences[2::6],
+            e_desinences[3::6], e_desinences[4::6], e_desinences[5::6]):
+        des._grq = grq
+        des._gr = gr
+        des._morpho = morpho
+        des._numR = numero
+        des._rarete = rarete
+        des._modele = modeles[modele]
+
+    radicaux_lemme = iter(radicaux_lemme)
+    for (lemme, cle, gr, grq, modele, nh, nbOcc, indMorph, renvoi, origin, pos,
+         numeros, irregs_lemme, exclusions) in zip(
+            lemmes, map(texte, e_lemmes[0::10]), map(texte, e_lemmes[1::10]), map(texte, e_lemmes[2::10]),
+            e_lemmes[3::10], e_lemmes[4::10], e_lemmes[5::10], map(texte, e_lemmes[6::10]),
+            map(texte, e_lemmes[7::10]), e_lemmes[8::10], map(texte, e_lemmes[9::10]),
+            lemme_radicaux, lemme_irregs, lemme_exclusions):
+        lemme._lemmatiseur = lemmatiseur
+        lemme._cle = cle
+        lemme._gr = gr
+        lemme._grq = grq
+        lemme._modele = modeles[modele]
+        lemme._nh = nh
+        lemme._nbOcc = nbOcc
+        lemme._indMorph = indMorph
+        lemme._renvoi = renvoi
+        lemme._origin = origin
+        lemme._pos = pos
+        lemme._radicaux = {numero: [radicaux[r] for r in next(radicaux_lemme)] for numero in numeros}
+        lemme._irregs = [irregs[irr] for irr in irregs_lemme] or ()
+        lemme._morphosIrrExcl = exclusions or ()
+        lemme._paradigme = None
+
+    for rad, grq, gr, numero, lemme in zip(
+            radicaux, map(texte, e_radicaux[0::4]), map(texte, e_radicaux[1::4]), e_radicaux[2::4],
+            e_radicaux[3::4]):
+        rad._grq = grq
+        rad._gr = gr
+        rad._numero = numero
+        rad._lemme = lemmes[lemme]
+
+    for irr, grq, gr, exclusif, lemme, morphos_irreg in zip(
+            irregs, map(texte, e_irregs[0::4]), map(texte, e_irregs[1::4]), e_irregs[2::4], e_irregs[3::4],
+            irreg_morphos):
+        irr._lemmat = lemmatiseur
+        irr._grq = grq
+        irr._gr = gr
+        irr._exclusif = bool(exclusif)
+        irr._lemme = lemmes[lemme]
+        irr._morphos = morphos_irreg
+
+    # Tables du lemmatiseur
+    lemmatiseur._modeles = dict(zip(map(texte, table_modeles[0::2]), map(modeles.__getitem__, table_modeles[1::2])))
+    lemmatiseur._lemmes = dict(zip(map(texte, table_lemmes[0::2]), map(lemmes.__getitem__, table_lemmes[1::2])))
+    for (cles, numeros), objets, dictionnaire in (
+            (table_radicaux, radicaux, lemmatiseur._radicaux),
+            (table_desinences, desinences, lemmatiseur._desinences),
+            (table_irregs, irregs, lemmatiseur._irregs)):
+        for cle, liste in zip(map(texte, cles[0::2]), _deplier(cles[1::2], numeros)):
+            dictionnaire[cle] = [objets[n] for n in liste]
+    for dictionnaire, tableau in zip(
+            (lemmatiseur._assims, lemmatiseur._assimsq, lemmatiseur._contractions, lemmatiseur._variables),
+            dictionnaires):
+        dictionnaire.update(zip(map(texte, tableau[0::2]), map(texte, tableau[1::2])))
+    lemmatiseur._indexe_assims()
+    lemmatiseur._indexe_contractions()
+    lemmatiseur._morphos = {}
+    for langue, numero, morpho in zip(morphos[0::3], morphos[1::3], morphos[2::3]):
+        lemmatiseur._morphos.setdefault(chaines[langue], {})[numero] = chaines[morpho]
+
+    for cle, liste in lemmatiseur._desinences.items():
+        for des in liste:
+            lemmatiseur._indexe_desinence(cle, des)
+
+    # Index des formes
+    references = entiers()
+    if references:
+        nombre_radicaux = entiers()[0]
+        index = nouveau(IndexFormes)
+        index._radicaux = [radicaux[n] for n in references[:nombre_radicaux]]
+        index._desinences = [desinences[n] for n in references[nombre_radicaux:]]
+        index._duree = entiers()[0]
+        index._premiers_arcs = section()
+        index._finals = bytearray(section().tobytes())
+        index._arcs_caracteres, index._arcs_cibles, index._arcs_rangs = section(), section(), section()
+        index._debuts, index._analyses_radicaux, index._analyses_desinences = section(), section(), section()
+        lemmatiseur._index_formes = index
+    return lemmatiseur
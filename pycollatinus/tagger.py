@@ -0,0 +1,444 @@
+""" Désambiguïsation des analyses par un modèle de trigrammes de tags
+
+Le fichier data/tags.la de Collatinus donne le nombre d'occurrences de chaque tag et de chaque suite de trois tags
+dans les textes du LASLA. Un tag résume une analyse en trois caractères : la catégorie, puis le cas et le nombre
+des mots déclinés (n31 : nom à l'accusatif singulier, w62 : participe à l'ablatif pluriel), ou le mode et le présent
+des verbes (v11 : indicatif présent, v2 : subjonctif d'un autre temps). Le tag snt sépare les phrases.
+
+Chaque phrase est décodée par l'algorithme de Viterbi : la suite de tags retenue maximise le produit des probabilités
+des trigrammes et des probabilités de chaque tag pour chaque mot, estimées par le nombre d'occurrences des lemmes.
+Les phrases sont décodées par lots dans des tableaux NumPy, une position de toutes les phrases du lot à la fois.
+
+NumPy est nécessaire : pip install pycollatinus[tagger]
+"""
+import math
+import os
+import re
+
+from .lemmatiseur import SPACES
+from .traits import CATEGORIES, MASQUES_CATEGORIES, TRAITS, decompose
+from .util import lignesFichier
+
+try:
+    import numpy
+except ImportError:  # Dépendance optionnelle, signalée à la création d'un Tagger
+    numpy = None
+
+
+PHRASES = re.compile("[.;:!?]+")
+# Chiffre du cas, du nombre et du mode dans les tags : rang du trait dans sa catégorie, à partir de 1
+CHIFFRES = {
+    TRAITS[nom.lower()]: str(rang)
+    for categorie in ("case", "number", "mood") for rang, nom in enumerate(CATEGORIES[categorie], 1)
+}
+# Modes des tags v : indicatif, subjonctif, impératif et infinitif
+MODES_CONJUGUES = TRAITS["indicatif"] | TRAITS["subjonctif"] | TRAITS["impératif"] | TRAITS["infinitif"]
+FIN = "snt"  # Fin de phrase
+INCONNU = "x  "  # Mot sans analyse
+
+
+def tags(pos, features):
+    """ Tags de Collatinus d'une analyse, un par catégorie du lemme
+
+    :param pos: Catégories du lemme, une lettre chacune
+    :type pos: str
+    :param features: Masque des traits de la morphologie, voir pycollatinus.traits
+    :type features: int
+    :rtype: list of str
+    """
+    resultats = []
+    for p in pos or "x":
+        if p in "napm":
+            if features & TRAITS["locatif"]:
+                resultats.append(p + "71")
+            else:
+                resultats.append(_cas_nombre(p, features))
+        elif p == "v":
+            if features & (TRAITS["participe"] | TRAITS["adjectif verbal"]):
+                resultats.append(_cas_nombre("w", features))
+            elif features & (TRAITS["gérondif"] | TRAITS["supin"]):
+                resultats.append(_cas_nombre("w", features | TRAITS["singulier"]))
+            else:
+                mode = _chiffre(features & MODES_CONJUGUES)
+                if mode:
+                    resultats.append("v" + mode + ("1" if features & TRAITS["présent"] else " "))
+                else:
+                    resultats.append("v0 ")
+        else:
+            resultats.append(p + "  ")
+    return resultats
+
+
+def _chiffre(traits):
+    """ Chiffre du premier trait d'un masque, None s'il est vide """
+    if not traits:
+        return None
+    return CHIFFRES[traits & -traits]
+
+
+def _cas_nombre(p, features):
+    cas = _chiffre(features & MASQUES_CATEGORIES["case"])
+    nombre = _chiffre(features & MASQUES_CATEGORIES["number"])
+    if not cas or not nombre:
+        return p + "8 "
+    return p + cas + nombre
+
+
+def _caracteristiques(analyse):
+    """ Catégories, masque des traits de la morphologie et nombre d'occurrences du lemme d'une analyse,
+    enregistrement Analyse ou dictionnaire renvoyé avec pos=True
+
+    :rtype: tuple
+    """
+    if isinstance(analyse, dict):
+        lemme = analyse["lemma"]
+        pos = analyse.get("pos")
+        if pos is None:
+            if not hasattr(lemme, "pos"):
+                raise ValueError("Dictionaries need the POS of their analysis : lemmatise them with pos=True")
+            pos = lemme.pos()
+        # Masque ajouté par with_features=True, sinon calculé depuis la morphologie en toutes lettres
+        features = analyse.get("features")
+        if features is None:
+            features = decompose(analyse["morph"])
+    else:
+        lemme, pos, features = analyse.lemme, analyse.pos, analyse.features
+    if hasattr(lemme, "lemme"):  # Forme irrégulière
+        lemme = lemme.lemme()
+    return pos, features, lemme.nbOcc() if hasattr(lemme, "nbOcc") else 0
+
+
+class Tagger(object):
+    """ Choix de l'analyse de chaque mot d'une phrase par un modèle de trigrammes de tags, voir le module
+    pycollatinus.tagger
+
+    :param lemmatiseur: Lemmatiseur utilisé par tag() (Default : None, un Lemmatiseur est chargé à la première
+        utilisation de tag())
+    :type lemmatiseur: pycollatinus.lemmatiseur.Lemmatiseur
+    :param path: Chemin du fichier des tags (Default : None, data/tags.la)
+    :type path: str
+    :param smoothing: Poids de la probabilité d'ordre inférieur dans le lissage des bigrammes et des trigrammes
+    :type smoothing: float
+    :param batch_size: Nombre maximal de valeurs calculées pour une position d'un lot de phrases
+    :type batch_size: int
+    """
+    def __init__(self, lemmatiseur=None, path=None, smoothing=1.0, batch_size=2 ** 18):
+        if numpy is None:
+            raise ImportError("The tagger needs NumPy : pip install pycollatinus[tagger]")
+        self._lemmatiseur = lemmatiseur
+        self._batch_size = batch_size
+        self._tags_analyses = {}  # (pos, masque des traits) -> indices des tags
+        self.tags = []
+        self._indices = {}
+        self._charge(path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tags.la"), smoothing)
+
+    def _indice(self, tag):
+        """ Indice d'un tag, ajouté à la liste des tags s'il est nouveau """
+        if tag not in self._indices:
+            self._indices[tag] = len(self.tags)
+            self.tags.append(tag)
+        return self._indices[tag]
+
+    def _charge(self, chemin, lissage):
+        """ Charge les nombres d'occurrences et calcule le tableau des log-probabilités des trigrammes
+
+        self._trigrammes[a, b, c] est le logarithme de P(c | a, b). Le dernier indice, self._vide, ne désigne pas un
+        tag : il précède le snt du début de chaque phrase, pour la probabilité du premier tag, et complète les phrases
+        plus courtes que les autres dans un lot, avec une probabilité de 1.
+        """
+        unigrammes, debuts, trigrammes = {}, {}, {}
+        for ligne in lignesFichier(chemin):
+            cle, _, nombre = ligne.rpartition(",")
+            if len(cle) > 7:
+                cle = (self._indice(cle[0:3]), self._indice(cle[4:7]), self._indice(cle[8:11].ljust(3)))
+                trigrammes[cle] = trigrammes.get(cle, 0) + int(nombre)
+            elif len(cle) > 3:
+                # Bigrammes du début et de la fin des phrases : seuls les premiers ne sont pas dans les trigrammes
+                if cle.startswith(FIN):
+                    debuts[self._indice(cle[4:7].ljust(3))] = int(nombre)
+            else:
+                unigrammes[self._indice(cle.ljust(3))] = int(nombre)
+        self._inconnu = self._indice(INCONNU)
+        self._fin = self._indice(FIN)
+
+        n = len(self.tags)
+        u = numpy.zeros(n)
+        for indice, nombre in unigrammes.items():
+            u[indice] = nombre
+        d = numpy.zeros(n)
+        for indice, nombre in debuts.items():
+            d[indice] = nombre
+        c = numpy.zeros((n, n, n))
+        for (a, b, t), nombre in trigrammes.items():
+            c[a, b, t] = nombre
+        # Lissage par interpolation : P(c | a, b) = (N(a b c) + k.P(c | b)) / (N(a b) + k), de même pour P(c | b)
+        p1 = (u + 1) / (u.sum() + n)
+        bigrammes = c.sum(axis=0)
+        p2 = (bigrammes + lissage * p1[None, :]) / (bigrammes.sum(axis=1, keepdims=True) + lissage)
+        p3 = (c + lissage * p2[None, :, :]) / (c.sum(axis=2, keepdims=True) + lissage)
+
+        self._vide = n
+        self._trigrammes = numpy.zeros((n + 1, n + 1, n + 1))
+        self._trigrammes[:n, :n, :n] = numpy.log(p3)
+        self._trigrammes[n, self._fin, :n] = numpy.log((d + lissage * p2[self._fin]) / (d.sum() + lissage))
+
+    def _tags_analyse(self, analyse):
+        """ Indices des tags d'une analyse et nombre d'occurrences de son lemme """
+        pos, features, occurrences = _caracteristiques(analyse)
+        cle = (pos, features)
+        indices = self._tags_analyses.get(cle)
+        if indices is None:
+            indices = self._tags_analyses[cle] = [self._indices.get(tag, self._inconnu)
+                                                  for tag in tags(pos, features)]
+        return indices, occurrences
+
+    def _candidats(self, analyses):
+        """ Tags possibles d'un mot et logarithme de leur probabilité, estimée par le nombre d'occurrences des lemmes
+        de ses analyses
+
+        :return: Indices des tags, log-probabilités, puis rangs dans les tags du mot des tags de chaque analyse et
+            nombre d'occurrences de son lemme
+        :rtype: tuple
+        """
+        if not analyses:
+            return [self._inconnu], [0.0], []
+        rangs_tags, poids = {}, []  # Rang de chaque tag du mot, poids de chaque tag
+        analyses_tags = []
+        for analyse in analyses:
+            indices, occurrences = self._tags_analyse(analyse)
+            rangs = []
+            for indice in indices:
+                rang = rangs_tags.setdefault(indice, len(poids))
+                if rang == len(poids):
+                    poids.append(0)
+                poids[rang] += (occurrences + 1) / len(indices)
+                rangs.append(rang)
+            analyses_tags.append((rangs, occurrences))
+        total = sum(poids)
+        return list(rangs_tags), [math.log(valeur / total) for valeur in poids], analyses_tags
+
+    def _lots(self, phrases):
+        """ Regroupe les phrases de longueurs proches en lots dont aucune position ne dépasse self._batch_size
+        valeurs
+
+        :param phrases: Candidats de chaque mot de chaque phrase
+        :yield: Indices des phrases de chaque lot
+        """
+        ordre = sorted(range(len(phrases)), key=lambda i: len(phrases[i]))
+        lot, largeur = [], 1
+        for i in ordre:
+            largeur_phrase = max(len(candidats[0]) for candidats in phrases[i])
+            nouvelle_largeur = max(largeur, largeur_phrase)
+            if lot and (len(lot) + 1) * nouvelle_largeur ** 3 > self._batch_size:
+                yield lot
+                lot, nouvelle_largeur = [], largeur_phrase
+            lot.append(i)
+            largeur = nouvelle_largeur
+        if lot:
+            yield lot
+
+    def _viterbi(self, phrases, maximums=False):
+        """ Décode un lot de phrases
+
+        Chaque phrase est précédée du vide et de snt et suivie de snt, puis complétée par le vide jusqu'à la longueur
+        de la plus longue. Pour chaque position p, delta[b, j, k] est le score du meilleur chemin de la phrase b qui
+        se termine par les candidats j en p - 1 et k en p.
+
+        :param phrases: Candidats de chaque mot de chaque phrase, comme renvoyés par _candidats()
+        :param maximums: Calcule aussi le score du meilleur chemin qui passe par chaque candidat de chaque mot
+        :return: Rang du candidat retenu pour chaque mot de chaque phrase, puis pour chaque phrase et chaque mot la
+            différence entre le score de chaque candidat et celui du meilleur chemin, si maximums est vrai
+        :rtype: tuple
+        """
+        vide, fin, trigrammes = self._vide, self._fin, self._trigrammes
+        b = len(phrases)
+        longueur = max(len(phrase) for phrase in phrases) + 3
+        lignes, positions, rangs, tags_mots, logs = [], [], [], [], []
+        for ligne, phrase in enumerate(phrases):
+            for position, (tags_mot, logs_mot, _) in enumerate(phrase, 2):
+                n = len(tags_mot)
+                lignes += [ligne] * n
+                positions += [position] * n
+                rangs += range(n)
+                tags_mots += tags_mot
+                logs += logs_mot
+        largeur = max(rangs) + 1
+        candidats = numpy.full((b, longueur, largeur), vide)
+        emissions = numpy.full((b, longueur, largeur), -numpy.inf)
+        candidats[lignes, positions, rangs] = tags_mots
+        emissions[lignes, positions, rangs] = logs
+        # Hors des mots, un seul candidat : snt avant et après chaque phrase, le vide ailleurs
+        longueurs = numpy.array([len(phrase) for phrase in phrases])
+        index = numpy.arange(longueur)[None, :]
+        hors_mots = (index < 2) | (index >= longueurs[:, None] + 2)
+        candidats[:, :, 0][hors_mots] = vide
+        candidats[:, 1, 0] = fin
+        candidats[numpy.arange(b), longueurs + 2, 0] = fin
+        emissions[:, :, 0][hors_mots] = 0
+        largeurs = numpy.isfinite(emissions).sum(axis=2).max(axis=0)
+        candidats = [candidats[:, position, :largeurs[position]] for position in range(longueur)]
+        emissions = [emissions[:, position, :largeurs[position]] for position in range(longueur)]
+
+        delta = numpy.zeros((b, 1, 1))
+        deltas, retours, couts = [None, delta], [None, None], [None, None]
+        for position in range(2, longueur):
+            cout = trigrammes[
+                candidats[position - 2][:, :, None, None],
+                candidats[position - 1][:, None, :, None],
+                candidats[position][:, None, None, :]
+            ] + emissions[position][:, None, None, :]
+            scores = delta[:, :, :, None] + cout
+            retour = scores.argmax(axis=1)
+            delta = numpy.take_along_axis(scores, retour[:, None], axis=1)[:, 0]
+            deltas.append(delta)
+            retours.append(retour)
+            couts.append(cout)
+
+        # Meilleur chemin, en remontant depuis la dernière position
+        lignes = numpy.arange(b)
+        chemin = numpy.zeros((longueur, b), dtype=int)
+        meilleurs = delta.reshape(b, -1).argmax(axis=1)
+        chemin[-2], chemin[-1] = numpy.unravel_index(meilleurs, delta.shape[1:])
+        for position in range(longueur - 1, 2, -1):
+            chemin[position - 2] = retours[position][lignes, chemin[position - 1], chemin[position]]
+        choix = [chemin[2:len(phrase) + 2, ligne].tolist() for ligne, phrase in enumerate(phrases)]
+        if not maximums:
+            return choix, None
+
+        # Meilleur score des chemins qui passent par chaque candidat : chemins jusqu'à lui et chemins depuis lui
+        meilleur = delta.reshape(b, -1).max(axis=1)
+        ecarts = [None] * longueur
+        beta = numpy.zeros(delta.shape)
+        for position in range(longueur - 1, 1, -1):
+            ecarts[position] = (deltas[position] + beta).max(axis=1) - meilleur[:, None]
+            beta = (couts[position] + beta[:, None, :, :]).max(axis=3)
+        ecarts = [
+            [ecarts[position][ligne, :len(mot[0])].tolist() for position, mot in enumerate(phrase, 2)]
+            for ligne, phrase in enumerate(phrases)
+        ]
+        return choix, ecarts
+
+    def _decode(self, candidats, n_best):
+        """ Décode des phrases par lots
+
+        :param candidats: Candidats de chaque mot de chaque phrase, comme renvoyés par _candidats()
+        :param n_best: Calcule aussi les écarts au meilleur chemin de chaque candidat
+        :return: Choix et écarts de chaque phrase, comme renvoyés par _viterbi()
+        :rtype: list of tuple
+        """
+        resultats = [([], []) for _ in candidats]
+        phrases = [i for i, phrase in enumerate(candidats) if phrase]
+        for lot in self._lots([candidats[i] for i in phrases]):
+            lot = [phrases[i] for i in lot]
+            choix, ecarts = self._viterbi([candidats[i] for i in lot], maximums=bool(n_best))
+            for rang, i in enumerate(lot):
+                resultats[i] = (choix[rang], ecarts[rang] if ecarts else None)
+        return resultats
+
+    def disambiguate(self, sentences, n_best=None, beam=None):
+        """ Choisit les analyses de chaque mot de phrases lemmatisées
+
+        :param sentences: Phrases, chacune une liste des résultats de chaque mot tels que renvoyés par
+            Lemmatiseur.lemmatise_multiple() : enregistrements Analyse (as_dict=False) ou dictionnaires avec leur
+            POS (pos=True). Les dictionnaires ne donnent le nombre d'occurrences de leur lemme qu'avec
+            get_lemma_object=True : sans lui, toutes leurs analyses ont le même poids.
+        :type sentences: iterable of list of list
+        :param n_best: Nombre maximal d'analyses gardées pour chaque mot (Default : None, seule la meilleure
+            analyse est renvoyée)
+        :type n_best: int
+        :param beam: Avec n_best, écart maximal entre le logarithme du score de la meilleure analyse et celui des
+            analyses gardées
+        :type beam: float
+        :return: Pour chaque phrase, la meilleure analyse de chaque mot, None pour un mot inconnu, ou avec n_best
+            la liste de ses meilleures analyses, de la meilleure à la moins bonne
+        :rtype: list of list
+        """
+        sentences = [
+            [analyses if isinstance(analyses, list) else list(analyses) for analyses in sentence]
+            for sentence in sentences
+        ]
+        # Les occurrences d'un même mot partagent souvent la même liste, comme avec lemmatise_batch()
+        memoire = {}
+        candidats = []
+        for sentence in sentences:
+            phrase = []
+            for analyses in sentence:
+                mot = memoire.get(id(analyses))
+                if mot is None:
+                    mot = memoire[id(analyses)] = self._candidats(analyses)
+                phrase.append(mot)
+            candidats.append(phrase)
+        resultats = []
+        for sentence, phrase, (choix, ecarts) in zip(sentences, candidats, self._decode(candidats, n_best)):
+            if not n_best:
+                resultats.append([
+                    _meilleure(analyses, mot[2], rang) for analyses, mot, rang in zip(sentence, phrase, choix)
+                ])
+            else:
+                resultats.append([
+                    _meilleures(analyses, mot[2], ecarts_mot, n_best, beam)
+                    for analyses, mot, ecarts_mot in zip(sentence, phrase, ecarts)
+                ])
+        return resultats
+
+    def tag(self, string, n_best=None, beam=None, pos=False, as_dict=True):
+        """ Lemmatise un texte et choisit les analyses de chaque mot, phrase par phrase
+
+        Les phrases sont séparées par la ponctuation forte : . ; : ! ?
+
+        :param string: Chaîne à lemmatiser
+        :param n_best: Nombre maximal d'analyses gardées pour chaque mot (Default : None, seule la meilleure
+            analyse est renvoyée)
+        :param beam: Avec n_best, écart maximal entre le logarithme du score de la meilleure analyse et celui des
+            analyses gardées
+        :param pos: Récupère la POS
+        :param as_dict: Retrieve dictionaries instead of Analyse records if set to true
+        :return: Meilleure analyse de chaque mot, ou liste de ses meilleures analyses, dans l'ordre du texte
+        :rtype: list
+        """
+        if self._lemmatiseur is None:
+            from .lemmatiseur import Lemmatiseur
+            self._lemmatiseur = Lemmatiseur()
+        phrases = [[mot for mot in SPACES.split(phrase) if mot] for phrase in PHRASES.split(string)]
+        resultats = self._lemmatiseur.lemmatise_batch(
+            [mot for phrase in phrases for mot in phrase], as_dict=False
+        )
+        sentences, debut = [], 0
+        for phrase in phrases:
+            sentences.append(resultats[debut:debut + len(phrase)])
+            debut += len(phrase)
+        resultats = [resultat for phrase in self.disambiguate(sentences, n_best, beam) for resultat in phrase]
+        if not as_dict:
+            return resultats
+        if not n_best:
+            return [analyse and analyse.to_dict(with_pos=pos) for analyse in resultats]
+        return [[analyse.to_dict(with_pos=pos) for analyse in analyses] for analyses in resultats]
+
+
+def _meilleure(analyses, analyses_tags, rang):
+    """ Analyse d'un mot qui a le tag retenu et dont le lemme est le plus fréquent
+
+    :param analyses: Analyses du mot
+    :param analyses_tags: Rangs des tags et nombre d'occurrences de chaque analyse, comme calculés par
+        Tagger._candidats()
+    :param rang: Rang du tag retenu
+    """
+    meilleure, occurrences = None, -1
+    for analyse, (rangs, nombre) in zip(analyses, analyses_tags):
+        if rang in rangs and nombre > occurrences:
+            meilleure, occurrences = analyse, nombre
+    return meilleure
+
+
+def _meilleures(analyses, analyses_tags, ecarts, n_best, beam=None):
+    """ Meilleures analyses d'un mot, classées par score de leur meilleur tag puis par fréquence de leur lemme
+
+    :param ecarts: Écarts au meilleur chemin du score de chaque tag du mot
+    :rtype: list
+    """
+    scores = sorted(
+        (-max(ecarts[rang] for rang in rangs), -nombre, index) for index, (rangs, nombre) in enumerate(analyses_tags)
+    )
+    if beam is not None and scores:
+        scores = [score for score in scores if score[0] <= scores[0][0] + beam]
+    return [analyses[index] for _, _, index in scores[:n_best]]
@@ -0,0 +1,104 @@
+""" Traits des morphologies de data/morphos.fr, codés en masques de bits
+
+Chaque morphologie est décomposée une fois en un entier dont chaque bit est un trait : cas, genre, nombre, personne,
+temps, mode, voix et degré. Les noms des traits sont ceux des chaînes de morphos.fr ("génitif", "pluriel",
+"futur antérieur"...), sans tenir compte de la casse.
+
+Un filtre est lui aussi un masque. Une morphologie lui correspond si elle a, pour chaque catégorie où le filtre
+demande des traits, l'un de ces traits : "génitif datif pluriel" accepte les génitifs et les datifs pluriels.
+"""
+from collections import OrderedDict
+
+
+CATEGORIES = OrderedDict([
+    ("case", ["nominatif", "vocatif", "accusatif", "génitif", "datif", "ablatif", "locatif"]),
+    ("gender", ["masculin", "féminin", "neutre"]),
+    ("number", ["singulier", "pluriel"]),
+    ("person", ["1ère", "2ème", "3ème"]),
+    ("tense", ["présent", "imparfait", "futur", "parfait", "PQP", "futur antérieur"]),
+    ("mood", ["indicatif", "subjonctif", "impératif", "infinitif", "participe", "gérondif", "adjectif verbal",
+              "supin"]),
+    ("voice", ["actif", "passif"]),
+    ("degree", ["positif", "comparatif", "superlatif"])
+])
+
+TRAITS = OrderedDict()  # Nom du trait en minuscules -> bit
+MASQUES_CATEGORIES = OrderedDict()  # Catégorie -> masque de ses traits
+for _categorie, _noms in CATEGORIES.items():
+    MASQUES_CATEGORIES[_categorie] = 0
+    for _nom in _noms:
+        TRAITS[_nom.lower()] = 1 << len(TRAITS)
+        MASQUES_CATEGORIES[_categorie] |= TRAITS[_nom.lower()]
+# Nom donné au plus-que-parfait dans la liste des traits de morphos.fr
+TRAITS["plus-que-parfait"] = TRAITS["pqp"]
+# Le supin en -um est un accusatif, le supin en -u un ablatif
+TRAITS["-um"] = TRAITS["accusatif"]
+TRAITS["-u"] = TRAITS["ablatif"]
+
+
+def decompose(morpho, strict=False):
+    """ Masque des traits d'une morphologie en toutes lettres
+
+    :param morpho: Morphologie, par exemple "génitif masculin pluriel"
+    :type morpho: str
+    :param strict: Lève une ValueError sur un mot qui n'est pas un trait, plutôt que de l'ignorer
+    :rtype: int
+    """
+    masque = 0
+    mots = morpho.lower().split()
+    i = 0
+    while i < len(mots):
+        # Traits en deux mots : futur antérieur, adjectif verbal
+        if i + 1 < len(mots) and mots[i] + " " + mots[i + 1] in TRAITS:
+            masque |= TRAITS[mots[i] + " " + mots[i + 1]]
+            i += 2
+            continue
+        if mots[i] in TRAITS:
+            masque |= TRAITS[mots[i]]
+        elif strict:
+            raise ValueError("Unknown morphological feature {}".format(mots[i]))
+        i += 1
+    return masque
+
+
+def masque(features):
+    """ Masque d'un filtre de traits
+
+    :param features: Masque, noms de traits séparés par des espaces ("génitif pluriel") ou liste de noms
+    :type features: int or str or iterable of str
+    :rtype: int
+    """
+    if isinstance(features, int):
+        return features
+    if isinstance(features, str):
+        return decompose(features, strict=True)
+    resultat = 0
+    for nom in features:
+        resultat |= decompose(nom, strict=True)
+    return resultat
+
+
+def accepte(traits, filtre):
+    """ Indique si une morphologie correspond à un filtre
+
+    :param traits: Masque de la morphologie
+    :type traits: int
+    :param filtre: Masque du filtre
+    :type filtre: int
+    :rtype: bool
+    """
+    for categorie in MASQUES_CATEGORIES.values():
+        demandes = filtre & categorie
+        if demandes and not traits & demandes:
+            return False
+    return True
+
+
+def noms(traits):
+    """ Noms des traits d'un masque, dans l'ordre des catégories
+
+    :param traits: Masque
+    :type traits: int
+    :rtype: list of str
+    """
+    return [nom for categorie in CATEGORIES.values() for nom in categorie if traits & TRAITS[nom.lower()]]
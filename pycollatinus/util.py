@@ -1,4 +1,6 @@
 from collections import OrderedDict, Callable
+from contextlib import contextmanager
+import gc
 from .ch import clean_double_diacritic
 
 
@@ -45,6 +47,77 @@ class DefaultOrderedDict(OrderedDict):
         return 'OrderedDefaultDict(%s, %s)' % (self.default_factory, OrderedDict.__repr__(self))
 
 
+class LRUCache(object):
+    """ Cache de taille bornée : au-delà de maxsize entrées, l'entrée utilisée le moins récemment est évincée.
+
+    Le cache compte les succès, les échecs et les évictions. Son contenu n'est pas conservé par pickle.
+
+    :param maxsize: Nombre maximal d'entrées
+    :type maxsize: int
+    """
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """ Renvoie la valeur enregistrée pour key et la marque comme la plus récemment utilisée
+
+        :param key: Clé
+        :param default: Valeur renvoyée en cas d'absence
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """ Enregistre value pour key, en évinçant si besoin l'entrée la plus anciennement utilisée
+
+        :param key: Clé
+        :param value: Valeur
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """ Vide le cache et remet les compteurs à zéro """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self):
+        """ Statistiques du cache
+
+        :rtype: dict
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __reduce__(self):
+        return type(self), (self.maxsize, )
+
+
 def lignesFichier(nf):
     """ L'ensemble de lignes du fichier qui ne sont ni vides ni commentées.
 
@@ -66,5 +139,19 @@ def lignesFichier(nf):
                 yield clean_double_diacritic(line)
 
 
+@contextmanager
+def pause_gc():
+    """ Suspend le ramasse-miettes : créer des centaines de milliers d'objets qui se référencent
+    les uns les autres le déclencherait sans cesse, pour ne rien libérer.
+    """
+    actif = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if actif:
+            gc.enable()
+
+
 def flatten(liste):
     return [x for y in liste for x in y]
\ No newline at end of file
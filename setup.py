@@ -1,6 +1,8 @@
 from setuptools import setup, find_packages
+import re
 
-version = "0.1.6"
+with open("pycollatinus/__init__.py") as f:
+    version = re.search("__version__ = \"(.*)\"", f.read()).group(1)
 
 setup(
     name='pycollatinus',
@@ -15,9 +17,15 @@ setup(
     install_requires=[
         "unidecode==0.4.21"
     ],
+    extras_require={
+        "tagger": ["numpy>=1.15"]
+    },
     test_requires=[
         "coverage==4.4.1"
     ],
+    entry_points={
+        "console_scripts": ["pycollatinus=pycollatinus.cli:main"]
+    },
     include_package_data=True,
     zip_safe=False
 )
@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipIf
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+from pycollatinus import Lemmatiseur
+from tests.util import ExtendedTestCase
+
+# pycollatinus.aio needs Python 3.5.2: this module does not use async and await, so that it can be imported before
+if sys.version_info >= (3, 5, 2):
+    from pycollatinus.aio import AsyncLemmatiseur, process_executor
+
+
+class Chunks(object):
+    """ Asynchronous iterable of text chunks, each one returned after a turn of the loop """
+    def __init__(self, *chunks):
+        self.chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        for chunk in self.chunks:
+            return asyncio.sleep(0, result=chunk)
+        end = asyncio.Future()
+        end.set_exception(StopAsyncIteration())
+        return end
+
+
+@skipIf(sys.version_info < (3, 5, 2), "pycollatinus.aio needs Python 3.5.2")
+class TestAsync(ExtendedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lemmatizer = Lemmatiseur()
+        cls.text = "Et flavescit haphe gravesque draucis mihi Romanorum cogito ergo sum"
+
+    def setUp(self):
+        # asyncio.run() only exists from Python 3.7
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def collect(self, iterable):
+        """ Results of an asynchronous iterable """
+        iterator, results = iterable.__aiter__(), []
+        while True:
+            try:
+                results.append(self.loop.run_until_complete(iterator.__anext__()))
+            except StopAsyncIteration:
+                return results
+
+    def test_alemmatise_multiple(self):
+        with ThreadPoolExecutor(1) as executor:
+            lemmatizer = AsyncLemmatiseur(self.lemmatizer, executor=executor, tokens_per_batch=3)
+            self.assertEqual(
+                self.loop.run_until_complete(lemmatizer.alemmatise_multiple(self.text, pos=True, chunk_size=7)),
+                self.lemmatizer.lemmatise_multiple(self.text, pos=True)
+            )
+
+    def test_alemmatise_stream(self):
+        lemmatizer = AsyncLemmatiseur(self.lemmatizer, tokens_per_batch=4, max_pending=2)
+        expected = self.lemmatizer.lemmatise_multiple(self.text)
+        self.assertEqual(
+            self.collect(lemmatizer.alemmatise_stream(
+                Chunks("Et flavescit haphe grave", "sque draucis mihi Romanorum ", "cogito ergo sum")
+            )),
+            expected
+        )
+        self.assertEqual(
+            self.collect(lemmatizer.alemmatise_stream(["Et flavescit haphe grave", "sque draucis mihi Romanorum ",
+                                                       "cogito ergo sum"])),
+            expected
+        )
+
+    def test_cancellation(self):
+        """ Batches which are not started when the coroutine is cancelled are never lemmatised """
+        lemmatizer = AsyncLemmatiseur(self.lemmatizer, tokens_per_batch=1)
+        batches = []
+
+        def lemmatise_batch(tokens, pos=False):
+            batches.append(tokens)
+            return [[] for _ in tokens]
+
+        with mock.patch.object(self.lemmatizer, "lemmatise_batch", side_effect=lemmatise_batch):
+            task = self.loop.create_task(lemmatizer.alemmatise_multiple(" ".join(["sum"] * 100)))
+            while not batches:
+                self.loop.run_until_complete(asyncio.sleep(0.001))
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                self.loop.run_until_complete(task)
+        self.assertLess(len(batches), 100)
+
+    def test_aclose(self):
+        """ Closing a stream cancels the batches which are not started """
+        lemmatizer = AsyncLemmatiseur(self.lemmatizer, tokens_per_batch=1, max_pending=4)
+        stream = lemmatizer.alemmatise_stream(["sum "] * 100)
+        self.assertEqual(self.loop.run_until_complete(stream.__anext__()), self.lemmatizer.lemmatise_multiple("sum")[0])
+        self.loop.run_until_complete(stream.aclose())
+        with self.assertRaises(StopAsyncIteration):
+            self.loop.run_until_complete(stream.__anext__())
+
+    def test_process_executor(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = self.lemmatizer.compile(path=os.path.join(directory, "compiled.snapshot"))
+        with process_executor(1, path=path) as executor:
+            lemmatizer = AsyncLemmatiseur(executor=executor, tokens_per_batch=3, max_pending=2)
+            self.assertEqual(
+                self.loop.run_until_complete(lemmatizer.alemmatise_multiple(self.text)),
+                self.lemmatizer.lemmatise_multiple(self.text)
+            )
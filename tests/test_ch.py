@@ -0,0 +1,58 @@
+from unittest import TestCase
+import os
+import re
+
+from unidecode import unidecode
+
+from pycollatinus import ch
+
+
+# Former implementations, which the table-driven ones must reproduce exactly
+def reference_atone(string, caps=True):
+    string = re.sub("[Ўў]", "y", string)
+    if caps is True:
+        return unidecode(string)
+    return "".join(char if char.isupper() else unidecode(char) for char in string)
+
+
+def reference_deramise(r):
+    for avant, apres in [('J', 'I'), ('j', 'i'), ('v', 'u'), ("æ", "ae"), ("Æ", "Ae"), ("œ", "oe"), ("Œ", "Oe"),
+                         ("ụ", 'u'), ('V', 'U')]:
+        r = r.replace(avant, apres)
+    return r
+
+
+class TestNormalisation(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        data = os.path.join(os.path.dirname(ch.__file__), "data")
+        mots = set()
+        for fichier in ("lemmes.la", "lem_ext.la", "irregs.la", "modeles.la"):
+            with open(os.path.join(data, fichier)) as f:
+                for ligne in f:
+                    mots.update(re.split("[|:,;= ]", ligne.strip()))
+        cls.mots = sorted(mots) + ["ЎўÆæŒœụ", "Ǆ中ёß😀", "ĂĀăā̆", "a\x00b"]
+
+    def test_atone(self):
+        for caps in (True, False):
+            self.assertEqual([ch.atone(mot, caps) for mot in self.mots],
+                             [reference_atone(mot, caps) for mot in self.mots])
+            self.assertEqual(ch.atone_liste(self.mots, caps), [reference_atone(mot, caps) for mot in self.mots])
+
+    def test_deramise(self):
+        self.assertEqual([ch.deramise(mot) for mot in self.mots], [reference_deramise(mot) for mot in self.mots])
+        self.assertEqual(ch.deramise_liste(self.mots), [reference_deramise(mot) for mot in self.mots])
+        self.assertEqual(ch.deramise_liste([]), [])
+
+    def test_communes(self):
+        self.assertEqual([ch.communes(mot) for mot in ["", "Uerbum", "ae", "amo"]],
+                         ["", "\x01ē̆r\x01ū̆m", "āe", "āmō"])
+        self.assertEqual([ch.communes(mot) for mot in self.mots], [ch.communes.__wrapped__(mot) for mot in self.mots])
+
+    def test_tables(self):
+        """ Characters missing from the translation tables do not make them grow """
+        sizes = len(ch._ATONE), len(ch._ATONE_MAJUSCULES)
+        for caps in (True, False):
+            self.assertEqual(ch.atone("Ǆ中ёß😀" + chr(0x2100 + caps), caps),
+                             reference_atone("Ǆ中ёß😀" + chr(0x2100 + caps), caps))
+        self.assertEqual((len(ch._ATONE), len(ch._ATONE_MAJUSCULES)), sizes)
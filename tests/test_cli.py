@@ -0,0 +1,48 @@
+from io import StringIO
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from pycollatinus import Lemmatiseur
+from pycollatinus.cli import lemmatise_fichiers
+from tests.util import ExtendedTestCase
+
+
+class TestCli(ExtendedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lemmatizer = Lemmatiseur()
+        cls.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(cls.directory, "sub"))
+        with open(os.path.join(cls.directory, "a.txt"), "w") as f:
+            f.write("Cogito ergo sum")
+        with gzip.open(os.path.join(cls.directory, "sub", "b.txt.gz"), "wt") as f:
+            f.write("mihi Romanorum\nlegarat xzqw")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_jsonl(self):
+        expected = self.lemmatizer.lemmatise_multiple("Cogito ergo sum mihi Romanorum legarat xzqw", pos=True)
+        for jobs in (1, 2):
+            output = StringIO()
+            self.assertEqual(lemmatise_fichiers([self.directory], output, jobs=jobs, pos=True, tokens_per_chunk=2), 7)
+            lines = [json.loads(line) for line in output.getvalue().splitlines()]
+            self.assertEqual([line["analyses"] for line in lines], expected)
+            self.assertEqual(
+                [(os.path.basename(line["file"]), line["index"], line["token"]) for line in lines],
+                [("a.txt", 0, "Cogito"), ("a.txt", 1, "ergo"), ("a.txt", 2, "sum"), ("b.txt.gz", 0, "mihi"),
+                 ("b.txt.gz", 1, "Romanorum"), ("b.txt.gz", 2, "legarat"), ("b.txt.gz", 3, "xzqw")]
+            )
+
+    def test_tsv(self):
+        output = StringIO()
+        lemmatise_fichiers([os.path.join(self.directory, "sub", "b.txt.gz")], output, format="tsv")
+        lines = [line.split("\t") for line in output.getvalue().splitlines()]
+        self.assertEqual(lines[0], ["file", "index", "token", "form", "lemma", "morph", "radical", "desinence"])
+        self.assertIn(["", "1", "Romanorum", "romanorum", "Romanus", "génitif masculin pluriel", "Roman", "orum"],
+                      [[""] + line[1:] for line in lines])
+        self.assertEqual(lines[-1][1:], ["3", "xzqw", "", "", "", "", ""], "Unknown tokens keep a line")
@@ -1,10 +1,15 @@
 from pycollatinus import Lemmatiseur
+from pycollatinus.error import SnapshotVersionError
+from pycollatinus import snapshot
 from tests.util import ExtendedTestCase
+from unittest import mock
+import os
+import tempfile
 
 
 class TestDump(ExtendedTestCase):
     def test_dump_and_load(self):
-        lemmatizer = Lemmatiseur()
+        lemmatizer = Lemmatiseur(snapshot_dir=False)
         lemmatizer.compile()
 
         del lemmatizer
@@ -23,4 +28,83 @@ class TestDump(ExtendedTestCase):
                 {'form': 'romanorum', 'pos': 'a', 'morph': 'génitif masculin pluriel', 'lemma': 'Romanus', "radical": "Roman", "desinence": "orum"},
                 {'form': 'romanorum', 'pos': 'a', 'morph': 'génitif neutre pluriel', 'lemma': 'Romanus', "radical": "Roman", "desinence": "orum"},
             ]
-        ])
\ No newline at end of file
+        ])
+
+    def test_snapshot_and_pickle(self):
+        """ Both formats give the same analyses as the parsed lemmatiseur """
+        lemmatizer = Lemmatiseur()
+        phrase = "cogito ergo sum adprehendant exspirasset Christi XIV Pataui"
+        expected = lemmatizer.lemmatise_multiple(phrase, pos=True)
+        with tempfile.TemporaryDirectory() as directory:
+            for method in ("snapshot", "pickle"):
+                path = lemmatizer.compile(method=method, path=os.path.join(directory, method))
+                self.assertEqual(snapshot.est_snapshot(path), method == "snapshot")
+                self.assertEqual(Lemmatiseur.load(path).lemmatise_multiple(phrase, pos=True), expected)
+                cached = Lemmatiseur.load(path, cache_size=100)
+                self.assertEqual(cached.lemmatise_multiple(phrase, pos=True), expected)
+                self.assertGreater(cached.cache_info()["size"], 0)
+                self.assertIsNone(Lemmatiseur.load(path, cache_size=0).cache_info())
+
+    def test_snapshot_version(self):
+        """ A snapshot written with another format version falls back to parsing, with the options of the snapshot """
+        lemmatizer = Lemmatiseur(extension=False, cache_size=10)
+        with tempfile.TemporaryDirectory() as directory:
+            path = lemmatizer.compile(path=os.path.join(directory, "compiled.snapshot"))
+            self.assertEqual(snapshot.read_options(path), {"extension": False, "index_formes": False, "cache_size": 10})
+            with open(path, "r+b") as f:
+                f.seek(len(snapshot.MAGIC))
+                f.write((snapshot.VERSION + 1).to_bytes(4, "little"))
+            cache = os.listdir(snapshot.default_cache_dir())
+            with self.assertWarns(SnapshotVersionError):
+                reloaded = Lemmatiseur.load(path)
+            self.assertEqual(reloaded.load_report["source"], "parse")
+            self.assertIs(reloaded._extension, False)
+            self.assertEqual(len(reloaded._lemmes), len(lemmatizer._lemmes))
+            self.assertEqual(reloaded.cache_info()["maxsize"], 10)
+            self.assertEqual([r["lemma"] for r in reloaded.lemmatise("sum")], ["sum"])
+            # The parsed lemmatiseur is not written to the snapshot cache
+            self.assertEqual(os.listdir(snapshot.default_cache_dir()), cache)
+
+            # Versions which do not record their options cannot be rebuilt
+            with open(path, "r+b") as f:
+                f.seek(len(snapshot.MAGIC))
+                f.write((snapshot.VERSION_OPTIONS - 1).to_bytes(4, "little"))
+            self.assertIsNone(snapshot.read_options(path))
+            with self.assertRaises(SnapshotVersionError):
+                Lemmatiseur.load(path)
+
+    def test_snapshot_cache(self):
+        """ The constructor caches its snapshot and reloads it instead of parsing """
+        with tempfile.TemporaryDirectory() as directory:
+            lemmatizer = Lemmatiseur(snapshot_dir=directory, extension=False)
+            snapshots = os.listdir(directory)
+            self.assertEqual(len(snapshots), 1)
+            with mock.patch("pycollatinus.lemmatiseur.Parser.parse", side_effect=AssertionError("parsed")):
+                cached = Lemmatiseur(snapshot_dir=directory, extension=False, cache_size=10)
+            self.assertEqual(cached.lemmatise_multiple("Gallia est omnis divisa"),
+                             lemmatizer.lemmatise_multiple("Gallia est omnis divisa"))
+            self.assertEqual(cached.cache_info()["maxsize"], 10)
+
+            # Other options lead to a parse
+            Lemmatiseur(snapshot_dir=directory, extension="lazy")
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+    def test_snapshot_cache_truncated(self):
+        """ A truncated snapshot of the cache is parsed again and rewritten, with the options of the constructor """
+        with tempfile.TemporaryDirectory() as directory:
+            expected = Lemmatiseur(snapshot_dir=directory, extension=False)
+            path = os.path.join(directory, os.listdir(directory)[0])
+            size = os.path.getsize(path)
+            with open(path, "r+b") as f:
+                f.truncate(1000)
+            with self.assertWarns(UserWarning):
+                lemmatizer = Lemmatiseur(snapshot_dir=directory, extension=False, cache_size=10)
+            self.assertEqual(lemmatizer.load_report["source"], "parse")
+            self.assertEqual(lemmatizer.cache_info()["maxsize"], 10)
+            self.assertEqual(len(lemmatizer._lemmes), len(expected._lemmes))
+            self.assertEqual(lemmatizer.lemmatise_multiple("Gallia est omnis divisa"),
+                             expected.lemmatise_multiple("Gallia est omnis divisa"))
+            self.assertEqual(os.path.getsize(path), size)
+            with mock.patch("pycollatinus.lemmatiseur.Parser.parse", side_effect=AssertionError("parsed")):
+                cached = Lemmatiseur(snapshot_dir=directory, extension=False)
+            self.assertEqual(cached.load_report["source"], "snapshot")
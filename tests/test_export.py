@@ -0,0 +1,54 @@
+from io import StringIO
+import json
+import os
+import tempfile
+
+from pycollatinus import Lemmatiseur
+from pycollatinus.export import CHAMPS, export_paradigms, formate
+from tests.util import ExtendedTestCase
+
+
+class TestExport(ExtendedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lemmatizer = Lemmatiseur()
+        cls.lemmas = [cls.lemmatizer.lemme(lemma) for lemma in ["sum", "rosa", "alius"]]
+
+    def test_tsv(self):
+        text, forms = formate(self.lemmatizer, self.lemmas)
+        lines = [dict(zip(CHAMPS, line.split("\t"))) for line in text.splitlines()]
+        self.assertEqual(forms, sum(len(lemma.paradigm()) for lemma in self.lemmas))
+        self.assertEqual(len(lines), forms)
+        self.assertIn(
+            {"lemma": "rosa", "pos": "n", "form": "rosarum", "morpho": "10", "morph": "génitif pluriel",
+             "radical": "ros", "desinence": "arum"},
+            lines
+        )
+        self.assertIn(
+            {"lemma": "sum", "pos": "v", "form": "forem", "morpho": "163",
+             "morph": self.lemmatizer.morpho(163), "radical": "", "desinence": ""},
+            lines
+        )
+
+    def test_jsonl(self):
+        text, forms = formate(self.lemmatizer, self.lemmas, format="jsonl")
+        lines = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual([line["lemma"] for line in lines], ["sum", "rosa", "alius"])
+        self.assertEqual(
+            [[(form["form"], form["morpho"]) for form in line["paradigm"]] for line in lines],
+            [[(form, morpho) for form, morpho, _, _ in lemma.paradigm()] for lemma in self.lemmas]
+        )
+
+    def test_jobs(self):
+        """ Chunks exported by several processes are written in the order of the lexicon """
+        with tempfile.TemporaryDirectory() as directory:
+            model = Lemmatiseur(extension=False).compile(path=os.path.join(directory, "compiled.snapshot"))
+            outputs = []
+            for jobs in (1, 2):
+                output = StringIO()
+                counts = export_paradigms(output, jobs=jobs, model=model, lemmas_per_chunk=997)
+                outputs.append((counts, output.getvalue().encode("utf-8")))
+        self.assertEqual(outputs[0], outputs[1])
+        (lemmas, forms), text = outputs[0]
+        self.assertEqual(text.count(b"\n"), forms + 1)
+        self.assertGreater(lemmas, 997 * 2)
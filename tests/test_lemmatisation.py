@@ -1,10 +1,14 @@
+from io import StringIO
+from unittest import mock
 from pycollatinus import Lemmatiseur
 from pycollatinus.parser import Parser
+from pycollatinus.traits import TRAITS, decompose, noms
 from tests.util import ExtendedTestCase
 
 
 class TestSentences(ExtendedTestCase):
-    lemmatizer = Lemmatiseur()
+    # Always parsed from the Collatinus data, never loaded from a snapshot
+    lemmatizer = Lemmatiseur(snapshot_dir=False)
     parser = Parser(lemmatizer)
 
     def test_cogito_ergo_sum(self):
@@ -98,6 +102,56 @@ class TestSentences(ExtendedTestCase):
             results, expected, "Invar should be correctly recognized"
         )
 
+    def test_lemmatise_batch(self):
+        """ Check that the batch API analyses each type once and keeps the order of tokens """
+        tokens = ["et", "mihi", "et", "Romanorum", "mihi", "et"]
+        results, stats = TestSentences.lemmatizer.lemmatise_batch(tokens, pos=True, with_stats=True)
+        self.assertEqual(stats, {"tokens": 6, "types": 3})
+        self.assertEqual(results, TestSentences.lemmatizer.lemmatise_multiple(" ".join(tokens), pos=True))
+        self.assertIs(results[0], results[2], "Occurrences of the same type should share their results")
+
+    def test_lemmatise_stream(self):
+        """ Check that words cut between two chunks are rebuilt """
+        text = "Et flavescit haphe, gravesque draucis\nmihi Romanorum "
+        expected = TestSentences.lemmatizer.lemmatise_multiple(text)
+        self.assertEqual(list(TestSentences.lemmatizer.lemmatise_stream(StringIO(text), chunk_size=4)), expected)
+        self.assertEqual(
+            list(TestSentences.lemmatizer.lemmatise_stream(["Et flaves", "cit haphe, gr", "avesque draucis\nmihi Ro",
+                                                            "manorum"])),
+            expected
+        )
+
+    def test_extension(self):
+        """ The extension lexicon can be skipped, or loaded on the first unknown form """
+        abaculus = [{'form': 'abaculus', 'lemma': 'abaculus', 'morph': 'nominatif singulier',
+                     'radical': 'abacul', 'desinence': 'us'}]
+        self.assertEqual(list(Lemmatiseur(extension=False).lemmatise("abaculus")), [])
+
+        lazy = Lemmatiseur(extension="lazy", cache_size=10)
+        self.assertEqual(list(lazy.lemmatise("sum")), list(TestSentences.lemmatizer.lemmatise("sum")))
+        self.assertEqual(lazy._extension, "lazy", "Known forms do not load the extension")
+        self.assertEqual(list(lazy.lemmatise("abaculus")), abaculus)
+        self.assertIs(lazy._extension, True)
+        self.assertEqual(len(lazy._lemmes), len(TestSentences.lemmatizer._lemmes))
+
+    def test_load_report(self):
+        """ Each stage of the loading is timed, and profiled on demand """
+        report = Lemmatiseur(extension=False, snapshot_dir=False).load_report
+        self.assertEqual(report["source"], "parse")
+        self.assertEqual(
+            [etape["stage"] for etape in report["stages"]],
+            ["ajAssims", "ajContractions", "ajMorphos", "ajModeles", "ajLexiques", "ajIrreguliers"]
+        )
+        self.assertIsNone(report["stages"][0]["counts"])
+
+        lemmatiseur = Lemmatiseur(extension=False, snapshot_dir=False, profile_load=True)
+        etapes = {etape["stage"]: etape for etape in lemmatiseur.load_report["stages"]}
+        self.assertEqual(etapes["ajModeles"]["counts"]["modeles"], len(lemmatiseur._modeles))
+        self.assertEqual(etapes["ajLexiques"]["counts"]["lemmes"], len(lemmatiseur._lemmes))
+        self.assertEqual(etapes["ajLexiques"]["counts"]["modeles"], 0)
+        self.assertGreater(etapes["ajLexiques"]["memory"], 0)
+        self.assertGreaterEqual(etapes["ajLexiques"]["memory_peak"], etapes["ajLexiques"]["memory"])
+
     def test_possible_forms(self):
         self.assertEqual(
             sorted(list(self.lemmatizer.lemmatise("bellus", get_lemma_object=True))[0]["lemma"].possible_forms()),
@@ -141,6 +195,32 @@ class TestSentences(ExtendedTestCase):
             ])
         )
 
+    def test_paradigm(self):
+        """ Paradigms respect missing morphologies and exclusive irregular forms, and are computed once """
+        alius = self.lemmatizer.lemme("alius")
+        paradigm = alius.paradigm()
+        self.assertIs(alius.paradigm(), paradigm)
+        self.assertEqual(
+            [(form, morpho) for form, morpho, radical, desinence in paradigm if morpho in (37, 38, 39)],
+            [("aliud", 37), ("aliud", 38), ("aliud", 39)]
+        )
+        self.assertFalse(
+            set(self.lemmatizer.lemme("aliquis").modele().absents()) &
+            {morpho for _, morpho, _, _ in self.lemmatizer.lemme("aliquis").paradigm()}
+        )
+        sum_ = self.lemmatizer.lemme("sum")
+        self.assertIn(("forem", 163, None, None), sum_.paradigm())
+        self.assertEqual({form for form, _, _, _ in self.lemmatizer.lemme("bellus").paradigm()},
+                         set(self.lemmatizer.lemme("bellus").possible_forms()))
+        # Each form is analysed back as its lemma and morphology, irregular forms giving their lemma with lemme()
+        for lemma in ["alius", "sum", "bellus", "do"]:
+            lemma = self.lemmatizer.lemme(lemma)
+            for form, morpho, radical, desinence in lemma.paradigm():
+                self.assertIn((lemma, morpho), [
+                    (analysis.lemme.lemme() if analysis.rad is None else analysis.lemme, analysis.morpho)
+                    for analysis in self.lemmatizer.lemmatise(form, as_dict=False)
+                ])
+
     def test_assimilations(self):
         """ Check that lemmatizer handles correctly assimilations """
         results = TestSentences.lemmatizer.lemmatise_multiple("adprehendant expectari")
@@ -179,6 +259,79 @@ class TestSentences(ExtendedTestCase):
             _lemma_obj=True
         )
 
+    def test_variants(self):
+        """ Each distinct variant of a token is analysed once, and its analyses are repeated in place """
+        lemmatizer = TestSentences.lemmatizer
+        lemmatizer.clear_variant_info()
+        self.assertEqual(len(list(lemmatizer.lemmatise("Cogito"))), len(list(lemmatizer.lemmatise("cogito"))))
+        self.assertEqual(lemmatizer.variant_info(), {"tokens": 2, "variants": 3, "analysed": 3, "reused": 0})
+
+        lemmatizer.clear_variant_info()
+        with mock.patch.object(lemmatizer, "_variantes", return_value=["sum", "est", "sum"]):
+            results = list(lemmatizer.lemmatise("sum", as_dict=False))
+        sum_, est = list(lemmatizer._lemmatise("sum")), list(lemmatizer._lemmatise("est"))
+        self.assertEqual(results, sum_ + est + sum_)
+        self.assertEqual(lemmatizer.variant_info()["reused"], 1)
+
+    def test_top_k(self):
+        """ Ranked analyses are the best of the whole cascade, by lemma frequency times desinence rarity """
+        lemmatizer = TestSentences.lemmatizer
+
+        def frequency(analysis):
+            lemma = analysis.lemme.lemme() if analysis.rad is None and analysis.morpho is not None else analysis.lemme
+            return lemma.nbOcc() * (analysis.des.rarete() if analysis.des else 10), lemma.nbOcc()
+
+        for token in ["cogito", "ergo", "est", "Belgae", "quique", "domu", "XIV"]:
+            ranked = sorted(lemmatizer.lemmatise(token, as_dict=False), key=lambda analysis: -frequency(analysis)[0])
+            self.assertEqual(list(lemmatizer.lemmatise(token, as_dict=False, top_k=1)), ranked[:1])
+            self.assertEqual(list(lemmatizer.lemmatise(token, as_dict=False, top_k=3)), ranked[:3])
+            self.assertEqual(
+                list(lemmatizer.lemmatise(token, as_dict=False, min_frequency=100)),
+                [analysis for analysis in ranked if frequency(analysis)[1] >= 100]
+            )
+        results = lemmatizer.lemmatise_multiple("cogito ergo sum", top_k=1)
+        self.assertEqual([[result["lemma"] for result in token] for token in results], [["cogo"], ["ergo"], ["sum"]])
+        with self.assertRaises(ValueError):
+            list(lemmatizer.lemmatise("sum", top_k=0))
+
+    def test_features(self):
+        """ Morphologies are decomposed into feature masks, and filters compare masks before building results """
+        lemmatizer = TestSentences.lemmatizer
+        self.assertEqual(noms(decompose("3ème singulier indicatif futur antérieur actif")),
+                         ["singulier", "3ème", "futur antérieur", "indicatif", "actif"])
+        self.assertEqual(decompose("génitif pluriel"), TRAITS["génitif"] | TRAITS["pluriel"])
+        with self.assertRaises(ValueError):
+            list(lemmatizer.lemmatise("rosarum", features="genitive"))
+
+        def expected(token, *groups):
+            return [result for result in lemmatizer.lemmatise(token)
+                    if all(set(group) & set(result["morph"].split()) for group in groups)]
+
+        self.assertEqual(list(lemmatizer.lemmatise("rosis", features="datif")), expected("rosis", ["datif"]))
+        self.assertEqual(list(lemmatizer.lemmatise("legatorum", features=["génitif", "datif", "masculin"])),
+                         expected("legatorum", ["génitif", "datif"], ["masculin"]))
+        self.assertEqual(list(lemmatizer.lemmatise("XIV", features="pluriel")), [])
+        ranked = [analysis for analysis in lemmatizer.lemmatise("amati", as_dict=False, top_k=100)
+                  if analysis.features & TRAITS["nominatif"]]
+        self.assertEqual(list(lemmatizer.lemmatise("amati", as_dict=False, top_k=2, features="nominatif")),
+                         ranked[:2])
+        text = "Cogito ergo sum rosarum legatorum"
+        self.assertEqual(
+            list(lemmatizer.lemmatise_stream(StringIO(text), chunk_size=5, features="pluriel", top_k=2,
+                                             with_features=True)),
+            lemmatizer.lemmatise_multiple(text, features="pluriel", top_k=2, with_features=True)
+        )
+        result = list(lemmatizer.lemmatise("rosarum", with_features=True))[-1]
+        self.assertEqual(result["morph"], lemmatizer.morpho(result["morpho"]))
+        self.assertEqual(result["features"], decompose(result["morph"]))
+
+    def test_assims_prefixes(self):
+        """ Assimilations are looked up by prefix, in the order of data/assimilations.la """
+        self.assertEqual(TestSentences.lemmatizer.assims("adfero"), "affero")
+        self.assertEqual(TestSentences.lemmatizer.desassims("affero"), "adfero")
+        self.assertEqual(TestSentences.lemmatizer.desassims("exul"), "exsul")
+        self.assertEqual(TestSentences.lemmatizer.assims("ferro"), "ferro")
+
     def test_lower_case(self):
         results = TestSentences.lemmatizer.lemmatise("Christi", get_lemma_object=True)
         self.assertLemmatisationEqual(
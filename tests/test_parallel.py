@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+
+from pycollatinus import Lemmatiseur
+from pycollatinus.parallel import LemmatiseurPool
+from tests.util import ExtendedTestCase
+
+
+class TestParallel(ExtendedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lemmatizer = Lemmatiseur()
+        cls.directory = tempfile.mkdtemp()
+        path = cls.lemmatizer.compile(path=os.path.join(cls.directory, "compiled.snapshot"))
+        cls.pool = LemmatiseurPool(processes=2, path=path, tokens_per_chunk=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+        shutil.rmtree(cls.directory)
+
+    def test_map(self):
+        documents = ["cogito ergo sum", "mihi Romanorum", "nec aliud sequenti quadriduo"]
+        self.assertEqual(
+            self.pool.map(documents, pos=True),
+            [self.lemmatizer.lemmatise_multiple(document, pos=True) for document in documents]
+        )
+        self.assertEqual(
+            list(self.pool.imap(documents)),
+            [self.lemmatizer.lemmatise_multiple(document) for document in documents]
+        )
+
+    def test_stream(self):
+        text = "Et flavescit haphe gravesque draucis mihi Romanorum cogito ergo sum"
+        self.assertEqual(
+            list(self.pool.lemmatise_stream(["Et flavescit haphe grave", "sque draucis mihi Romanorum ",
+                                             "cogito ergo sum"])),
+            self.lemmatizer.lemmatise_multiple(text)
+        )
+
+    def test_parse_processes(self):
+        """ Reading the lexicon in several processes builds the same lemmatiseur """
+        sequential = Lemmatiseur(extension=False, snapshot_dir=False)
+        parallel = Lemmatiseur(extension=False, parse_processes=2, snapshot_dir=False)
+        self.assertEqual(list(parallel._lemmes), list(sequential._lemmes))
+        self.assertEqual(list(parallel._radicaux), list(sequential._radicaux))
+        phrase = "Gallia est omnis divisa in partes tres Patauium legarat"
+        self.assertEqual(parallel.lemmatise_multiple(phrase, pos=True), sequential.lemmatise_multiple(phrase, pos=True))
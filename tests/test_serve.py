@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+import json
+import threading
+
+from pycollatinus import Lemmatiseur
+from pycollatinus.serve import LemmatisationServer
+from tests.util import ExtendedTestCase
+
+
+class TestServer(ExtendedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lemmatizer = Lemmatiseur(cache_size=1000)
+        cls.server = LemmatisationServer(("127.0.0.1", 0), cls.lemmatizer, max_wait=0.05, quiet=True)
+        cls.url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def post(self, body):
+        request = Request(self.url + "/lemmatise", data=json.dumps(body).encode("utf-8"),
+                          headers={"Content-Type": "application/json"})
+        with urlopen(request) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def test_lemmatise(self):
+        self.assertEqual(
+            self.post({"text": "Cogito ergo sum", "pos": True})["results"],
+            self.lemmatizer.lemmatise_multiple("Cogito ergo sum", pos=True)
+        )
+        self.assertEqual(self.post({"tokens": ["mihi", "Romanorum"]})["results"],
+                         self.lemmatizer.lemmatise_multiple("mihi Romanorum"))
+        self.assertEqual(self.post({"token": "sum"})["result"], list(self.lemmatizer.lemmatise("sum")))
+        for body in ({"form": "sum"}, {"tokens": "sum"}, {"tokens": 5}):
+            with self.assertRaises(HTTPError) as error:
+                self.post(body)
+            self.assertEqual(error.exception.code, 400)
+            error.exception.close()
+
+    def test_port_in_use(self):
+        """ No batcher thread is left behind when the port cannot be bound """
+        batchers = [thread for thread in threading.enumerate() if thread.name == "pycollatinus-batcher"]
+        with self.assertRaises(OSError):
+            LemmatisationServer(self.server.server_address, self.lemmatizer, quiet=True)
+        self.assertEqual([thread for thread in threading.enumerate() if thread.name == "pycollatinus-batcher"],
+                         batchers)
+
+    def test_micro_batches(self):
+        """ Concurrent requests are lemmatised together """
+        before = self.server.batcher.metrics()
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: self.post({"text": "arma uirumque cano"}), range(16)))
+        self.assertEqual([result["results"] for result in results],
+                         [self.lemmatizer.lemmatise_multiple("arma uirumque cano")] * 16)
+        with urlopen(self.url + "/metrics") as response:
+            metrics = json.loads(response.read().decode("utf-8"))
+        self.assertEqual(metrics["requests"] - before["requests"], 16)
+        self.assertLess(metrics["batches"] - before["batches"], 16)
+        self.assertEqual(sorted(metrics["latency_ms"]), ["p50", "p90", "p99"])
+        self.assertEqual(metrics["cache"]["maxsize"], 1000)
@@ -72,6 +72,68 @@ class TestSpecificCases(TestCase):
             ["Romanus|a"]
         )
 
+    def test_index_formes(self):
+        """ Check that the index of inflected forms gives the same results as the radical + desinence split """
+        x = Lemmatiseur(load=False)
+        parser = Parser(x)
+        parser.ajMorphos()
+        load_mod_vars(x)
+
+        lupus = parser.parse_modele(["modele:lupus", "R:1:2,0", "des:1-12:1:$lupus", "pos:n"])
+        x._modeles[lupus.gr()] = lupus
+        templum = parser.parse_modele(["modele:templum", "R:1:2,0", "des:1-12:1:$templum", "pos:n"])
+        x._modeles[templum.gr()] = templum
+
+        parser.parse_lemme("Rōmānus2|lupus|||i, m.|8", origin=0)
+        parser.parse_lemme("Pătăvĭum|templum|||ii, n.|17", origin=0)
+
+        formes = ["romanorum", "romani", "pataui", "patauium", "patauio", "romanus", "roma"]
+        attendus = [list(x.lemmatise(forme)) for forme in formes]
+        index = x.indexe_formes()
+        self.assertEqual([list(x.lemmatise(forme)) for forme in formes], attendus)
+        self.assertIn({'lemma': 'Patauium', 'morph': 'génitif singulier', 'form': 'pataui',
+                       'radical': 'Pataui', 'desinence': 'i'}, attendus[2])
+        self.assertEqual(index.stats()["forms"], 16)
+
+    def test_cache(self):
+        """ Check that the analysis cache evicts, counts and protects its content """
+        x = Lemmatiseur(load=False, cache_size=2)
+        parser = Parser(x)
+        parser.ajMorphos()
+        m = parser.parse_modele(["modele:inv", "R:0:0,0", "des:416:0:-"])
+        x._modeles[m.gr()] = m
+        parser.parse_lemme("nĕc|inv|||adv.|6689", origin=0)
+        parser.parse_lemme("ergō=ērgō|inv|||conj.|1450", origin=0)
+
+        resultat = list(x.lemmatise("nec"))
+        resultat[0]["lemma"] = "corrupted"
+        self.assertEqual(list(x.lemmatise("nec")), [{'lemma': 'nec', 'morph': '-', 'form': 'nec',
+                                                     "radical": "nec", "desinence": ""}])
+        list(x.lemmatise("ergo"))
+        # Cached analyses do not depend on the output options
+        self.assertEqual(list(x.lemmatise("nec", pos=True))[0]["pos"], "d")
+        list(x.lemmatise("sum"))
+        self.assertEqual(x.cache_info(), {"hits": 2, "misses": 3, "evictions": 1, "size": 2, "maxsize": 2})
+        x.clear_cache()
+        self.assertEqual(x.cache_info(), {"hits": 0, "misses": 0, "evictions": 0, "size": 0, "maxsize": 2})
+
+    def test_records(self):
+        """ Check that Analyse records resolve the same fields as the dictionaries """
+        x = Lemmatiseur(load=False)
+        parser = Parser(x)
+        parser.ajMorphos()
+        m = parser.parse_modele(["modele:inv", "R:0:0,0", "des:416:0:-"])
+        x._modeles[m.gr()] = m
+        parser.parse_lemme("nĕc|inv|||adv.|6689", origin=0)
+
+        analyse, = x.lemmatise("Nec", as_dict=False)
+        self.assertEqual(
+            (analyse.form, analyse.lemma, analyse.morph, analyse.radical, analyse.desinence, analyse.pos),
+            ("nec", "nec", "-", "nec", "", "d")
+        )
+        self.assertIs(analyse.lemme, x.lemme("nec"))
+        self.assertEqual(analyse.to_dict(with_pos=True), list(x.lemmatise("Nec", pos=True))[0])
+
     def test_contraction(self):
 
         x = Lemmatiseur(load=False)
@@ -0,0 +1,88 @@
+from unittest import skipUnless
+
+from pycollatinus import Lemmatiseur
+from pycollatinus.traits import decompose
+from tests.util import ExtendedTestCase
+
+try:
+    import numpy
+    from pycollatinus.tagger import Tagger, tags
+except ImportError:
+    numpy = None
+
+
+@skipUnless(numpy, "NumPy is needed by the tagger")
+class TestTagger(ExtendedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lemmatizer = Lemmatiseur()
+        cls.tagger = Tagger(cls.lemmatizer)
+
+    def test_tags(self):
+        """ Analyses are summed up by the tags of data/tags.la """
+        self.assertEqual(tags("n", decompose("accusatif pluriel")), ["n32"])
+        self.assertEqual(tags("v", decompose("ablatif féminin pluriel participe parfait passif")), ["w62"])
+        self.assertEqual(tags("v", decompose("3ème singulier indicatif présent actif")), ["v11"])
+        self.assertEqual(tags("v", decompose("3ème singulier subjonctif parfait actif")), ["v2 "])
+        self.assertEqual(tags("n", decompose("locatif")), ["n71"])
+        self.assertEqual(tags("cd", decompose("-")), ["c  ", "d  "])
+        self.assertEqual(tags("v", self.lemmatizer.morpho_features(265)), ["w31"])
+        self.assertEqual(tags("v", self.lemmatizer.morpho_features(266)), ["w61"])
+        self.assertEqual(self.tagger._trigrammes.shape, (len(self.tagger.tags) + 1,) * 3)
+
+    def test_tag(self):
+        results = self.tagger.tag("Gallia est omnis diuisa in partes tres. Arma uirumque cano.", pos=True)
+        self.assertEqual(
+            [(result["lemma"], result["pos"]) for result in results],
+            [("Gallia", "n"), ("sum", "v"), ("omnis", "a"), ("diuido", "v"), ("in", "r"), ("pars", "n"),
+             ("tres", "a"), ("arma", "n"), ("uir", "n"), ("cano", "v")]
+        )
+        self.assertEqual(results[5]["morph"], "accusatif pluriel")
+
+    def test_disambiguate(self):
+        """ Best analyses and n-best lists are chosen among the analyses of lemmatise_multiple() """
+        sentences = [
+            self.lemmatizer.lemmatise_multiple(sentence, as_dict=False)
+            for sentence in ["Cogito ergo sum", "Arma uirumque cano xzqw", "rosa"]
+        ]
+        best = self.tagger.disambiguate(sentences)
+        n_best = self.tagger.disambiguate(sentences, n_best=3)
+        beam = self.tagger.disambiguate(sentences, n_best=100, beam=0)
+        for sentence, best_sentence, n_best_sentence, beam_sentence in zip(sentences, best, n_best, beam):
+            self.assertEqual(len(best_sentence), len(sentence))
+            for analyses, analysis, n_best_analyses, beam_analyses in zip(
+                    sentence, best_sentence, n_best_sentence, beam_sentence):
+                if not analyses:
+                    self.assertIsNone(analysis)
+                    self.assertEqual(n_best_analyses, [])
+                    continue
+                self.assertIn(analysis, analyses)
+                self.assertEqual(n_best_analyses[0], analysis)
+                self.assertLessEqual(len(n_best_analyses), 3)
+                self.assertEqual(beam_analyses[0], analysis)
+                self.assertLessEqual(len(beam_analyses), len(analyses))
+        self.assertIsNone(best[1][3], "Unknown tokens have no analysis")
+
+        # Dictionaries with their lemma objects give the same choices
+        dicts = [
+            self.lemmatizer.lemmatise_multiple(sentence, pos=True, get_lemma_object=True)
+            for sentence in ["Cogito ergo sum", "rosa"]
+        ]
+        self.assertEqual(
+            self.tagger.disambiguate(dicts),
+            [[analysis.to_dict(with_pos=True, raw_obj=True) for analysis in best[0]],
+             [best[2][0].to_dict(with_pos=True, raw_obj=True)]]
+        )
+
+    def test_batches(self):
+        """ Sentences decoded in small batches get the choices they get alone """
+        text = "Gallia est omnis diuisa in partes tres, quarum unam incolunt Belgae, aliam Aquitani, tertiam qui " \
+               "ipsorum lingua Celtae, nostra Galli appellantur. Hi omnes lingua, institutis, legibus inter se " \
+               "differunt. Quo usque tandem abutere, Catilina, patientia nostra. Arma uirumque cano. Ibi."
+        small_batches = Tagger(self.lemmatizer, batch_size=500)
+        sentences = [self.lemmatizer.lemmatise_multiple(sentence, as_dict=False) for sentence in text.split(".")]
+        self.assertGreater(len(list(small_batches._lots([s for s in sentences if s]))), 1)
+        self.assertEqual(
+            small_batches.disambiguate(sentences),
+            [self.tagger.disambiguate([sentence])[0] for sentence in sentences]
+        )
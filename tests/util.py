@@ -1,4 +1,14 @@
 from unittest import TestCase
+import atexit
+import os
+import shutil
+import tempfile
+
+
+# Snapshots written by the tests go to a temporary directory rather than to the cache of the user, so that
+# a stale or corrupted snapshot there cannot change their results
+os.environ["PYCOLLATINUS_CACHE"] = tempfile.mkdtemp(prefix="pycollatinus-tests-")
+atexit.register(shutil.rmtree, os.environ["PYCOLLATINUS_CACHE"], ignore_errors=True)
 
 
 class ExtendedTestCase(TestCase):